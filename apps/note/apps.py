@@ -5,3 +5,6 @@ class NoteConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'note'
     verbose_name = '笔记'
+
+    def ready(self):
+        from note.signals import note_post_save_handler
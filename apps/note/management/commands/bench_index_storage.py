@@ -0,0 +1,118 @@
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import jieba
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from haystack import connections
+
+from note.models import Note
+from yus_note.haystack.backends.whoosh_cn_backend import (
+    WhooshSearchBackend,
+    close_memory_store,
+)
+
+
+def percentile(values, p):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+class Command(BaseCommand):
+    help = "比较file与memory两种索引存储的建索引与查询耗时（使用当前数据库中的笔记）"
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--query",
+            action="append",
+            dest="queries",
+            default=[],
+            help="查询词，可以指定多个（默认从笔记标题中分词选取）",
+        )
+        parser.add_argument(
+            "--rounds",
+            type=int,
+            default=20,
+            help="每个查询词重复查询次数（默认20）",
+        )
+        parser.add_argument(
+            "--using",
+            default="default",
+            help="使用的haystack连接（默认default）",
+        )
+
+    def get_queries(self, limit=50):
+        words = []
+        titles = Note.objects.filter(is_delete=False).values_list("title", flat=True)
+        for title in titles[:limit]:
+            words.extend(w for w in jieba.cut(title) if len(w.strip()) > 1)
+        return list(dict.fromkeys(words))[:limit] or ["笔记"]
+
+    def bench(self, storage, path, using, queries, rounds):
+        backend = WhooshSearchBackend(
+            using,
+            **dict(settings.HAYSTACK_CONNECTIONS[using], PATH=path, STORAGE=storage),
+        )
+        backend.setup()
+        unified_index = connections[using].get_unified_index()
+
+        start = time.perf_counter()
+        docs = 0
+        for model in unified_index.get_indexed_models():
+            search_index = unified_index.get_index(model)
+            objs = list(search_index.index_queryset(using=using))
+            backend.update(search_index, objs)
+            docs += len(objs)
+        index_seconds = time.perf_counter() - start
+
+        latencies = []
+        for _ in range(rounds):
+            for q in queries:
+                start = time.perf_counter()
+                backend.search(q, end_offset=20)
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        return {
+            "storage": storage,
+            "docs": docs,
+            "index_seconds": index_seconds,
+            "p50": percentile(latencies, 50),
+            "p99": percentile(latencies, 99),
+            "mean": sum(latencies) / len(latencies),
+        }
+
+    def handle(self, *args, **options):
+        queries = options["queries"] or self.get_queries()
+        results = []
+        tmp_dir = Path(tempfile.mkdtemp(prefix="bench_index_storage_"))
+        try:
+            for storage in ("file", "memory"):
+                path = str(tmp_dir / storage)
+                results.append(
+                    self.bench(
+                        storage, path, options["using"], queries, options["rounds"]
+                    )
+                )
+                close_memory_store(path, persist=False)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        self.stdout.write(
+            "查询词数: {}，每词查询次数: {}".format(len(queries), options["rounds"])
+        )
+        self.stdout.write(
+            "{:<8}{:>8}{:>12}{:>12}{:>12}{:>12}".format(
+                "storage", "docs", "index(s)", "p50(ms)", "p99(ms)", "mean(ms)"
+            )
+        )
+        for r in results:
+            self.stdout.write(
+                "{storage:<8}{docs:>8}{index_seconds:>12.3f}{p50:>12.3f}{p99:>12.3f}{mean:>12.3f}".format(
+                    **r
+                )
+            )
@@ -0,0 +1,155 @@
+import io
+import json
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from yus_note.drf.renderers import FastJSONParser, FastJSONRenderer, orjson
+
+
+def note_rows(rnd, n):
+    """NoteListSerializer / UserNoteListSerializer 形状的列表"""
+    return [
+        {
+            "id": i,
+            "tags": [
+                {"id": t, "name": f"标签{t}", "category": rnd.randint(1, 10)}
+                for t in rnd.sample(range(1, 200), 3)
+            ],
+            "title": f"笔记标题{i}：" + "测试" * rnd.randint(1, 10),
+            "views": rnd.randint(0, 100000),
+            "likes": rnd.randint(0, 1000),
+            "comment_count": rnd.randint(0, 100),
+            "is_private": rnd.random() < 0.2,
+        }
+        for i in range(n)
+    ]
+
+
+def user_rows(rnd, n):
+    """UserListSerializer 形状的列表（关注/粉丝列表）"""
+    return [
+        {
+            "id": i,
+            "username": f"user{i}",
+            "nickname": f"用户{i}",
+            "avator": f"http://127.0.0.1:8000/media/user/avators/{i}-user{i}.png",
+            "following_number": rnd.randint(0, 1000),
+            "followers_number": rnd.randint(0, 100000),
+        }
+        for i in range(n)
+    ]
+
+
+def user_detail(rnd, months):
+    """UserDetailSerializer 形状，复习和发布记录各包含months个月"""
+
+    def history():
+        return {
+            f"{2000 + m // 12}-{m % 12 + 1:02d}": ",".join(
+                str(rnd.randint(0, 50)) for _ in range(31)
+            )
+            for m in range(months)
+        }
+
+    return {
+        "id": 1,
+        "username": "user1",
+        "nickname": "用户1",
+        "email": "user1@example.com",
+        "phone": "13800000000",
+        "avator": "http://127.0.0.1:8000/media/user/default_avators/male.png",
+        "registration_date": "2023-01-01",
+        "last_publish_datetime": "2023-06-01T12:00:00.123456+08:00",
+        "review_history": history(),
+        "publish_history": history(),
+        "following_number": 10,
+        "followers_number": 100,
+    }
+
+
+class Command(BaseCommand):
+    help = "JSON渲染/解析基准测试：比较drf默认实现与orjson实现在大响应上的耗时，并检查输出是否一致"
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument("--rows", type=int, default=1000, help="列表条数（默认1000）")
+        parser.add_argument(
+            "--months", type=int, default=120, help="用户详情中记录的月数（默认120）"
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=50, help="每项测试的重复次数（默认50）"
+        )
+        parser.add_argument("--seed", type=int, default=0, help="随机种子（默认0）")
+        parser.add_argument(
+            "--json", action="store_true", dest="as_json", help="以json格式输出结果"
+        )
+
+    def timed(self, func, repeat):
+        """重复执行func，返回每次的平均毫秒数"""
+        func()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        return (time.perf_counter() - start) * 1000 / repeat
+
+    def bench(self, data, repeat):
+        slow_renderer, fast_renderer = JSONRenderer(), FastJSONRenderer()
+        slow_parser, fast_parser = JSONParser(), FastJSONParser()
+        slow = slow_renderer.render(data)
+        fast = fast_renderer.render(data)
+        res = {
+            "bytes": len(slow),
+            "render_ms": self.timed(lambda: slow_renderer.render(data), repeat),
+            "fast_render_ms": self.timed(lambda: fast_renderer.render(data), repeat),
+            "parse_ms": self.timed(
+                lambda: slow_parser.parse(io.BytesIO(slow)), repeat
+            ),
+            "fast_parse_ms": self.timed(
+                lambda: fast_parser.parse(io.BytesIO(slow)), repeat
+            ),
+            "same_output": fast == slow,
+            "same_data": json.loads(fast) == json.loads(slow),
+        }
+        res["render_speedup"] = res["render_ms"] / res["fast_render_ms"]
+        res["parse_speedup"] = res["parse_ms"] / res["fast_parse_ms"]
+        return res
+
+    def handle(self, *args, **options):
+        rnd = random.Random(options["seed"])
+        payloads = {
+            "notes": note_rows(rnd, options["rows"]),
+            "users": user_rows(rnd, options["rows"]),
+            "user_detail": user_detail(rnd, options["months"]),
+        }
+        results = {"orjson": orjson.__version__ if orjson else None}
+        for name, data in payloads.items():
+            results[name] = self.bench(data, options["repeat"])
+
+        if options["as_json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        self.stdout.write(f"orjson: {results['orjson'] or '未安装，使用标准库'}")
+        self.stdout.write(
+            "{:<12}{:>10}{:>12}{:>12}{:>9}{:>12}{:>12}{:>9}{:>6}".format(
+                "payload",
+                "bytes",
+                "render(ms)",
+                "orjson(ms)",
+                "speedup",
+                "parse(ms)",
+                "orjson(ms)",
+                "speedup",
+                "same",
+            )
+        )
+        for name in payloads:
+            self.stdout.write(
+                "{:<12}{bytes:>10}{render_ms:>12.3f}{fast_render_ms:>12.3f}"
+                "{render_speedup:>9.1f}{parse_ms:>12.3f}{fast_parse_ms:>12.3f}"
+                "{parse_speedup:>9.1f}{same_output!s:>6}".format(name, **results[name])
+            )
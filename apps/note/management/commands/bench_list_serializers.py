@@ -0,0 +1,158 @@
+import json
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from note.management import corpus
+from note.models import Note
+from note.serializers import (
+    NoteListSerializer,
+    NoteListValuesSerializer,
+    UserNoteListSerializer,
+    UserNoteListValuesSerializer,
+)
+from user.models import User, UserRelations
+from user_proxy.serializers import (
+    UserFollowersListSerializer,
+    UserFollowersListValuesSerializer,
+)
+
+
+def render(data) -> bytes:
+    """比较渲染后的JSON，字段和标签的顺序也必须一致"""
+    return JSONRenderer().render(data)
+
+
+class Command(BaseCommand):
+    help = (
+        "列表序列化基准测试：比较ModelSerializer与由.values()构建字典的快速序列化在大列表上的每行耗时，"
+        "并检查两者输出是否一致。需要使用基准测试配置运行：--settings=yus_note.settings_bench"
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument("--notes", type=int, default=5000, help="笔记数量（默认5000）")
+        parser.add_argument("--users", type=int, default=2000, help="用户数量（默认2000）")
+        parser.add_argument("--repeat", type=int, default=5, help="每项测试的重复次数（默认5）")
+        parser.add_argument("--seed", type=int, default=0, help="随机种子（默认0）")
+        parser.add_argument(
+            "--json", action="store_true", dest="as_json", help="以json格式输出结果"
+        )
+
+    def prepare_data(self, options):
+        call_command("migrate", verbosity=0)
+        call_command("flush", interactive=False, verbosity=0)
+        # 笔记集中在少数作者名下，个人笔记列表足够大
+        corpus.generate(
+            notes=options["notes"], tags=200, users=5, words=20, seed=options["seed"]
+        )
+        target = User.objects.order_by("pk").first()
+        followers = User.objects.bulk_create(
+            [
+                User(
+                    username=f"bench_follower_{i}",
+                    email=f"bench_follower_{i}@example.com",
+                )
+                for i in range(options["users"])
+            ]
+        )
+        if followers and followers[0].pk is None:
+            followers = list(
+                User.objects.filter(username__startswith="bench_follower_")
+            )
+        # 一半用户有头像，一半使用默认头像
+        User.objects.filter(pk__in=[u.pk for u in followers[::2]]).update(
+            avator="user/avators/bench.png"
+        )
+        UserRelations.objects.bulk_create(
+            [UserRelations(following=target, follower=u) for u in followers]
+        )
+        return target
+
+    def timed(self, func, repeat):
+        func()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            res = func()
+        return (time.perf_counter() - start) / repeat, res
+
+    def compare(self, rows, slow, fast, repeat):
+        slow_seconds, slow_data = self.timed(slow, repeat)
+        fast_seconds, fast_data = self.timed(fast, repeat)
+        return {
+            "rows": rows,
+            "serializer_us_per_row": slow_seconds * 1e6 / rows,
+            "values_us_per_row": fast_seconds * 1e6 / rows,
+            "speedup": slow_seconds / fast_seconds,
+            "same_output": render(slow_data) == render(fast_data),
+        }
+
+    def handle(self, *args, **options):
+        if not getattr(settings, "BENCHMARK", False):
+            raise CommandError(
+                "基准测试会清空数据库，请使用基准测试配置运行：--settings=yus_note.settings_bench"
+            )
+        target = self.prepare_data(options)
+        repeat = options["repeat"]
+        request = APIRequestFactory().get("/")
+        context = {"request": request}
+
+        notes = Note.objects.filter(is_private=False, is_delete=False).order_by(
+            "-views"
+        )
+        author = Note.objects.values_list("author", flat=True).first()
+        user_notes = Note.objects.filter(author=author, is_delete=False).order_by(
+            "-create_time"
+        )
+        followers = UserRelations.objects.filter(following=target)
+
+        results = {
+            "note_list": self.compare(
+                notes.count(),
+                lambda: NoteListSerializer(notes.all(), many=True).data,
+                lambda: NoteListValuesSerializer(context).serialize(notes.all()),
+                repeat,
+            ),
+            "user_note_list": self.compare(
+                user_notes.count(),
+                lambda: UserNoteListSerializer(
+                    user_notes.prefetch_related("tags"), many=True
+                ).data,
+                lambda: UserNoteListValuesSerializer(context).serialize(
+                    user_notes.all()
+                ),
+                repeat,
+            ),
+            "follower_list": self.compare(
+                followers.count(),
+                lambda: UserFollowersListSerializer(
+                    followers.select_related("follower"), many=True, context=context
+                ).data,
+                lambda: UserFollowersListValuesSerializer(context).serialize(
+                    followers.all()
+                ),
+                repeat,
+            ),
+        }
+
+        if options["as_json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        self.stdout.write(
+            "{:<16}{:>8}{:>16}{:>14}{:>9}{:>6}".format(
+                "list", "rows", "serializer(us)", "values(us)", "speedup", "same"
+            )
+        )
+        for name, res in results.items():
+            self.stdout.write(
+                "{:<16}{rows:>8}{serializer_us_per_row:>16.2f}"
+                "{values_us_per_row:>14.2f}{speedup:>9.1f}{same_output!s:>6}".format(
+                    name, **res
+                )
+            )
+        self.stdout.write("耗时为包含查询在内的每行平均微秒数")
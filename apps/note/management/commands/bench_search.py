@@ -0,0 +1,170 @@
+import json
+import random
+import resource
+import time
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from haystack import connections
+from haystack.query import SearchQuerySet
+from rest_framework.test import APIRequestFactory
+
+from note.management import corpus
+from note.management.commands.bench_index_storage import percentile
+from note.models import Note, Tag
+from note.views import NoteSearchViewSet, NoteTagSearchViewSet
+
+
+def max_rss_mb():
+    """进程最大常驻内存，linux上ru_maxrss单位为KB"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Command(BaseCommand):
+    help = (
+        "搜索基准测试：生成中文合成语料，测量建索引吞吐量、查询p50/p99延迟、高亮与分面耗时及内存。"
+        "需要使用基准测试配置运行：--settings=yus_note.settings_bench"
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument("--notes", type=int, default=2000, help="笔记数量（默认2000）")
+        parser.add_argument("--tags", type=int, default=200, help="标签数量（默认200）")
+        parser.add_argument("--users", type=int, default=20, help="用户数量（默认20）")
+        parser.add_argument(
+            "--words", type=int, default=300, help="每篇笔记内容的词数（默认300）"
+        )
+        parser.add_argument(
+            "--queries", type=int, default=200, help="每项测试的查询次数（默认200）"
+        )
+        parser.add_argument("--seed", type=int, default=0, help="随机种子（默认0）")
+        parser.add_argument(
+            "--using", default="default", help="使用的haystack连接（默认default）"
+        )
+        parser.add_argument(
+            "--json", action="store_true", dest="as_json", help="以json格式输出结果"
+        )
+
+    def timed(self, func, queries):
+        """对每个查询执行func，返回毫秒延迟的统计"""
+        latencies = []
+        for q in queries:
+            start = time.perf_counter()
+            func(q)
+            latencies.append((time.perf_counter() - start) * 1000)
+        return {
+            "p50_ms": percentile(latencies, 50),
+            "p99_ms": percentile(latencies, 99),
+            "mean_ms": sum(latencies) / len(latencies),
+        }
+
+    def prepare_data(self, options):
+        call_command("migrate", verbosity=0)
+        call_command("flush", interactive=False, verbosity=0)
+        start = time.perf_counter()
+        corpus.generate(
+            notes=options["notes"],
+            tags=options["tags"],
+            users=options["users"],
+            words=options["words"],
+            seed=options["seed"],
+        )
+        return time.perf_counter() - start
+
+    def build_index(self, using):
+        backend = connections[using].get_backend()
+        backend.clear()
+        unified_index = connections[using].get_unified_index()
+        docs = 0
+        start = time.perf_counter()
+        for model in unified_index.get_indexed_models():
+            search_index = unified_index.get_index(model)
+            qs = search_index.index_queryset(using=using).order_by("pk")
+            for offset in range(0, qs.count(), 1000):
+                objs = list(qs[offset : offset + 1000])
+                backend.update(search_index, objs)
+                docs += len(objs)
+        seconds = time.perf_counter() - start
+        return {
+            "docs": docs,
+            "seconds": seconds,
+            "docs_per_second": docs / seconds if seconds else 0,
+            "max_rss_mb": max_rss_mb(),
+        }
+
+    def handle(self, *args, **options):
+        if not getattr(settings, "BENCHMARK", False):
+            raise CommandError(
+                "基准测试会清空数据库，请使用基准测试配置运行：--settings=yus_note.settings_bench"
+            )
+        using = options["using"]
+        rnd = random.Random(options["seed"])
+        queries = corpus.queries(rnd, options["queries"])
+        results = {"corpus_seconds": self.prepare_data(options)}
+        results["index"] = self.build_index(using)
+
+        def search(q):
+            list(SearchQuerySet(using=using).models(Note).auto_query(q)[:20])
+
+        def search_highlight(q):
+            list(SearchQuerySet(using=using).models(Note).auto_query(q).highlight()[:20])
+
+        def search_facet(q):
+            SearchQuerySet(using=using).models(Note).auto_query(q).facet(
+                "django_ct"
+            ).facet_counts()
+
+        factory = APIRequestFactory()
+        note_view = NoteSearchViewSet.as_view({"get": "list"})
+        tag_view = NoteTagSearchViewSet.as_view({"get": "list"})
+
+        def note_viewset(q):
+            note_view(factory.get("/search/notes/", {"text": q})).render()
+
+        def tag_viewset(q):
+            tag_view(factory.get("/search/notetags/", {"text": q})).render()
+
+        # 先执行一次，排除jieba词典加载等一次性开销
+        search(queries[0])
+        for name, func in (
+            ("query", search),
+            ("highlight", search_highlight),
+            ("facet", search_facet),
+            ("note_viewset", note_viewset),
+            ("tag_viewset", tag_viewset),
+        ):
+            results[name] = self.timed(func, queries)
+        results["max_rss_mb"] = max_rss_mb()
+        results["notes"] = Note.objects.count()
+        results["tags"] = Tag.objects.count()
+
+        if options["as_json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        index = results["index"]
+        self.stdout.write(
+            "语料: {notes}篇笔记, {tags}个标签, 生成耗时{corpus_seconds:.2f}s".format(
+                **results
+            )
+        )
+        self.stdout.write(
+            "建索引: {docs}个文档, {seconds:.2f}s, {docs_per_second:.1f}文档/s, 建索引后最大常驻内存{max_rss_mb:.1f}MB".format(
+                **index
+            )
+        )
+        self.stdout.write(
+            "{:<14}{:>12}{:>12}{:>12}".format("item", "p50(ms)", "p99(ms)", "mean(ms)")
+        )
+        for name in ("query", "highlight", "facet", "note_viewset", "tag_viewset"):
+            self.stdout.write(
+                "{:<14}{p50_ms:>12.3f}{p99_ms:>12.3f}{mean_ms:>12.3f}".format(
+                    name, **results[name]
+                )
+            )
+        self.stdout.write(
+            "查询后最大常驻内存{max_rss_mb:.1f}MB".format(
+                **results
+            )
+        )
@@ -0,0 +1,104 @@
+"""基准测试用的中文合成语料"""
+
+import random
+from typing import List
+
+from django.db import transaction
+
+from note.models import Category, Note, NoteTags, Tag
+from user.models import User
+
+WORDS = (
+    "数据 结构 算法 链表 数组 队列 栈 哈希 二叉树 红黑树 平衡 排序 查找 递归 动态规划 "
+    "贪心 回溯 图论 最短路径 生成树 拓扑 网络 协议 操作系统 进程 线程 内存 调度 文件 "
+    "数据库 索引 事务 隔离 锁 缓存 分布式 一致性 复制 分片 消息 队列 异步 并发 性能 "
+    "优化 编译 语法 语义 类型 函数 闭包 对象 继承 接口 设计 模式 架构 服务 部署 容器 "
+    "测试 调试 日志 监控 安全 加密 认证 授权 前端 后端 框架 组件 渲染 路由 状态 "
+    "高等数学 线性代数 概率 统计 微积分 矩阵 向量 方程 极限 导数 积分 级数 "
+    "英语 单词 语法 阅读 写作 听力 翻译 历史 地理 物理 化学 生物 哲学 经济 管理 "
+    "复习 笔记 总结 记忆 理解 练习 考试 知识点 重点 难点 例题 习题 方法 技巧 原理"
+).split()
+
+PUNCTUATIONS = "，。；：！？"
+
+
+def sentence(rnd: random.Random, length: int) -> str:
+    words = [rnd.choice(WORDS) for _ in range(length)]
+    return "".join(words) + rnd.choice(PUNCTUATIONS)
+
+
+def paragraph(rnd: random.Random, words: int) -> str:
+    sentences = []
+    while words > 0:
+        length = min(words, rnd.randint(4, 12))
+        sentences.append(sentence(rnd, length))
+        words -= length
+    return "<p>{}</p>".format("".join(sentences))
+
+
+def queries(rnd: random.Random, number: int) -> List[str]:
+    """随机生成查询词：单个词或两个词的组合"""
+    return [
+        rnd.choice(WORDS) if rnd.random() < 0.6 else rnd.choice(WORDS) + rnd.choice(WORDS)
+        for _ in range(number)
+    ]
+
+
+def generate(
+    notes: int = 1000,
+    tags: int = 100,
+    users: int = 20,
+    words: int = 300,
+    seed: int = 0,
+    batch_size: int = 500,
+) -> None:
+    """生成用户、标签与笔记，笔记内容约words个词，每篇笔记1~3个标签"""
+    rnd = random.Random(seed)
+    with transaction.atomic():
+        category = Category.objects.get_or_create(name="其他")[0]
+        authors = User.objects.bulk_create(
+            [
+                User(
+                    username=f"bench_{i}",
+                    email=f"bench_{i}@example.com",
+                    nickname=f"测试{i}",
+                )
+                for i in range(users)
+            ]
+        )
+        # MySQL的bulk_create不会回填主键
+        if authors and authors[0].pk is None:
+            authors = list(User.objects.filter(username__startswith="bench_"))
+        names = set()
+        while len(names) < tags:
+            names.add("".join(rnd.sample(WORDS, rnd.randint(1, 2)))[:32])
+        tag_objs = Tag.objects.bulk_create([Tag(name=n) for n in names])
+        if tag_objs and tag_objs[0].pk is None:
+            tag_objs = list(Tag.objects.filter(name__in=names))
+
+        for start in range(0, notes, batch_size):
+            note_objs = Note.objects.bulk_create(
+                [
+                    Note(
+                        author=rnd.choice(authors),
+                        category=category,
+                        title="".join(rnd.sample(WORDS, rnd.randint(2, 4)))[:32],
+                        is_private=rnd.random() < 0.1,
+                        content="".join(
+                            paragraph(rnd, words // 5) for _ in range(5)
+                        ),
+                        likes=rnd.randint(0, 100),
+                        views=int(rnd.paretovariate(1.2) * 10),
+                    )
+                    for _ in range(min(batch_size, notes - start))
+                ]
+            )
+            if note_objs and note_objs[0].pk is None:
+                note_objs = list(Note.objects.order_by("-pk")[: len(note_objs)])
+            NoteTags.objects.bulk_create(
+                [
+                    NoteTags(note=note, tag=tag, category=category)
+                    for note in note_objs
+                    for tag in rnd.sample(tag_objs, rnd.randint(1, 3))
+                ]
+            )
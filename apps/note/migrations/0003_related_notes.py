@@ -0,0 +1,27 @@
+# Generated by Django 4.2.1 on 2026-10-19 16:45
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('note', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedNotes',
+            fields=[
+                ('note', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='related_notes', serialize=False, to='note.note', verbose_name='笔记')),
+                ('related_ids', models.JSONField(blank=True, default=list, help_text='按相关度排序的笔记id列表。', verbose_name='相关笔记')),
+                ('update_time', models.DateTimeField(auto_now=True, verbose_name='最近更新时间')),
+            ],
+            options={
+                'verbose_name': '相关笔记',
+                'verbose_name_plural': '相关笔记',
+                'db_table': 'note_related_notes',
+            },
+        ),
+    ]
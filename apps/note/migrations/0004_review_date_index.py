@@ -0,0 +1,17 @@
+# Generated by Django 4.2.1 on 2026-10-19 16:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('note', '0003_related_notes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['author', 'review_date'], name='note_note_idx_author_review'),
+        ),
+    ]
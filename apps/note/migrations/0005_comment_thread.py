@@ -0,0 +1,48 @@
+# Generated by Django 4.2.1 on 2026-10-19 17:06
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_comment_roots(apps, schema_editor):
+    NoteComments = apps.get_model('note', 'NoteComments')
+    parents = dict(NoteComments.objects.values_list('pk', 'to_comment'))
+    roots = {}
+
+    def get_root(pk):
+        # 沿to_comment向上找到顶层评论（to_comment为空）或已确定root的回复
+        chain = []
+        while pk not in roots and parents.get(pk) is not None:
+            chain.append(pk)
+            pk = parents[pk]
+        root = roots.get(pk, pk)
+        for item in chain:
+            roots[item] = root
+        return root
+
+    comments = [
+        NoteComments(pk=pk, root_id=get_root(pk))
+        for pk, to_comment in parents.items()
+        if to_comment is not None
+    ]
+    NoteComments.objects.bulk_update(comments, ['root'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('note', '0004_review_date_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notecomments',
+            name='root',
+            field=models.ForeignKey(blank=True, help_text='回复所在楼层的顶层评论，顶层评论为空。', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='thread_comments', to='note.notecomments', verbose_name='所属的顶层评论'),
+        ),
+        migrations.AddIndex(
+            model_name='notecomments',
+            index=models.Index(fields=['note', 'create_time'], name='note_comments_idx_note_time'),
+        ),
+        migrations.RunPython(fill_comment_roots, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.1 on 2026-10-19 17:07
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_comments(apps, schema_editor):
+    Note = apps.get_model('note', 'Note')
+    NoteComments = apps.get_model('note', 'NoteComments')
+
+    count = Coalesce(Subquery(
+        NoteComments.objects.filter(note=OuterRef('pk')).order_by()
+        .values('note').annotate(number=Count('pk')).values('number')
+    ), 0)
+
+    Note.objects.update(comment_count=count)
+    # MySQL不支持在UPDATE中引用被更新表的子查询，回复数在Python中写回
+    replies = (
+        NoteComments.objects.filter(to_comment__isnull=False).order_by()
+        .values('to_comment').annotate(number=Count('pk'))
+    )
+    NoteComments.objects.bulk_update(
+        [NoteComments(pk=r['to_comment'], reply_count=r['number']) for r in replies],
+        ['reply_count'],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('note', '0005_comment_thread'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='note',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, help_text='在发表/删除评论时同步更新，并定时校正。', verbose_name='评论数'),
+        ),
+        migrations.AddField(
+            model_name='notecomments',
+            name='reply_count',
+            field=models.PositiveIntegerField(default=0, help_text='直接回复该评论的数量，在发表/删除评论时同步更新，并定时校正。', verbose_name='回复数'),
+        ),
+        migrations.RunPython(count_comments, migrations.RunPython.noop),
+    ]
@@ -133,6 +133,9 @@ class Note(ReviewMixinModel, models.Model):
     content = HTMLField("内容")
     likes = models.PositiveIntegerField("点赞数", default=0)
     views = models.PositiveIntegerField("浏览量", default=0)
+    comment_count = models.PositiveIntegerField(
+        "评论数", default=0, help_text="在发表/删除评论时同步更新，并定时校正。"
+    )
     create_time = models.DateTimeField("创建时间", auto_now_add=True)
     update_time = models.DateTimeField("最近更新时间", auto_now=True)
     is_delete = models.BooleanField("是否已删除", default=False)
@@ -146,8 +149,24 @@ class Note(ReviewMixinModel, models.Model):
                 fields=["-create_time"], name="note_note_idx_create_time_desc"
             ),
             models.Index(fields=["-views"], name="note_note_idx_views_desc"),
+            models.Index(
+                fields=["author", "review_date"], name="note_note_idx_author_review"
+            ),
         ]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # 记录读出时是否公开，保存后据此判断笔记是否刚变为公开
+        if not {"is_private", "is_delete"} & instance.get_deferred_fields():
+            instance._was_public = instance.is_public
+        return instance
+
+    @property
+    def is_public(self) -> bool:
+        """公开且未删除"""
+        return not self.is_private and not self.is_delete
+
     @cached_model_property(cache="model_fields", expires={"days": 1}, at="03:00:00")
     def cached_views(self):
         return self.views
@@ -156,6 +175,32 @@ class Note(ReviewMixinModel, models.Model):
         return "{}".format(self.title)
 
 
+class RelatedNotes(models.Model):
+    """
+    相关笔记：离线计算的每篇笔记的相关笔记列表
+    """
+
+    note = models.OneToOneField(
+        verbose_name="笔记",
+        to=Note,
+        related_name="related_notes",
+        on_delete=models.CASCADE,
+        primary_key=True,
+    )
+    related_ids = models.JSONField(
+        "相关笔记", default=list, blank=True, help_text="按相关度排序的笔记id列表。"
+    )
+    update_time = models.DateTimeField("最近更新时间", auto_now=True)
+
+    class Meta:
+        verbose_name = "相关笔记"
+        verbose_name_plural = verbose_name
+        db_table = "note_related_notes"
+
+    def __str__(self) -> str:
+        return "{}".format(self.note_id)  # type: ignore
+
+
 class NoteComments(models.Model):
     content = models.CharField("内容", max_length=120)
     note = models.ForeignKey(
@@ -181,14 +226,32 @@ class NoteComments(models.Model):
         null=True,
         blank=True,
     )
+    root = models.ForeignKey(
+        "self",
+        verbose_name="所属的顶层评论",
+        related_name="thread_comments",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        help_text="回复所在楼层的顶层评论，顶层评论为空。",
+    )
+    reply_count = models.PositiveIntegerField(
+        "回复数",
+        default=0,
+        help_text="直接回复该评论的数量，在发表/删除评论时同步更新，并定时校正。",
+    )
     create_time = models.DateTimeField("创建时间", auto_now_add=True)
 
     class Meta:
         verbose_name = verbose_name_plural = "笔记评论"
         db_table = "note_comments"
         indexes = [
-            models.Index(fields=["create_time"], name="note_comments_idx_create_time")
+            models.Index(fields=["create_time"], name="note_comments_idx_create_time"),
+            models.Index(
+                fields=["note", "create_time"], name="note_comments_idx_note_time"
+            ),
         ]
 
     def __str__(self) -> str:
-        return f'{self.note.title}/{self.author.username}{"回复:"+self.to_comment.content if self.to_comment else ""}:{self.content}'  # type: ignore
+        # 不访问关联对象，避免列表中每条评论产生额外查询
+        return f"{self.note_id}/{self.author_id}:{self.content}"  # type: ignore
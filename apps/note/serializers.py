@@ -1,10 +1,13 @@
-from django.db import transaction
+from collections import defaultdict
+
+from django.db import models, transaction
 from rest_framework import serializers
 from drf_haystack import serializers as haystack_serializers
 
-from note.models import Note, Tag, NoteComments
+from note.models import Note, Tag, NoteComments, NoteTags
 from user.models import User, UserFolders
 from note.search_indexes import NoteTagIndex, NoteIndex
+from yus_note.drf.serializers import ValuesSerializer
 
 
 class AuthorSerializer(serializers.ModelSerializer):
@@ -21,10 +24,21 @@ class NoteFolderSerializer(serializers.ModelSerializer):
         fields = ["id", "name"]
 
 
+class NoteTagListSerializer(serializers.ListSerializer):
+    """标签按id排序：多对多关系的顺序不确定，与UserNoteListValuesSerializer保持一致
+    在内存中排序，以便使用prefetch_related的结果
+    """
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.manager.BaseManager) else data
+        return super().to_representation(sorted(iterable, key=lambda tag: tag.pk))
+
+
 class NoteTagSerializer(serializers.ModelSerializer):
     class Meta:
         model = Tag
         fields = "__all__"
+        list_serializer_class = NoteTagListSerializer
 
 
 class UserNoteListSerializer(serializers.ModelSerializer):
@@ -42,7 +56,43 @@ class NoteListSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Note
-        fields = ("id", "title", "views", "likes")
+        fields = ("id", "title", "views", "likes", "comment_count")
+
+
+class NoteListValuesSerializer(ValuesSerializer):
+    """笔记：列表（大厅），NoteListSerializer的快速版本"""
+
+    values_fields = NoteListSerializer.Meta.fields
+
+
+class UserNoteListValuesSerializer(ValuesSerializer):
+    """用户笔记：列表，UserNoteListSerializer的快速版本，所有笔记的标签一次查询取出"""
+
+    values_fields = ("id", "title", "views", "likes", "is_private")
+
+    def get_rows(self, queryset) -> list:
+        rows = super().get_rows(queryset)
+        tags = defaultdict(list)
+        note_tags = (
+            NoteTags.objects.filter(note__in=[row["id"] for row in rows])
+            .order_by("tag")
+            .values_list("note", "tag", "tag__name")
+        )
+        for note_id, tag_id, name in note_tags:
+            tags[note_id].append({"id": tag_id, "name": name})
+        for row in rows:
+            row["tags"] = tags[row["id"]]
+        return rows
+
+    def to_representation(self, row: dict) -> dict:
+        return {
+            "id": row["id"],
+            "tags": row["tags"],
+            "title": row["title"],
+            "views": row["views"],
+            "likes": row["likes"],
+            "is_private": row["is_private"],
+        }
 
 
 class UserNoteSerializer(serializers.ModelSerializer):
@@ -123,7 +173,7 @@ class NoteDetailSerializer(serializers.ModelSerializer):
 
     author = AuthorSerializer()
     folder = NoteFolderSerializer()
-    tags = NoteTagSerializer()
+    tags = NoteTagSerializer(many=True)
 
     class Meta:
         model = Note
@@ -136,6 +186,7 @@ class NoteDetailSerializer(serializers.ModelSerializer):
             "content",
             "likes",
             "views",
+            "comment_count",
             "create_time",
             "update_time",
         )
@@ -146,7 +197,7 @@ class UserNoteDetailSerializer(serializers.ModelSerializer):
 
     author = AuthorSerializer()
     folder = NoteFolderSerializer()
-    tag = NoteTagSerializer()
+    tags = NoteTagSerializer(many=True)
 
     class Meta:
         model = Note
@@ -155,7 +206,7 @@ class UserNoteDetailSerializer(serializers.ModelSerializer):
             "author",
             "folder",
             "is_private",
-            "tag",
+            "tags",
             "title",
             "content",
             "likes",
@@ -172,7 +223,26 @@ class NoteCommentsListSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = NoteComments
-        fields = "__all__"
+        fields = [
+            "id",
+            "content",
+            "note",
+            "author",
+            "to_comment",
+            "root",
+            "reply_count",
+            "create_time",
+        ]
+
+
+class NoteCommentsThreadSerializer(NoteCommentsListSerializer):
+    """评论：楼层列表，顶层评论附带其下最早的若干条回复及获取其余回复的地址"""
+
+    replies = NoteCommentsListSerializer(many=True, read_only=True)
+    replies_next = serializers.CharField(read_only=True)
+
+    class Meta(NoteCommentsListSerializer.Meta):
+        fields = NoteCommentsListSerializer.Meta.fields + ["replies", "replies_next"]
 
 
 class UserNoteCommentsSerializer(serializers.ModelSerializer):
@@ -182,6 +252,14 @@ class UserNoteCommentsSerializer(serializers.ModelSerializer):
         model = NoteComments
         fields = ["id", "content", "note", "to_comment"]
 
+    def validate(self, data):
+        to_comment = data.get("to_comment")
+        if to_comment and to_comment.note_id != data["note"].pk:
+            raise serializers.ValidationError(
+                {"to_comment": ["所回复的评论不属于该笔记！"]}
+            )
+        return data
+
 
 class NoteTagHaystackSerializer(haystack_serializers.HaystackSerializer):
     """笔记标签搜索：列表"""
@@ -0,0 +1,44 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from note.models import Note, Tag
+from note.suggest import suggest_index
+from user import folders
+from user.tasks import fanout_note
+
+
+def invalidate_folder_stats(user_id):
+    # 提交后再删除缓存，避免其他请求在提交前读到旧数据并重新写入缓存
+    transaction.on_commit(lambda: folders.invalidate_note_stats(user_id))
+
+
+@receiver(post_save, sender=Note)
+def note_post_save_handler(sender, instance, created, update_fields=None, **kwargs):
+    """保存笔记之后，更新联想索引和文件夹笔记统计，新公开的笔记推送给粉丝"""
+    suggest_index.update_note(instance)
+    if update_fields is None or folders.STATS_FIELDS.intersection(update_fields):
+        invalidate_folder_stats(instance.author_id)
+    # 新发布，或者由私有/已删除改为公开
+    if instance.is_public and (created or not getattr(instance, "_was_public", True)):
+        transaction.on_commit(lambda: fanout_note.delay(instance.pk))
+    instance._was_public = instance.is_public
+
+
+@receiver(post_delete, sender=Note)
+def note_post_delete_handler(sender, instance, **kwargs):
+    """删除笔记之后，更新联想索引和文件夹笔记统计"""
+    suggest_index.remove_note(instance.pk)
+    invalidate_folder_stats(instance.author_id)
+
+
+@receiver(post_save, sender=Tag)
+def tag_post_save_handler(sender, instance, **kwargs):
+    """保存标签之后，更新联想索引"""
+    suggest_index.update_tag(instance)
+
+
+@receiver(post_delete, sender=Tag)
+def tag_post_delete_handler(sender, instance, **kwargs):
+    """删除标签之后，更新联想索引"""
+    suggest_index.remove_tag(instance.pk)
@@ -0,0 +1,274 @@
+"""搜索联想（输入即搜索）
+
+在内存中维护一棵前缀树，收录标签名与公开笔记的标题，
+每个节点缓存该前缀下权重最高的若干条目，查询只需沿前缀走一遍即可返回。
+权重：笔记为浏览量，标签为其所属笔记的浏览量之和。
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Q, Sum
+from django.db.models.functions import Coalesce
+
+from note.models import Note, Tag
+
+NOTE = "note"
+TAG = "tag"
+
+logger = logging.getLogger("django")
+
+# (种类, 主键)
+ItemKey = Tuple[str, int]
+# (权重, 种类, 主键)，按权重倒序排列
+TopEntry = Tuple[int, str, int]
+
+
+def normalize(text: str) -> str:
+    return text.strip().lower()
+
+
+class _TrieNode:
+    __slots__ = ("children", "items", "size", "top")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.items: Dict[ItemKey, int] = {}  # 恰好结束于该节点的条目及其权重
+        self.size = 0  # 子树中的条目数
+        self.top: List[TopEntry] = []
+
+
+class SuggestTrie:
+    """带每节点top-k缓存的前缀树
+    写操作加锁；读操作不加锁，节点的top列表总是整体替换，读到的总是一致的快照。
+    """
+
+    def __init__(self, top_k: int = 10) -> None:
+        self.top_k = top_k
+        self.root = _TrieNode()
+        self._entries: Dict[ItemKey, Tuple[str, str, int]] = {}  # 条目 -> (键, 原文, 权重)
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _sort_key(self, entry: TopEntry):
+        return (-entry[0], entry[1], entry[2])
+
+    def _path(self, key: str, create: bool = False) -> List[_TrieNode]:
+        nodes = [self.root]
+        node = self.root
+        for char in key:
+            child = node.children.get(char)
+            if child is None:
+                if not create:
+                    return []
+                child = node.children[char] = _TrieNode()
+            node = child
+            nodes.append(node)
+        return nodes
+
+    def _collect(self, node: _TrieNode) -> List[TopEntry]:
+        entries = []
+        stack = [node]
+        while stack:
+            cur = stack.pop()
+            entries.extend((w, k[0], k[1]) for k, w in cur.items.items())
+            stack.extend(cur.children.values())
+        return entries
+
+    def _refill(self, node: _TrieNode) -> None:
+        node.top = sorted(self._collect(node), key=self._sort_key)[: self.top_k]
+
+    def _push(self, node: _TrieNode, item: ItemKey, weight: int) -> None:
+        top = [e for e in node.top if (e[1], e[2]) != item]
+        top.append((weight, item[0], item[1]))
+        top.sort(key=self._sort_key)
+        node.top = top[: self.top_k]
+
+    def _drop(self, node: _TrieNode, item: ItemKey) -> None:
+        if any((e[1], e[2]) == item for e in node.top):
+            # size已减去被删除的条目，不小于top的长度说明子树中还有未进入top的条目，需要重新挑选
+            if node.size >= len(node.top):
+                self._refill(node)
+            else:
+                node.top = [e for e in node.top if (e[1], e[2]) != item]
+
+    def add(self, kind: str, pk: int, text: str, weight: int = 0) -> None:
+        """新增或更新条目"""
+        key = normalize(text)
+        item = (kind, pk)
+        with self._lock:
+            old = self._entries.get(item)
+            if old is not None and old[0] != key:
+                self.remove(kind, pk)
+                old = None
+            if not key:
+                return
+            nodes = self._path(key, create=True)
+            self._entries[item] = (key, text, weight)
+            nodes[-1].items[item] = weight
+            for node in nodes[1:]:
+                if old is None:
+                    node.size += 1
+                if old is not None and weight < old[2] and node.size > self.top_k:
+                    # 权重下降，原来排不进top的条目可能反超
+                    self._refill(node)
+                else:
+                    self._push(node, item, weight)
+
+    def remove(self, kind: str, pk: int) -> None:
+        item = (kind, pk)
+        with self._lock:
+            old = self._entries.pop(item, None)
+            if old is None:
+                return
+            nodes = self._path(old[0])
+            nodes[-1].items.pop(item, None)
+            for node in nodes[1:]:
+                node.size -= 1
+                self._drop(node, item)
+            # 清理空分支
+            for depth in range(len(nodes) - 1, 0, -1):
+                if nodes[depth].size:
+                    break
+                del nodes[depth - 1].children[old[0][depth - 1]]
+
+    def weight(self, kind: str, pk: int) -> int:
+        entry = self._entries.get((kind, pk))
+        return entry[2] if entry else 0
+
+    def lookup(self, prefix: str, limit: Optional[int] = None) -> List[dict]:
+        key = normalize(prefix)
+        if not key:
+            return []
+        nodes = self._path(key)
+        if not nodes:
+            return []
+        res = []
+        for weight, kind, pk in nodes[-1].top[: limit or self.top_k]:
+            entry = self._entries.get((kind, pk))
+            if entry is not None:
+                res.append({"type": kind, "id": pk, "text": entry[1], "weight": weight})
+        return res
+
+
+class SuggestIndex:
+    """进程内的联想索引
+    首次查询时全量构建，之后由模型的保存/删除信号增量维护；
+    多进程部署时其他进程的修改无法通过信号传递，
+    因此超过 SUGGEST_REBUILD_INTERVAL 秒后会在后台线程全量重建，查询继续使用旧树；
+    重建期间的增量修改会被记录，在新树上重放后再整体替换旧树。
+    """
+
+    def __init__(self) -> None:
+        self._trie: Optional[SuggestTrie] = None
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+        self._rebuilding = False
+        self._pending: List[Callable[[SuggestTrie], None]] = []
+
+    @property
+    def top_k(self) -> int:
+        return getattr(settings, "SUGGEST_TOP_K", None) or 10
+
+    @property
+    def rebuild_interval(self) -> int:
+        return getattr(settings, "SUGGEST_REBUILD_INTERVAL", None) or 600
+
+    def build(self) -> SuggestTrie:
+        trie = SuggestTrie(top_k=self.top_k)
+        notes = Note.objects.filter(is_private=False, is_delete=False).values_list(
+            "id", "title", "views"
+        )
+        for pk, title, views in notes.iterator():
+            trie.add(NOTE, pk, title, views)
+        # 只统计公开且未删除的笔记
+        visible = Q(notes__is_private=False, notes__is_delete=False)
+        tags = Tag.objects.annotate(
+            weight=Coalesce(Sum("notes__views", filter=visible), 0)
+        ).values_list("id", "name", "weight")
+        for pk, name, weight in tags.iterator():
+            trie.add(TAG, pk, name, weight)
+        return trie
+
+    def rebuild(self) -> None:
+        """全量重建并替换当前的树"""
+        trie = self.build()
+        with self._lock:
+            for operation in self._pending:
+                operation(trie)
+            self._trie = trie
+            self._built_at = time.monotonic()
+            self._rebuilding = False
+            self._pending = []
+
+    def _rebuild_in_background(self) -> None:
+        try:
+            self.rebuild()
+        except Exception as e:
+            logger.warning("搜索联想索引重建失败：%s", e)
+            with self._lock:
+                # 推迟下一次重建，避免每个请求都重试
+                self._built_at = time.monotonic()
+                self._rebuilding = False
+                self._pending = []
+        finally:
+            # 后台线程的数据库连接不会被请求结束信号关闭
+            connections.close_all()
+
+    def _expired(self) -> bool:
+        return time.monotonic() - self._built_at > self.rebuild_interval
+
+    @property
+    def trie(self) -> SuggestTrie:
+        if self._trie is None:
+            with self._lock:
+                if self._trie is None:
+                    self._trie = self.build()
+                    self._built_at = time.monotonic()
+        elif self._expired() and not self._rebuilding:
+            with self._lock:
+                if not self._expired() or self._rebuilding:
+                    return self._trie
+                self._rebuilding = True
+            thread = threading.Thread(
+                target=self._rebuild_in_background, name="suggest-rebuild", daemon=True
+            )
+            thread.start()
+        return self._trie
+
+    def _apply(self, operation: Callable[[SuggestTrie], None]) -> None:
+        with self._lock:
+            if self._trie is None:
+                return
+            operation(self._trie)
+            if self._rebuilding:
+                self._pending.append(operation)
+
+    def lookup(self, prefix: str, limit: Optional[int] = None) -> List[dict]:
+        return self.trie.lookup(prefix, limit)
+
+    def update_note(self, note: Note) -> None:
+        if note.is_private or note.is_delete:
+            self._apply(lambda trie: trie.remove(NOTE, note.pk))
+        else:
+            self._apply(lambda trie: trie.add(NOTE, note.pk, note.title, note.views))
+
+    def remove_note(self, pk: int) -> None:
+        self._apply(lambda trie: trie.remove(NOTE, pk))
+
+    def update_tag(self, tag: Tag) -> None:
+        self._apply(
+            lambda trie: trie.add(TAG, tag.pk, tag.name, trie.weight(TAG, tag.pk))
+        )
+
+    def remove_tag(self, pk: int) -> None:
+        self._apply(lambda trie: trie.remove(TAG, pk))
+
+
+suggest_index = SuggestIndex()
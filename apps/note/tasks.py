@@ -1,26 +1,122 @@
 from celery import shared_task
-from redis import Redis, ConnectionPool
 from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.utils.log import DEFAULT_LOGGING
-from note.models import Note
+from haystack import connections
+from note.models import Note, NoteComments, RelatedNotes
 
 @shared_task
-def synchronize_note_views():
-    pool = ConnectionPool.from_url(settings['CACHES']['model_fields']['LOCATION'])
-    redis = Redis(connection_pool=ConnectionPool)
-    keys = redis.keys('note:cached_views:*')
-    keys = [k.decode() for k in keys] # type: ignore
-    views_list = redis.mget(keys) # type: ignore
-    id_list = [int(k.split(':')[-1]) for k in keys]
-    views_list = [int(k.decode()) for k in views_list] # type: ignore
-    for k,v in zip(id_list,views_list): # type: ignore
-        try:
-            note = Note.objects.get(pk=k)
-        except Note.DoesNotExist:
-            continue
-        else:
-            note.views = v
-            note.save()
-
-
-    
+def synchronize_note_views(batch_size=500):
+    """把缓存中的浏览量（Note.cached_views）写回数据库"""
+    cache = caches["model_fields"]
+    if not hasattr(cache, "iter_keys"):
+        # 非Redis缓存无法遍历键
+        return 0
+    keys = list(cache.iter_keys("note:*:cached_views"))
+    # 读Redis中的计数，而不是可能滞后的进程内L1
+    notes = [
+        Note(pk=int(key.split(":")[1]), views=views)
+        for key, views in cache.get_many_from_redis(keys).items()
+    ]
+    # bulk_update不会更新update_time，不存在的笔记会被忽略
+    Note.objects.bulk_update(notes, ["views"], batch_size=batch_size)
+    return len(notes)
+
+
+def compute_related_note_ids(note: Note) -> list:
+    """使用搜索引擎的more_like_this（关键词提取）计算相关笔记，只保留公开的笔记"""
+    number = getattr(settings, "RELATED_NOTES_NUMBER", None) or 10
+    backend = connections["default"].get_backend()
+    # 多取一些候选，过滤掉私有和已删除的笔记后仍能凑够数量
+    res = backend.more_like_this(note, models=[Note], end_offset=number * 2)
+    candidates = [int(r.pk) for r in res["results"]]
+    public_ids = set(
+        Note.objects.filter(
+            pk__in=candidates, is_private=False, is_delete=False
+        ).values_list("pk", flat=True)
+    )
+    return [pk for pk in candidates if pk in public_ids and pk != note.pk][:number]
+
+
+@shared_task
+def refresh_related_notes(note_id: int):
+    """笔记创建或修改后，重新计算该笔记的相关笔记"""
+    try:
+        note = Note.objects.get(pk=note_id, is_delete=False)
+    except Note.DoesNotExist:
+        return
+    RelatedNotes.objects.update_or_create(
+        note=note, defaults={"related_ids": compute_related_note_ids(note)}
+    )
+
+
+def save_related_notes(batch: list):
+    """批量写入相关笔记，已存在的更新
+    MySQL不支持指定冲突字段（unique_fields），ON DUPLICATE KEY UPDATE按主键note判断冲突
+    """
+    unique_fields = None
+    if connection.features.supports_update_conflicts_with_target:
+        unique_fields = ["note"]
+    RelatedNotes.objects.bulk_create(
+        batch,
+        update_conflicts=True,
+        unique_fields=unique_fields,
+        update_fields=["related_ids", "update_time"],
+    )
+
+
+@shared_task
+def rebuild_related_notes(batch_size: int = 500):
+    """定时全量重新计算所有笔记的相关笔记"""
+    batch = []
+    for note in Note.objects.filter(is_delete=False).only("pk").iterator():
+        batch.append(
+            RelatedNotes(note=note, related_ids=compute_related_note_ids(note))
+        )
+        if len(batch) >= batch_size:
+            save_related_notes(batch)
+            batch = []
+    if batch:
+        save_related_notes(batch)
+
+
+def comment_count(field: str):
+    """NoteComments中field为当前对象的数量（子查询）"""
+    return Coalesce(
+        Subquery(
+            NoteComments.objects.filter(**{field: OuterRef("pk")})
+            .order_by()
+            .values(field)
+            .annotate(number=Count("pk"))
+            .values("number")
+        ),
+        0,
+    )
+
+
+@shared_task
+def reconcile_comment_counts(batch_size=1000):
+    """校正笔记评论数和评论回复数
+    笔记评论数用子查询直接在UPDATE中重新计数；
+    MySQL不支持在UPDATE中引用被更新表的子查询，回复数只能读出实际数量后写回。
+    """
+    note_ids = list(
+        Note.objects.annotate(real=comment_count("note"))
+        .exclude(comment_count=F("real"))
+        .values_list("pk", flat=True)
+    )
+    for i in range(0, len(note_ids), batch_size):
+        Note.objects.filter(pk__in=note_ids[i : i + batch_size]).update(
+            comment_count=comment_count("note")
+        )
+    comments = [
+        NoteComments(pk=pk, reply_count=real)
+        for pk, real in NoteComments.objects.annotate(real=comment_count("to_comment"))
+        .exclude(reply_count=F("real"))
+        .values_list("pk", "real")
+    ]
+    NoteComments.objects.bulk_update(comments, ["reply_count"], batch_size=batch_size)
+    return {"notes": len(note_ids), "comments": len(comments)}
@@ -1,3 +1,368 @@
-from django.test import TestCase
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import caches
+from django.db import connection
+from django.db.models import F
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from note.models import Category, Note, NoteTags, RelatedNotes, Tag
+from note.suggest import NOTE, TAG, SuggestIndex, SuggestTrie
+from note.tasks import rebuild_related_notes
+from user.models import User
+from yus_note.haystack.backends.whoosh_cn_backend import WhooshSearchBackend
+
+# 测试不依赖Redis
+LOCMEM_CACHES = {
+    alias: {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": alias,
+    }
+    for alias in ("default", "authcode", "model_fields")
+}
+
+
+def create_notes(author, number, **kwargs):
+    """bulk_create不触发信号，不会写入搜索索引"""
+    category = Category.objects.get_or_create(name="其他")[0]
+    return Note.objects.bulk_create(
+        [
+            Note(
+                author=author,
+                category=category,
+                title=f"note{i}",
+                content=f"content{i}",
+                views=i,
+                **kwargs,
+            )
+            for i in range(number)
+        ]
+    )
+
+
+class SuggestTrieTests(SimpleTestCase):
+    def ids(self, trie, prefix, limit=None):
+        return [(r["type"], r["id"]) for r in trie.lookup(prefix, limit)]
+
+    def brute_force(self, trie, prefix):
+        """不经过top缓存，直接按权重排序所有以prefix开头的条目"""
+        entries = [
+            (weight, kind, pk)
+            for (kind, pk), (key, _, weight) in trie._entries.items()
+            if key.startswith(prefix)
+        ]
+        entries.sort(key=trie._sort_key)
+        return [(kind, pk) for _, kind, pk in entries[: trie.top_k]]
+
+    def test_insert(self):
+        trie = SuggestTrie(top_k=3)
+        trie.add(NOTE, 1, "Python入门", 10)
+        trie.add(NOTE, 2, "python进阶", 30)
+        trie.add(TAG, 1, "Pytorch", 20)
+        trie.add(NOTE, 3, "Java", 100)
+        self.assertEqual(len(trie), 4)
+        self.assertEqual(self.ids(trie, "py"), [(NOTE, 2), (TAG, 1), (NOTE, 1)])
+        self.assertEqual(self.ids(trie, " PYTHON "), [(NOTE, 2), (NOTE, 1)])
+        self.assertEqual(self.ids(trie, "py", limit=1), [(NOTE, 2)])
+        self.assertEqual(trie.lookup("python入")[0]["text"], "Python入门")
+        self.assertEqual(self.ids(trie, "c"), [])
+        self.assertEqual(self.ids(trie, ""), [])
+
+    def test_update_weight(self):
+        trie = SuggestTrie(top_k=2)
+        for pk, weight in enumerate([10, 20, 30], start=1):
+            trie.add(NOTE, pk, f"note{pk}", weight)
+        self.assertEqual(self.ids(trie, "note"), [(NOTE, 3), (NOTE, 2)])
+        # 权重上升进入top
+        trie.add(NOTE, 1, "note1", 40)
+        self.assertEqual(self.ids(trie, "note"), [(NOTE, 1), (NOTE, 3)])
+        # 权重下降后被原来排不进top的条目反超
+        trie.add(NOTE, 1, "note1", 0)
+        self.assertEqual(self.ids(trie, "note"), [(NOTE, 3), (NOTE, 2)])
+        self.assertEqual(trie.weight(NOTE, 1), 0)
+
+    def test_remove_refills_top(self):
+        trie = SuggestTrie(top_k=3)
+        for pk, weight in enumerate([10, 20, 30, 40], start=1):
+            trie.add(NOTE, pk, f"note{pk}", weight)
+        trie.remove(NOTE, 4)
+        self.assertEqual(self.ids(trie, "note"), [(NOTE, 3), (NOTE, 2), (NOTE, 1)])
+        trie.remove(NOTE, 3)
+        self.assertEqual(self.ids(trie, "note"), [(NOTE, 2), (NOTE, 1)])
+        self.assertEqual(self.ids(trie, "note3"), [])
+        # 删除不存在的条目不报错
+        trie.remove(NOTE, 3)
+        self.assertEqual(len(trie), 2)
+
+    def test_remove_prunes_empty_branches(self):
+        trie = SuggestTrie(top_k=3)
+        trie.add(TAG, 1, "abc", 1)
+        trie.add(TAG, 2, "abd", 2)
+        trie.remove(TAG, 1)
+        self.assertNotIn("c", trie.root.children["a"].children["b"].children)
+        trie.remove(TAG, 2)
+        self.assertEqual(trie.root.children, {})
+        self.assertEqual(self.ids(trie, "a"), [])
+
+    def test_rename(self):
+        trie = SuggestTrie(top_k=3)
+        for pk, weight in enumerate([10, 20, 30, 40], start=1):
+            trie.add(NOTE, pk, f"old{pk}", weight)
+        trie.add(NOTE, 4, "new4", 40)
+        self.assertEqual(self.ids(trie, "old"), [(NOTE, 3), (NOTE, 2), (NOTE, 1)])
+        self.assertEqual(self.ids(trie, "new"), [(NOTE, 4)])
+        # 改为空标题等同于删除
+        trie.add(NOTE, 3, "  ", 30)
+        self.assertEqual(self.ids(trie, "old"), [(NOTE, 2), (NOTE, 1)])
+        self.assertEqual(len(trie), 3)
+
+    def test_matches_brute_force(self):
+        trie = SuggestTrie(top_k=3)
+        titles = ["a", "ab", "abc", "abd", "b", "ba", "bab", "abcd"]
+        weights = [5, 3, 8, 8, 1, 9, 2, 7]
+        for pk, (title, weight) in enumerate(zip(titles, weights)):
+            trie.add(NOTE, pk, title, weight)
+        operations = [
+            lambda: trie.remove(NOTE, 2),
+            lambda: trie.add(NOTE, 0, "a", 0),
+            lambda: trie.add(NOTE, 3, "bd", 8),
+            lambda: trie.add(NOTE, 5, "ba", 1),
+            lambda: trie.remove(NOTE, 7),
+            lambda: trie.add(NOTE, 2, "abc", 4),
+        ]
+        for operation in operations:
+            operation()
+            for prefix in ["a", "ab", "abc", "b", "ba", "bd"]:
+                self.assertEqual(
+                    self.ids(trie, prefix), self.brute_force(trie, prefix), prefix
+                )
+
+
+class SuggestIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="user", email="user@test.com")
+        public, private, deleted = create_notes(cls.user, 3)
+        Note.objects.filter(pk=public.pk).update(views=5)
+        Note.objects.filter(pk=private.pk).update(is_private=True, views=100)
+        Note.objects.filter(pk=deleted.pk).update(is_delete=True, views=1000)
+        cls.tag = Tag.objects.create(name="tag")
+        NoteTags.objects.bulk_create(
+            [
+                NoteTags(note=note, tag=cls.tag, category=note.category)
+                for note in (public, private, deleted)
+            ]
+        )
+
+    def test_tag_weight_counts_visible_notes(self):
+        trie = SuggestIndex().build()
+        self.assertEqual(trie.weight(TAG, self.tag.pk), 5)
+
+    def test_rebuild_in_background(self):
+        index = SuggestIndex()
+        old = index.trie
+        index._built_at -= index.rebuild_interval + 1
+        with mock.patch("note.suggest.threading.Thread") as thread:
+            # 过期后仍返回旧树，只启动一次后台重建
+            self.assertIs(index.trie, old)
+            self.assertIs(index.trie, old)
+        thread.assert_called_once()
+        thread.return_value.start.assert_called_once()
+
+        # 重建期间的修改在新树上重放
+        snapshot = index.build()
+        note = create_notes(self.user, 1)[0]
+        index.update_note(note)
+        index.remove_tag(self.tag.pk)
+        with mock.patch.object(index, "build", return_value=snapshot):
+            index.rebuild()
+        self.assertIs(index.trie, snapshot)
+        self.assertIn((NOTE, note.pk), snapshot._entries)
+        self.assertNotIn((TAG, self.tag.pk), snapshot._entries)
+        self.assertFalse(index._rebuilding)
+        self.assertEqual(index._pending, [])
+
+    @override_settings(SUGGEST_TOP_K=3)
+    def test_view_limit(self):
+        create_notes(self.user, 2)
+        client = APIClient()
+        # 路由从apps.note.views导入视图
+        with mock.patch("apps.note.views.suggest_index", SuggestIndex()):
+            for limit, number in [("-1", 1), ("0", 1), ("2", 2), ("x", 3), ("99", 3)]:
+                res = client.get("/search/suggest/", {"q": "note", "limit": limit})
+                self.assertEqual(len(res.data), number, limit)
+
+
+class SpellingSuggestionTests(SimpleTestCase):
+    def setUp(self):
+        path = tempfile.TemporaryDirectory()
+        self.addCleanup(path.cleanup)
+        self.backend = WhooshSearchBackend("default", PATH=path.name)
+        self.backend.setup()
+
+    def add(self, text):
+        writer = self.backend.index.writer()
+        writer.add_document(**{self.backend.content_field_name: text})
+        writer.commit()
+
+    def test_suggest_word(self):
+        self.add("python")
+        self.assertEqual(self.backend.suggest_word("pythn"), "python")
+        self.assertEqual(self.backend.suggest_word("python"), "python")
+        # 索引变化后不使用缓存的旧建议
+        self.add("pythn")
+        self.assertEqual(self.backend.suggest_word("pythn"), "pythn")
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username="author", email="author@test.com")
+        cls.reader = User.objects.create(username="reader", email="reader@test.com")
+        create_notes(cls.author, 3)
+        cls.note = Note.objects.order_by("pk").first()
+
+    def setUp(self):
+        for alias in LOCMEM_CACHES:
+            caches[alias].clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+
+    def test_detail(self):
+        url = f"/notes/{self.note.pk}/"
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, 200)
+        self.assertNotIn("Last-Modified", res)
+        etag = res["ETag"]
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(res["ETag"], etag)
+
+        # 点赞数不更新最后修改时间，同样使ETag失效
+        Note.objects.filter(pk=self.note.pk).update(likes=F("likes") + 1)
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 200)
+        self.assertNotEqual(res["ETag"], etag)
+        self.assertEqual(res.data["likes"], 1)
+
+    def test_detail_ignores_if_modified_since(self):
+        url = f"/notes/{self.note.pk}/"
+        since = "Fri, 01 Jan 2100 00:00:00 GMT"
+        res = self.client.get(url, HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual(res.status_code, 200)
+
+    def test_detail_counts_views_on_304(self):
+        url = f"/notes/{self.note.pk}/"
+        etag = self.client.get(url)["ETag"]
+        for _ in range(3):
+            self.assertEqual(
+                self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304
+            )
+        self.assertEqual(Note(pk=self.note.pk).cached_views, self.note.views + 4)
+        # 作者本人浏览不计数
+        self.client.force_authenticate(self.author)
+        self.client.get(url)
+        self.assertEqual(Note(pk=self.note.pk).cached_views, self.note.views + 4)
+
+    def test_detail_not_found(self):
+        self.assertEqual(self.client.get("/notes/999999/").status_code, 404)
+
+    def test_list(self):
+        url = "/notes/?ordering=-likes"
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, 200)
+        etag = res["ETag"]
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 304)
+
+        # 合计不变（一条+1，另一条-1），但内容和顺序变化
+        first, second = Note.objects.order_by("pk")[:2]
+        Note.objects.filter(pk=first.pk).update(likes=F("likes") + 1)
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 200)
+        etag = res["ETag"]
+        Note.objects.filter(pk=first.pk).update(likes=F("likes") - 1)
+        Note.objects.filter(pk=second.pk).update(likes=F("likes") + 1)
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data[0]["id"], second.pk)
+
+    def test_list_single_query(self):
+        etag = self.client.get("/notes/")["ETag"]
+        # 304只执行一次聚合查询
+        with self.assertNumQueries(1):
+            res = self.client.get("/notes/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 304)
+        # 改为私有的笔记不再出现在列表中
+        Note.objects.filter(pk=self.note.pk).update(is_private=True)
+        res = self.client.get("/notes/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(res.data), 2)
+
+    def test_list_etag_depends_on_query(self):
+        etag = self.client.get("/notes/")["ETag"]
+        res = self.client.get("/notes/?ordering=views", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 200)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ValuesListSerializerTests(TestCase):
+    """快速序列化（ValuesSerializer）与常规序列化的响应必须完全一致"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="user", email="user@test.com")
+        create_notes(cls.user, 3)
+        create_notes(cls.user, 2, is_private=True)
+
+    def assertSameResponse(self, client, url):
+        with override_settings(VALUES_LIST_SERIALIZERS=True):
+            fast = client.get(url)
+        with override_settings(VALUES_LIST_SERIALIZERS=False):
+            slow = client.get(url)
+        self.assertEqual(fast.status_code, 200)
+        self.assertEqual(fast.content, slow.content)
+        return fast
+
+    def test_note_list(self):
+        client = APIClient()
+        res = self.assertSameResponse(client, "/notes/")
+        self.assertEqual(len(res.data), 3)
+        self.assertSameResponse(client, "/notes/?ordering=views")
+
+
+class RebuildRelatedNotesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="user", email="user@test.com")
+        cls.notes = create_notes(cls.user, 3)
+        create_notes(cls.user, 1, is_delete=True)
+
+    def rebuild(self, related, **kwargs):
+        with mock.patch(
+            "note.tasks.compute_related_note_ids", side_effect=lambda note: related
+        ):
+            rebuild_related_notes(**kwargs)
+
+    def test_rebuild(self):
+        # 分批写入，第二次运行更新已存在的记录
+        self.rebuild([1], batch_size=2)
+        self.rebuild([2, 3], batch_size=2)
+        self.assertEqual(
+            sorted(RelatedNotes.objects.values_list("note", "related_ids")),
+            [(note.pk, [2, 3]) for note in self.notes],
+        )
+
+    def test_rebuild_without_conflict_target(self):
+        # MySQL不支持指定冲突字段，不能传unique_fields
+        features = connection.features
+        with mock.patch.object(
+            features, "supports_update_conflicts_with_target", False
+        ), mock.patch.object(RelatedNotes.objects, "bulk_create") as bulk_create:
+            self.rebuild([1])
+        kwargs = bulk_create.call_args.kwargs
+        self.assertTrue(kwargs["update_conflicts"])
+        self.assertIsNone(kwargs["unique_fields"])
@@ -1,19 +1,34 @@
+import base64
+from collections import defaultdict
+from datetime import datetime
+
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+from django.http import Http404
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.viewsets import GenericViewSet
 from rest_framework.mixins import ListModelMixin, CreateModelMixin
+from rest_framework.decorators import action
 from rest_framework.filters import OrderingFilter
+from rest_framework.utils.urls import replace_query_param
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_haystack.viewsets import HaystackViewSet
 
-from note.models import Note, Tag, NoteComments
+from note.models import Note, Tag, NoteComments, RelatedNotes
 from note.serializers import (
     NoteListSerializer,
+    NoteListValuesSerializer,
     NoteDetailSerializer,
     NoteTagSerializer,
     NoteCommentsListSerializer,
+    NoteCommentsThreadSerializer,
     NoteTagHaystackSerializer,
     NoteHaystackSerializer,
 )
+from note.suggest import suggest_index
+from yus_note.drf.mixins import ConditionalGetMixin, ValuesListMixin
 
 
 # Create your views here.
@@ -24,8 +39,12 @@ class NoteTagViewSet(CreateModelMixin, ListModelMixin, GenericViewSet):
     serializer_class = NoteTagSerializer
 
 
-class NoteViewSet(ListModelMixin, GenericViewSet):
-    """笔记：列表、详情"""
+class NoteViewSet(
+    ConditionalGetMixin, ValuesListMixin, ListModelMixin, GenericViewSet
+):
+    """笔记：列表、详情
+    支持条件GET，详情的ETag不包含浏览量（每次浏览都会变化），304响应中的浏览量可能滞后。
+    """
 
     queryset = Note.objects.filter(is_private=False, is_delete=False).select_related(
         "author"
@@ -33,6 +52,9 @@ class NoteViewSet(ListModelMixin, GenericViewSet):
     filter_backends = [DjangoFilterBackend, OrderingFilter]
     ordering_fields = ["views", "likes", "create_time", "update_time"]
     ordering = ["-views"]
+    values_serializer_class = NoteListValuesSerializer
+    etag_fields = ("likes", "comment_count", "folder__name", "author__nickname")
+    list_etag_fields = ("views", "likes", "comment_count")
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -40,26 +62,155 @@ class NoteViewSet(ListModelMixin, GenericViewSet):
         return NoteDetailSerializer
 
     def retrieve(self, request, *args, **kwargs):
-        instance = self.get_object()
-        if instance.author != request.user:
-            isinstance.views += 1
-            instance.save()
-        serializer = self.get_serializer(instance)
+        state = self.get_object_state("pk", "author", "views")
+        if state is None:
+            raise Http404
+        pk, author, views = state.pop("pk"), state.pop("author"), state.pop("views")
+        if author != request.user.pk:
+            # 浏览量只记在缓存中，由synchronize_note_views定时写回数据库；返回304时同样计入
+            Note.cached_views.incr(Note(pk=pk, views=views))
+        not_modified, headers = self.conditional_response(state)
+        if not_modified is not None:
+            return self.with_headers(not_modified, headers)
+        serializer = self.get_serializer(self.get_object())
+        return self.with_headers(Response(serializer.data), headers)
+
+    @action(methods=["GET"], detail=True)
+    def related(self, request, pk=None):
+        """相关笔记：读取离线计算好的结果"""
+        # 笔记不存在、不公开或pk无效时返回404
+        note = self.get_object()
+        related_ids = (
+            RelatedNotes.objects.filter(note=note)
+            .values_list("related_ids", flat=True)
+            .first()
+        ) or []
+        notes = Note.objects.filter(is_private=False, is_delete=False).in_bulk(
+            related_ids
+        )
+        serializer = NoteListSerializer(
+            [notes[i] for i in related_ids if i in notes], many=True
+        )
         return Response(serializer.data)
 
 
 class NoteCommentsViewSet(ListModelMixin, GenericViewSet):
-    """笔记评论：列表"""
+    """笔记评论：列表
+    按(创建时间, id)游标分页，走(笔记, 创建时间)索引，每次请求的开销只与页大小有关。
+
+    请求参数：
+        ordering: create_time或-create_time，默认-create_time
+        limit: 每页条数，默认20，最多100
+        cursor: 上一页返回的next中的游标
+        root: 只返回该楼层（顶层评论）下的回复
+        thread: 为1时按楼层返回，只对顶层评论分页，每条附带其下最早的若干条回复（replies），
+            还有更多回复时replies_next为按root分页获取其余回复的地址
+        replies: thread模式下每个楼层附带的回复数，默认3，最多20
+    """
 
     serializer_class = NoteCommentsListSerializer
-    filter_backends = [OrderingFilter]
-    ordering_fields = ["create_time"]
-    ordering = ["-create_time"]
+    default_limit = 20
+    max_limit = 100
+    default_replies = 3
+    max_replies = 20
 
     def get_queryset(self):
         target_note = self.kwargs.get("target_note", None)
         return NoteComments.objects.filter(note=target_note).select_related("author")
 
+    def get_serializer_class(self):
+        if self.request.query_params.get("thread") in ("1", "true"):
+            return NoteCommentsThreadSerializer
+        return NoteCommentsListSerializer
+
+    def encode_cursor(self, comment: NoteComments) -> str:
+        raw = f"{comment.create_time.isoformat()},{comment.pk}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def decode_cursor(self, cursor: str):
+        try:
+            raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+            create_time, pk = raw.split(",")
+            return datetime.fromisoformat(create_time), int(pk)
+        except (ValueError, TypeError):
+            raise ValidationError({"cursor": ["无效的游标。"]})
+
+    def get_int_param(self, name: str, default: int, maximum: int) -> int:
+        try:
+            value = int(self.request.query_params.get(name, default))
+        except ValueError:
+            value = default
+        return min(max(value, 1), maximum)
+
+    def list(self, request, *args, **kwargs):
+        limit = self.get_int_param("limit", self.default_limit, self.max_limit)
+        desc = request.query_params.get("ordering") != "create_time"
+        serializer_class = self.get_serializer_class()
+        thread = serializer_class is NoteCommentsThreadSerializer
+
+        queryset = self.get_queryset()
+        if thread:
+            queryset = queryset.filter(root=None)
+        elif request.query_params.get("root"):
+            try:
+                queryset = queryset.filter(root=int(request.query_params["root"]))
+            except ValueError:
+                raise ValidationError({"root": ["无效的楼层。"]})
+        cursor = request.query_params.get("cursor")
+        if cursor:
+            create_time, pk = self.decode_cursor(cursor)
+            if desc:
+                after = Q(create_time__lt=create_time)
+                after |= Q(create_time=create_time, id__lt=pk)
+            else:
+                after = Q(create_time__gt=create_time)
+                after |= Q(create_time=create_time, id__gt=pk)
+            queryset = queryset.filter(after)
+        ordering = ["-create_time", "-id"] if desc else ["create_time", "id"]
+        comments = list(queryset.order_by(*ordering)[: limit + 1])
+        next_url = None
+        if len(comments) > limit:
+            comments = comments[:limit]
+            next_url = replace_query_param(
+                request.build_absolute_uri(), "cursor", self.encode_cursor(comments[-1])
+            )
+
+        if thread:
+            self.attach_replies(comments)
+        serializer = serializer_class(comments, many=True)
+        return Response({"next": next_url, "results": serializer.data})
+
+    def attach_replies(self, comments: list) -> None:
+        """一次查询取出本页每个楼层最早的replies+1条回复，楼层内按时间正序
+        多取的一条只用来判断是否还有更多回复，热门楼层的回复数不影响本页大小
+        """
+        number = self.get_int_param("replies", self.default_replies, self.max_replies)
+        ordering = [F("create_time").asc(), F("id").asc()]
+        replies = defaultdict(list)
+        for reply in (
+            self.get_queryset()
+            .filter(root__in=[c.pk for c in comments])
+            .annotate(
+                row_number=Window(
+                    RowNumber(), partition_by=F("root"), order_by=ordering
+                )
+            )
+            .filter(row_number__lte=number + 1)
+            .order_by("create_time", "id")
+        ):
+            replies[reply.root_id].append(reply)
+
+        base_url = self.request.build_absolute_uri(self.request.path)
+        for comment in comments:
+            comment.replies = replies[comment.pk][:number]
+            comment.replies_next = None
+            if len(replies[comment.pk]) > number:
+                url = replace_query_param(base_url, "root", comment.pk)
+                url = replace_query_param(url, "ordering", "create_time")
+                comment.replies_next = replace_query_param(
+                    url, "cursor", self.encode_cursor(comment.replies[-1])
+                )
+
 
 class NoteTagSearchViewSet(HaystackViewSet):
     """笔记标签搜索：列表"""
@@ -73,3 +224,19 @@ class NoteSearchViewSet(HaystackViewSet):
 
     index_models = [Note]
     serializer_class = NoteHaystackSerializer
+
+
+class NoteSuggestView(APIView):
+    """搜索联想：根据输入前缀返回笔记标题与标签，按浏览量排序
+    请求参数：q-输入的前缀，limit-返回数量
+    """
+
+    def get(self, request):
+        prefix = request.query_params.get("q", "")
+        top_k = suggest_index.top_k
+        try:
+            limit = int(request.query_params.get("limit", top_k))
+        except ValueError:
+            limit = top_k
+        limit = min(max(limit, 1), top_k)
+        return Response(suggest_index.lookup(prefix, limit))
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from user.models import User, UserFolders, UserCollections
+from user.models import User, UserFolders, UserCollections, UserActivity
 # Register your models here.
 
 
@@ -19,5 +19,11 @@ class UserCollectionsAdmin(admin.ModelAdmin):
     pass
 
 
+@admin.register(UserActivity)
+class UserActivityAdmin(admin.ModelAdmin):
+    list_display = ("user", "kind", "date", "count")
+    list_filter = ("kind",)
+
+
 
 
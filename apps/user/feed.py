@@ -0,0 +1,188 @@
+"""关注动态（时间线）
+
+普通用户发布公开笔记时，把笔记id推送到每个粉丝的时间线（推模式）；
+粉丝数不少于 FEED["CELEBRITY_FOLLOWERS"] 的用户不推送，由粉丝读取时从数据库拉取（拉模式）。
+时间线为Redis有序集合，成员和分数都是笔记id（id随发布时间递增），超过 FEED["MAX_LENGTH"] 时删除最旧的。
+读取时再按当前的关注关系和笔记状态过滤，因此取消关注、删除笔记或改为私有后无需清理时间线。
+笔记由私有或已删除改为公开时同样推送；
+粉丝数降到阈值以下的用户改为推模式，同时把其最近的笔记补充到粉丝的时间线。
+"""
+
+import threading
+from typing import List, Optional
+
+import redis
+from django.conf import settings
+
+from note.models import Note
+from user.models import User, UserRelations
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_conf() -> dict:
+    conf = getattr(settings, "FEED", None) or {}
+    return {
+        "REDIS_URL": conf.get("REDIS_URL", "redis://127.0.0.1:6379/2"),
+        "OPTIONS": conf.get("OPTIONS", {}),
+        "KEY_PREFIX": conf.get("KEY_PREFIX", "yus_note:feed"),
+        "MAX_LENGTH": conf.get("MAX_LENGTH", 500),
+        "CELEBRITY_FOLLOWERS": conf.get("CELEBRITY_FOLLOWERS", 10000),
+    }
+
+
+def get_redis() -> redis.Redis:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                conf = get_conf()
+                _pool = redis.ConnectionPool.from_url(
+                    conf["REDIS_URL"], **conf["OPTIONS"]
+                )
+    return redis.Redis(connection_pool=_pool)
+
+
+def timeline_key(user_id: int) -> str:
+    return f"{get_conf()['KEY_PREFIX']}:{user_id}"
+
+
+def is_celebrity(user: User) -> bool:
+    return user.followers_count >= get_conf()["CELEBRITY_FOLLOWERS"]
+
+
+def push(
+    user_ids, note_ids: List[int], batch_size: int = 1000, create: bool = False
+) -> None:
+    """把笔记推送到多个用户的时间线，并裁剪到最大长度
+    默认只推送到已存在的时间线：不存在的时间线在读取时从数据库重建，
+    如果先被推送创建出来，就只包含推送的这几篇笔记，之后也不会再重建。
+    """
+    if not note_ids:
+        return
+    max_length = get_conf()["MAX_LENGTH"]
+    mapping = {pk: pk for pk in note_ids}
+    user_ids = list(user_ids)
+    client = get_redis()
+    pipe = client.pipeline(transaction=False)
+    for i in range(0, len(user_ids), batch_size):
+        keys = [timeline_key(user_id) for user_id in user_ids[i : i + batch_size]]
+        if not create:
+            for key in keys:
+                pipe.exists(key)
+            keys = [key for key, exists in zip(keys, pipe.execute()) if exists]
+        for key in keys:
+            pipe.zadd(key, mapping)
+            pipe.zremrangebyrank(key, 0, -max_length - 1)
+        pipe.execute()
+
+
+def fanout_note(note: Note) -> int:
+    """推送新发布的笔记给作者的粉丝，返回推送的用户数"""
+    if note.is_private or note.is_delete or note.author is None:
+        return 0
+    if is_celebrity(note.author):
+        return 0
+    followers = UserRelations.objects.filter(following=note.author_id).values_list(
+        "follower", flat=True
+    )
+    followers = list(followers.iterator())
+    push(followers, [note.pk])
+    return len(followers)
+
+
+def recent_note_ids(author_ids, before: Optional[int] = None, limit: int = 20):
+    qs = Note.objects.filter(author__in=author_ids, is_private=False, is_delete=False)
+    if before is not None:
+        qs = qs.filter(pk__lt=before)
+    return list(qs.order_by("-pk").values_list("pk", flat=True)[:limit])
+
+
+def backfill(user_id: int, author_id: int) -> None:
+    """关注新用户后，把其最近的笔记补充到时间线中"""
+    author = User.objects.filter(pk=author_id).only("followers_count").first()
+    if author is None or is_celebrity(author):
+        return
+    push([user_id], recent_note_ids([author_id], limit=get_conf()["MAX_LENGTH"]))
+
+
+def dropped_below_threshold(user_id: int) -> bool:
+    """粉丝数减一后调用：是否刚好降到阈值以下（由拉模式变为推模式）"""
+    threshold = get_conf()["CELEBRITY_FOLLOWERS"]
+    return User.objects.filter(pk=user_id, followers_count=threshold - 1).exists()
+
+
+def backfill_followers(author_id: int) -> int:
+    """作者由拉模式变为推模式后，之前拉取的笔记不在粉丝的时间线中，
+    把其最近的笔记补充到所有粉丝的时间线，返回推送的用户数
+    """
+    author = User.objects.filter(pk=author_id).only("followers_count").first()
+    if author is None or is_celebrity(author):
+        return 0
+    followers = UserRelations.objects.filter(following=author_id).values_list(
+        "follower", flat=True
+    )
+    followers = list(followers.iterator())
+    push(followers, recent_note_ids([author_id], limit=get_conf()["MAX_LENGTH"]))
+    return len(followers)
+
+
+def rebuild(user: User) -> None:
+    """时间线不存在（新用户或Redis数据丢失）时，从数据库重建"""
+    conf = get_conf()
+    authors = UserRelations.objects.filter(
+        follower=user, following__followers_count__lt=conf["CELEBRITY_FOLLOWERS"]
+    ).values_list("following", flat=True)
+    note_ids = recent_note_ids(list(authors), limit=conf["MAX_LENGTH"])
+    push([user.pk], note_ids, create=True)
+
+
+def read(user: User, before: Optional[int] = None, limit: int = 20):
+    """读取时间线中id小于before的最多limit篇笔记，按id倒序
+
+    Returns:
+        (笔记列表, 下一页的before，没有下一页时为None)
+    """
+    conf = get_conf()
+    client = get_redis()
+    key = timeline_key(user.pk)
+    if not client.exists(key):
+        rebuild(user)
+    # 多取一些，过滤掉已取消关注、已删除或私有的笔记后仍尽量凑够一页
+    fetch = limit * 2
+    max_score = f"({before}" if before is not None else "+inf"
+    pushed = [
+        int(pk)
+        for pk in client.zrevrangebyscore(key, max_score, "-inf", start=0, num=fetch)
+    ]
+    celebrities = list(
+        UserRelations.objects.filter(
+            follower=user, following__followers_count__gte=conf["CELEBRITY_FOLLOWERS"]
+        ).values_list("following", flat=True)
+    )
+    pulled = recent_note_ids(celebrities, before, limit) if celebrities else []
+    # 两个来源各自只取了一段，只有不小于两段下界的id才能保证顺序正确
+    bounds = []
+    if len(pushed) == fetch:
+        bounds.append(pushed[-1])
+    if len(pulled) == limit:
+        bounds.append(pulled[-1])
+    bound = max(bounds) if bounds else None
+    candidates = sorted(
+        {pk for pk in pushed + pulled if bound is None or pk >= bound}, reverse=True
+    )
+    notes = (
+        Note.objects.filter(
+            pk__in=candidates,
+            is_private=False,
+            is_delete=False,
+            author__rel_followers__follower=user,
+        )
+        .select_related("author")
+        .in_bulk()
+    )
+    page = [notes[pk] for pk in candidates if pk in notes][:limit]
+    if len(page) == limit:
+        return page, page[-1].pk
+    return page, bound
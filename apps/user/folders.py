@@ -0,0 +1,112 @@
+"""用户文件夹树"""
+
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce, Length
+
+from note.models import Note
+from user.models import UserFolders
+
+# 影响文件夹笔记统计的笔记字段
+STATS_FIELDS = {"folder", "author", "is_delete", "is_private", "content"}
+
+
+def stats_key(user_id: int, public_only: bool) -> str:
+    return f"folder_stats:{user_id}:{'public' if public_only else 'all'}"
+
+
+def get_note_stats(
+    user_id: int, public_only: bool = False
+) -> Dict[int, Tuple[int, int]]:
+    """各文件夹（不含子文件夹）中的笔记数和内容总长度：{文件夹id: (笔记数, 内容长度)}
+    使用一次分组聚合查询，结果缓存到笔记新建、移动、删除时失效。
+    """
+    cache = caches["default"]
+    key = stats_key(user_id, public_only)
+    stats = cache.get(key)
+    if stats is None:
+        qs = Note.objects.filter(author=user_id, is_delete=False, folder__isnull=False)
+        if public_only:
+            qs = qs.filter(is_private=False)
+        rows = (
+            qs.values("folder")
+            .annotate(number=Count("id"), size=Coalesce(Sum(Length("content")), 0))
+            .order_by()
+            .values_list("folder", "number", "size")
+        )
+        stats = {folder: (number, size) for folder, number, size in rows}
+        cache.set(key, stats, getattr(settings, "FOLDER_STATS_TIMEOUT", 3600))
+    return stats
+
+
+def invalidate_note_stats(user_id: Optional[int]) -> None:
+    if user_id is not None:
+        caches["default"].delete_many(
+            [stats_key(user_id, False), stats_key(user_id, True)]
+        )
+
+
+def build_tree(
+    rows, stats: Optional[Dict[int, Tuple[int, int]]] = None
+) -> List[dict]:
+    """把 (id, name, parent) 的扁平列表组装成嵌套的文件夹树
+
+    Args:
+        rows: 文件夹列表
+        stats: get_note_stats的结果，提供时每个节点附带笔记数和内容长度，
+            total_前缀的为包含所有子文件夹的合计
+
+    Returns:
+        根文件夹列表，每个节点为 {"id", "name", "children", ...}
+    """
+    nodes: Dict[int, dict] = {}
+    parents = []
+    for pk, name, parent in rows:
+        nodes[pk] = {"id": pk, "name": name, "children": []}
+        parents.append((pk, parent))
+    roots = []
+    for pk, parent in parents:
+        if parent is None:
+            roots.append(nodes[pk])
+        elif parent in nodes:
+            nodes[parent]["children"].append(nodes[pk])
+    if stats is not None:
+        add_stats(roots, stats)
+    return roots
+
+
+def add_stats(roots: List[dict], stats: Dict[int, Tuple[int, int]]) -> None:
+    # 先序遍历后逆序处理，保证子节点先于父节点计算合计
+    order = []
+    stack = list(roots)
+    while stack:
+        node = stack.pop()
+        order.append(node)
+        stack.extend(node["children"])
+    for node in reversed(order):
+        number, size = stats.get(node["id"], (0, 0))
+        node["note_count"] = number
+        node["content_size"] = size
+        node["total_note_count"] = number + sum(
+            child["total_note_count"] for child in node["children"]
+        )
+        node["total_content_size"] = size + sum(
+            child["total_content_size"] for child in node["children"]
+        )
+
+
+def get_tree(user_id: int, public_only: bool = False) -> List[dict]:
+    """一次查询取出用户的全部文件夹，在内存中组装成树，并附带笔记统计
+
+    Args:
+        public_only: 只统计公开笔记（查看其他用户的文件夹时）
+    """
+    rows = (
+        UserFolders.objects.filter(user=user_id)
+        .order_by("id")
+        .values_list("id", "name", "parent")
+    )
+    return build_tree(rows, get_note_stats(user_id, public_only))
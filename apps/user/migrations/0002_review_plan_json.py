@@ -0,0 +1,50 @@
+# Generated by Django 4.2.1 on 2026-10-19 17:20
+
+from django.db import migrations, models
+import user.models
+
+
+def plan_str_to_list(apps, schema_editor):
+    User = apps.get_model("user", "User")
+    users = list(User.objects.only("pk", "review_plan"))
+    for user in users:
+        user.review_plan_list = [float(x) for x in user.review_plan.split(",") if x]
+    User.objects.bulk_update(users, ["review_plan_list"], batch_size=500)
+
+
+def plan_list_to_str(apps, schema_editor):
+    User = apps.get_model("user", "User")
+    users = list(User.objects.only("pk", "review_plan_list"))
+    for user in users:
+        user.review_plan = ",".join("{:.2f}".format(x) for x in user.review_plan_list)
+    User.objects.bulk_update(users, ["review_plan"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='review_plan_list',
+            field=models.JSONField(blank=True, default=user.models.default_review_plan),
+        ),
+        migrations.RunPython(plan_str_to_list, plan_list_to_str),
+        migrations.RemoveField(
+            model_name='user',
+            name='review_plan',
+        ),
+        migrations.RenameField(
+            model_name='user',
+            old_name='review_plan_list',
+            new_name='review_plan',
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='review_plan',
+            field=models.JSONField(blank=True, default=user.models.default_review_plan, help_text='分别在多少天后复习笔记，各阶段间隔天数的列表（如：[1, 3, 7, 30]表示新的笔记分别在1、3、7、30天后进行复习）。', verbose_name='复习计划'),
+        ),
+    ]
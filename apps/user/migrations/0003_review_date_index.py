@@ -0,0 +1,17 @@
+# Generated by Django 4.2.1 on 2026-10-19 16:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0002_review_plan_json'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='usercollections',
+            index=models.Index(fields=['user', 'review_date'], name='user_coll_idx_user_review'),
+        ),
+    ]
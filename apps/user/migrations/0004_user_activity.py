@@ -0,0 +1,89 @@
+# Generated by Django 4.2.1 on 2026-10-19 16:54
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import calendar
+from datetime import date
+
+# 与UserActivity.REVIEW/PUBLISH一致
+HISTORY_FIELDS = {1: 'review_history', 2: 'publish_history'}
+
+
+def history_to_activity(apps, schema_editor):
+    """{"YYYY-MM": "0,0,1,..."} -> 每天一行"""
+    User = apps.get_model('user', 'User')
+    UserActivity = apps.get_model('user', 'UserActivity')
+    rows = []
+    users = User.objects.only('pk', *HISTORY_FIELDS.values())
+    for user in users.iterator():
+        for kind, field in HISTORY_FIELDS.items():
+            for month, counts in (getattr(user, field) or {}).items():
+                year, month_num = map(int, month.split('-'))
+                for i, count in enumerate(counts.split(',')):
+                    if count and int(count):
+                        rows.append(UserActivity(
+                            user_id=user.pk, kind=kind, count=int(count),
+                            date=date(year, month_num, i + 1),
+                        ))
+        if len(rows) >= 1000:
+            UserActivity.objects.bulk_create(rows)
+            rows = []
+    UserActivity.objects.bulk_create(rows)
+
+
+def activity_to_history(apps, schema_editor):
+    User = apps.get_model('user', 'User')
+    UserActivity = apps.get_model('user', 'UserActivity')
+    histories = {}
+    for user_id, kind, day, count in UserActivity.objects.values_list(
+        'user_id', 'kind', 'date', 'count'
+    ).iterator():
+        months = histories.setdefault(user_id, {}).setdefault(kind, {})
+        key = day.strftime('%Y-%m')
+        if key not in months:
+            months[key] = [0] * calendar.monthrange(day.year, day.month)[1]
+        months[key][day.day - 1] += count
+    for user_id, kinds in histories.items():
+        User.objects.filter(pk=user_id).update(**{
+            HISTORY_FIELDS[kind]: {k: ','.join(map(str, v)) for k, v in months.items()}
+            for kind, months in kinds.items()
+        })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0003_review_date_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.PositiveSmallIntegerField(choices=[(1, '复习'), (2, '发布')], verbose_name='种类')),
+                ('date', models.DateField(verbose_name='日期')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='数量')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activities', to=settings.AUTH_USER_MODEL, verbose_name='用户')),
+            ],
+            options={
+                'verbose_name': '用户活动记录',
+                'verbose_name_plural': '用户活动记录',
+                'db_table': 'user_user_activity',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='useractivity',
+            constraint=models.UniqueConstraint(fields=('user', 'kind', 'date'), name='user_activity_uni_user_kind_date'),
+        ),
+        migrations.RunPython(history_to_activity, activity_to_history),
+        migrations.RemoveField(
+            model_name='user',
+            name='publish_history',
+        ),
+        migrations.RemoveField(
+            model_name='user',
+            name='review_history',
+        ),
+    ]
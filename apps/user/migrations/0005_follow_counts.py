@@ -0,0 +1,39 @@
+# Generated by Django 4.2.1 on 2026-10-19 16:57
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_follow_relations(apps, schema_editor):
+    User = apps.get_model('user', 'User')
+    UserRelations = apps.get_model('user', 'UserRelations')
+
+    def count(field):
+        return Coalesce(Subquery(
+            UserRelations.objects.filter(**{field: OuterRef('pk')}).order_by()
+            .values(field).annotate(number=Count('pk')).values('number')
+        ), 0)
+
+    User.objects.update(following_count=count('follower'), followers_count=count('following'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0004_user_activity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0, help_text='在关注/取消关注时同步更新，并定时校正。', verbose_name='粉丝数'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='following_count',
+            field=models.PositiveIntegerField(default=0, help_text='在关注/取消关注时同步更新，并定时校正。', verbose_name='关注数'),
+        ),
+        migrations.RunPython(count_follow_relations, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.1 on 2026-10-19 17:04
+
+from django.db import migrations, models
+
+
+def fill_folder_paths(apps, schema_editor):
+    UserFolders = apps.get_model('user', 'UserFolders')
+    parents = dict(UserFolders.objects.values_list('pk', 'parent'))
+    paths = {}
+
+    def get_path(pk, seen=()):
+        if pk not in paths:
+            parent = parents[pk]
+            # 父级不存在或成环的文件夹视为根文件夹
+            if parent is None or parent not in parents or parent in seen:
+                paths[pk] = f'/{pk}/'
+            else:
+                paths[pk] = f'{get_path(parent, seen + (pk,))}{pk}/'
+        return paths[pk]
+
+    folders = [UserFolders(pk=pk, path=get_path(pk)) for pk in parents]
+    UserFolders.objects.bulk_update(folders, ['path'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0005_follow_counts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userfolders',
+            name='path',
+            field=models.CharField(default='', editable=False, max_length=255, verbose_name='路径'),
+        ),
+        migrations.AddIndex(
+            model_name='userfolders',
+            index=models.Index(fields=['path'], name='user_folders_idx_path'),
+        ),
+        migrations.RunPython(fill_folder_paths, migrations.RunPython.noop),
+    ]
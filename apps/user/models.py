@@ -1,7 +1,11 @@
-from typing import Union, Any, Type, Optional
+import calendar
+from datetime import date, timedelta
+from typing import Union, Any, Type, Optional, Dict
 
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction, IntegrityError
+from django.db.models import F, Max, Value
+from django.db.models.functions import Concat, Length, Substr
 from django.apps import apps
 from django.contrib import auth
 from django.contrib.auth.hashers import make_password
@@ -13,8 +17,10 @@ from django.utils.deconstruct import deconstructible
 
 from tinymce.models import HTMLField
 
-from yus_note.models import ReviewMixinModel, cached_model_property
+from yus_note.models import ReviewMixinModel
+from user import profiles
 from user.validators import FileSizeValidator
+from utils.review import parse_plan
 
 
 def user_avator_upload_path(instance: "User", filename: str) -> str:
@@ -103,6 +109,10 @@ def default_history():
     return {}
 
 
+def default_review_plan():
+    return parse_plan(settings.DEFAULT_REVIEW_PLAN)
+
+
 class User(AbstractBaseUser, PermissionsMixin):
     """
     用户模型
@@ -159,25 +169,19 @@ class User(AbstractBaseUser, PermissionsMixin):
         "最近发布时间", null=True, blank=True, help_text="最近发布笔记时间。"
     )
 
-    review_history = models.JSONField(
-        "复习记录",
-        default=default_history,
+    review_plan = models.JSONField(
+        "复习计划",
+        default=default_review_plan,
         blank=True,
-        help_text="笔记复习记录: 键为日期字符串; 值为每天复习数量, 每天复习数量使用','隔开。",
+        help_text="分别在多少天后复习笔记，各阶段间隔天数的列表（如：[1, 3, 7, 30]表示新的笔记分别在1、3、7、30天后进行复习）。",
     )
 
-    publish_history = models.JSONField(
-        "发布记录",
-        default=default_history,
-        blank=True,
-        help_text="笔记发布记录: 键为日期字符串; 值为每天复习数量, 每天复习数量使用','隔开。",
+    following_count = models.PositiveIntegerField(
+        "关注数", default=0, help_text="在关注/取消关注时同步更新，并定时校正。"
     )
 
-    review_plan = models.CharField(
-        "复习计划",
-        max_length=64,
-        default=settings.DEFAULT_REVIEW_PLAN,
-        help_text="分别在多少天后复习笔记，使用','连接多个天数（如：'1,3,7,30'表示新的笔记分别在1、3、7天后进行复习）。",
+    followers_count = models.PositiveIntegerField(
+        "粉丝数", default=0, help_text="在关注/取消关注时同步更新，并定时校正。"
     )
 
     following = models.ManyToManyField(
@@ -225,14 +229,6 @@ class User(AbstractBaseUser, PermissionsMixin):
         if self.email:
             send_mail(subject, message, from_email, [self.email], **kwargs)
 
-    @cached_model_property(cache="model_fields")
-    def following_number(self) -> int:
-        return self.rel_following.count()  # type: ignore
-
-    @cached_model_property(cache="model_fields")
-    def followers_number(self) -> int:
-        return self.rel_followers.count()  # type: ignore
-
     @property
     def name(self):
         return self.nickname or self.username
@@ -289,6 +285,8 @@ class UserFolders(models.Model):
         related_name="folders",
         limit_choices_to={"is_active": True},
     )
+    # 从根文件夹到自身的id路径，如"/1/5/9/"，子树查询使用前缀匹配
+    path = models.CharField("路径", max_length=255, default="", editable=False)
 
     class Meta:
         verbose_name = "用户文件夹"
@@ -299,10 +297,64 @@ class UserFolders(models.Model):
                 fields=["name", "parent"], name="user_folders_uni_name_parent"
             )
         ]
+        indexes = [models.Index(fields=["path"], name="user_folders_idx_path")]
 
     def __str__(self) -> str:
         return "{}/{}".format(self.parent, self.name)
 
+    def save(self, *args, **kwargs) -> None:
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self.update_path()
+
+    def update_path(self) -> None:
+        """根据父级文件夹的路径更新自身及所有子孙文件夹的路径"""
+        parent_path = "/"
+        if self.parent_id:
+            parent_path = (
+                UserFolders.objects.filter(pk=self.parent_id)
+                .values_list("path", flat=True)
+                .get()
+            )
+        if f"/{self.pk}/" in parent_path:
+            raise ValueError("不能移动到自身或子文件夹中。")
+        path = f"{parent_path}{self.pk}/"
+        if path == self.path:
+            return
+        if self.longest_path_under(parent_path) > self.path_max_length():
+            raise ValueError("文件夹层级过深。")
+        if self.path:
+            UserFolders.objects.filter(path__startswith=self.path).update(
+                path=Concat(Value(path), Substr("path", len(self.path) + 1))
+            )
+        else:
+            UserFolders.objects.filter(pk=self.pk).update(path=path)
+        self.path = path
+
+    @classmethod
+    def path_max_length(cls) -> int:
+        return cls._meta.get_field("path").max_length
+
+    def longest_path_under(self, parent_path: str) -> int:
+        """位于parent_path下时，自身及所有子孙文件夹中最长的路径长度
+        新建的文件夹还没有id，按当前最大id+1估算。
+        """
+        pk = self.pk
+        if pk is None:
+            pk = (UserFolders.objects.aggregate(pk=Max("pk"))["pk"] or 0) + 1
+        length = len(f"{parent_path}{pk}/")
+        if self.path:
+            longest = self.get_descendants().aggregate(length=Max(Length("path")))
+            length += (longest["length"] or len(self.path)) - len(self.path)
+        return length
+
+    def get_descendants(self, include_self: bool = True):
+        qs = UserFolders.objects.filter(path__startswith=self.path)
+        return qs if include_self else qs.exclude(pk=self.pk)
+
+    def is_descendant_of(self, other: "UserFolders") -> bool:
+        return self.path.startswith(other.path)
+
 
 class UserFavorites(models.Model):
     name = models.CharField("名称", max_length=32)
@@ -374,6 +426,83 @@ class UserCollections(ReviewMixinModel, models.Model):
                 fields=["user", "note"], name="user_collections_uni_user_note"
             )
         ]
+        indexes = [
+            models.Index(
+                fields=["user", "review_date"], name="user_coll_idx_user_review"
+            )
+        ]
 
     def __str__(self) -> str:
         return "{}/{}".format(self.favorite, self.note.name)
+
+
+class UserActivityManager(models.Manager):
+    def increment(self, user, kind: int, count: int = 1, day: Optional[date] = None):
+        """当天记录原子地+count，没有记录则创建"""
+        day = day or date.today()
+        lookup = {"user": user, "kind": kind, "date": day}
+        profiles.bump_version(getattr(user, "pk", user))
+        if self.filter(**lookup).update(count=F("count") + count):
+            return
+        try:
+            with transaction.atomic():
+                self.create(count=count, **lookup)
+        except IntegrityError:
+            # 并发请求先创建了当天记录
+            self.filter(**lookup).update(count=F("count") + count)
+
+    def month_histories(self, user, days: Optional[int] = None) -> Dict[int, dict]:
+        """最近若干天的记录按月汇总：{种类: {"YYYY-MM": "0,0,1,..."}}
+        格式与原User.review_history/publish_history一致，只包含起始日期为days天内的月份。
+        """
+        days = days or getattr(settings, "HISTORY_EXPIRES", None) or 90
+        start = date.today() - timedelta(days)
+        if start.day != 1:
+            start = (start.replace(day=1) + timedelta(days=31)).replace(day=1)
+        res: Dict[int, dict] = {kind: {} for kind, _ in self.model.kind_choices}
+        months: Dict[tuple, list] = {}
+        rows = self.filter(user=user, date__gte=start).values_list("kind", "date", "count")
+        for kind, day, count in rows:
+            month = months.get((kind, day.year, day.month))
+            if month is None:
+                month_days = calendar.monthrange(day.year, day.month)[1]
+                month = months[(kind, day.year, day.month)] = [0] * month_days
+            month[day.day - 1] += count
+        for (kind, year, month_num), counts in sorted(months.items()):
+            res[kind][f"{year}-{month_num:02d}"] = ",".join(map(str, counts))
+        return res
+
+
+class UserActivity(models.Model):
+    """用户每日活动记录：每个用户每天每种活动一行"""
+
+    REVIEW = 1
+    PUBLISH = 2
+    kind_choices = [(REVIEW, "复习"), (PUBLISH, "发布")]
+
+    user = models.ForeignKey(
+        verbose_name="用户",
+        to=User,
+        on_delete=models.CASCADE,
+        related_name="activities",
+    )
+    kind = models.PositiveSmallIntegerField("种类", choices=kind_choices)
+    date = models.DateField("日期")
+    count = models.PositiveIntegerField("数量", default=0)
+
+    objects = UserActivityManager()
+
+    class Meta:
+        verbose_name = "用户活动记录"
+        verbose_name_plural = verbose_name
+        db_table = "user_user_activity"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "kind", "date"], name="user_activity_uni_user_kind_date"
+            )
+        ]
+
+    def __str__(self) -> str:
+        return "{}/{}/{}: {}".format(
+            self.user_id, self.get_kind_display(), self.date, self.count  # type: ignore
+        )
@@ -0,0 +1,68 @@
+"""用户主页缓存
+
+缓存序列化后的主页JSON字节及其ETag，键包含用户的版本号：
+用户信息修改、关注/取消关注、发布笔记或复习打卡时更换版本号，旧缓存随之失效，无需逐个删除。
+版本号使用随机值而不是自增数字，版本键被淘汰后重新生成也不会与旧缓存重复。
+"""
+
+import hashlib
+import uuid
+from datetime import date
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+
+def get_cache():
+    return caches["default"]
+
+
+def version_key(user_id: int) -> str:
+    return f"profile_version:{user_id}"
+
+
+def get_version(user_id: int) -> str:
+    cache = get_cache()
+    version = cache.get(version_key(user_id))
+    if version is None:
+        version = uuid.uuid4().hex
+        # 并发时以先写入的为准
+        if not cache.add(version_key(user_id), version, None):
+            version = cache.get(version_key(user_id), version)
+    return version
+
+
+def bump_version(user_id: Optional[int]) -> None:
+    """更换版本号，在事务提交后执行，避免其他请求在提交前按新版本缓存旧数据"""
+    if user_id is None:
+        return
+    transaction.on_commit(
+        lambda: get_cache().set(version_key(user_id), uuid.uuid4().hex, None)
+    )
+
+
+def content_key(user_id: int, version: str, host: str) -> str:
+    # 复习和发布记录按日期统计，头像等链接包含域名
+    host_hash = hashlib.md5(host.encode()).hexdigest()[:8]
+    return f"profile:{user_id}:{version}:{date.today().isoformat()}:{host_hash}"
+
+
+def get_or_render(user_id: int, host: str, render) -> Optional[Tuple[bytes, str]]:
+    """取出缓存的主页，没有则调用render()生成JSON字节并缓存
+
+    Returns:
+        (JSON字节, ETag)，render()返回None（用户不存在）时返回None
+    """
+    cache = get_cache()
+    key = content_key(user_id, get_version(user_id), host)
+    cached = cache.get(key)
+    if cached is None:
+        content = render()
+        if content is None:
+            return None
+        etag = '"{}"'.format(hashlib.md5(content).hexdigest())
+        cached = (content, etag)
+        cache.set(key, cached, getattr(settings, "PROFILE_CACHE_TIMEOUT", 3600))
+    return cached
@@ -1,7 +1,10 @@
-from django.db.models.signals import pre_delete
+from django.db.models import Value
+from django.db.models.functions import Concat, Substr
+from django.db.models.signals import pre_delete, post_delete, post_save
 from django.dispatch import receiver
 
-from user.models import User
+from user import profiles
+from user.models import User, UserFolders
 
 
 @receiver(pre_delete, sender=User)
@@ -11,3 +14,20 @@ def user_pre_delete_handler(sender, instance, using, origin, **kwargs):
     instance.self_notes.filter(is_private=True).delete()
     # 删除根目录
     instance.folders.filter(parent=None).delete()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed_handler(sender, instance, **kwargs):
+    """用户信息修改或删除后，使主页缓存失效"""
+    profiles.bump_version(instance.pk)
+
+
+@receiver(post_delete, sender=UserFolders)
+def folder_post_delete_handler(sender, instance, **kwargs):
+    """删除文件夹后，其子文件夹成为根文件夹，更新子孙文件夹的路径"""
+    if not instance.path:
+        return
+    UserFolders.objects.filter(path__startswith=instance.path).update(
+        path=Concat(Value("/"), Substr("path", len(instance.path) + 1))
+    )
@@ -0,0 +1,204 @@
+import logging
+import smtplib
+import time
+from collections import defaultdict
+from datetime import date
+from typing import Dict, List
+
+from celery import shared_task
+from django.conf import settings
+from django.core.mail import get_connection
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from note.models import Note
+from user import feed
+from user.models import User, UserCollections, UserRelations
+
+logger = logging.getLogger("django")
+
+# 腾讯云单次SendSms请求最多支持的手机号数量
+SMS_MAX_PHONE_NUMBERS = 200
+
+
+def get_due_counts(day: date) -> Dict[int, List[int]]:
+    """按用户分组统计待复习数量：{用户id: [笔记数, 收藏数]}"""
+    counts: Dict[int, List[int]] = defaultdict(lambda: [0, 0])
+    notes = (
+        Note.objects.filter(is_delete=False, review_date__lte=day, author__isnull=False)
+        .values("author")
+        .annotate(number=Count("id"))
+        .order_by()
+    )
+    for row in notes:
+        counts[row["author"]][0] = row["number"]
+    collections = (
+        UserCollections.objects.filter(note__is_delete=False, review_date__lte=day)
+        .values("user")
+        .annotate(number=Count("id"))
+        .order_by()
+    )
+    for row in collections:
+        counts[row["user"]][1] = row["number"]
+    return counts
+
+
+def chunked(items: list, size: int):
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+def send_reminder_emails(digests: list, conf: dict) -> int:
+    """使用同一个SMTP连接分批发送提醒邮件，每批之间暂停BATCH_INTERVAL秒"""
+    sent = 0
+    connection = get_connection()
+    connection.open()
+    try:
+        for i, chunk in enumerate(chunked(digests, conf["BATCH_SIZE"])):
+            if i:
+                time.sleep(conf["BATCH_INTERVAL"])
+            for user, notes, collections in chunk:
+                try:
+                    user.email_user(
+                        conf["EMAIL_SUBJECT"],
+                        conf["EMAIL_TEMPLATE"].format(
+                            username=user.username,
+                            notes=notes,
+                            collections=collections,
+                            total=notes + collections,
+                        ),
+                        from_email=settings.EMAIL_HOST_USER,
+                        connection=connection,
+                    )
+                except (smtplib.SMTPException, OSError) as e:
+                    logger.warning("复习提醒邮件发送失败：%s, %s", user.email, e)
+                else:
+                    sent += 1
+    finally:
+        connection.close()
+    return sent
+
+
+def send_reminder_sms(digests: list, conf: dict) -> int:
+    """模板参数相同（待复习总数相同）的手机号合并到同一个请求中批量发送"""
+    groups = defaultdict(list)
+    for user, notes, collections in digests:
+        groups[notes + collections].append(user.phone)
+    # 腾讯云SDK只在发送短信时需要，避免导入本模块的Web进程依赖它
+    from utils.tencent_sms import SMS
+
+    sms = SMS("review_reminder")
+    sent = 0
+    size = min(conf["BATCH_SIZE"], SMS_MAX_PHONE_NUMBERS)
+    requests = [
+        (phones, total)
+        for total, group in groups.items()
+        for phones in chunked(group, size)
+    ]
+    for i, (phones, total) in enumerate(requests):
+        if i:
+            time.sleep(conf["BATCH_INTERVAL"])
+        res = sms.send_sms(to_list=phones, param_list=[str(total)])
+        sent += len(res["successes"])
+        if res["message"] or res["failures"]:
+            logger.warning(
+                "复习提醒短信发送失败：request_id=%s, message=%s, failures=%s",
+                res["request_id"],
+                res["message"],
+                res["failures"],
+            )
+    return sent
+
+
+@shared_task
+def send_review_reminders(day=None):
+    """每日复习提醒：有邮箱的用户发送邮件，否则发送短信"""
+    conf = settings.REVIEW_REMINDER
+    day = date.fromisoformat(day) if day else date.today()
+    counts = get_due_counts(day)
+    emails, phones = [], []
+    users = User.objects.filter(pk__in=list(counts), is_active=True).only(
+        "id", "username", "email", "phone"
+    )
+    for user in users.iterator():
+        notes, collections = counts[user.pk]
+        if user.email:
+            emails.append((user, notes, collections))
+        elif user.phone:
+            phones.append((user, notes, collections))
+    sent_emails = send_reminder_emails(emails, conf) if emails else 0
+    sent_sms = send_reminder_sms(phones, conf) if phones else 0
+    logger.info(
+        "复习提醒：%s 个用户待复习，邮件 %s/%s，短信 %s/%s",
+        len(counts),
+        sent_emails,
+        len(emails),
+        sent_sms,
+        len(phones),
+    )
+    return {"users": len(counts), "emails": sent_emails, "sms": sent_sms}
+
+
+def relation_count(field: str):
+    """UserRelations中field为当前用户的数量（子查询）"""
+    return Coalesce(
+        Subquery(
+            UserRelations.objects.filter(**{field: OuterRef("pk")})
+            .order_by()
+            .values(field)
+            .annotate(number=Count("pk"))
+            .values("number")
+        ),
+        0,
+    )
+
+
+@shared_task
+def reconcile_follow_counts(batch_size=1000):
+    """校正关注数和粉丝数
+    先找出计数与实际关系数不一致的用户，再用子查询直接在UPDATE中重新计数，
+    避免读出计数到写回之间发生的关注/取消关注被覆盖。
+    """
+    rows = list(
+        User.objects.annotate(
+            real_following=relation_count("follower"),
+            real_followers=relation_count("following"),
+        )
+        .exclude(
+            following_count=F("real_following"), followers_count=F("real_followers")
+        )
+        .values_list("pk", "followers_count", "real_followers")
+    )
+    ids = [pk for pk, _, _ in rows]
+    for chunk in chunked(ids, batch_size):
+        User.objects.filter(pk__in=chunk).update(
+            following_count=relation_count("follower"),
+            followers_count=relation_count("following"),
+        )
+    if ids:
+        logger.info("关注数校正：%s 个用户计数不一致", len(ids))
+    # 校正后降到阈值以下的用户由拉模式变为推模式
+    threshold = feed.get_conf()["CELEBRITY_FOLLOWERS"]
+    for pk, stored, real in rows:
+        if stored >= threshold > real:
+            feed.backfill_followers(pk)
+    return len(ids)
+
+
+@shared_task
+def fanout_note(note_id):
+    """把新发布的笔记推送到粉丝的时间线"""
+    note = Note.objects.select_related("author").filter(pk=note_id).first()
+    return feed.fanout_note(note) if note else 0
+
+
+@shared_task
+def backfill_feed(user_id, author_id):
+    """关注后把被关注用户最近的笔记补充到时间线"""
+    feed.backfill(user_id, author_id)
+
+
+@shared_task
+def backfill_followers_feed(author_id):
+    """粉丝数降到阈值以下后，把该用户最近的笔记补充到粉丝的时间线"""
+    return feed.backfill_followers(author_id)
@@ -10,6 +10,7 @@ from yus_note.drf.serializers import (
     DynamicFieldsModelSerializer,
     NestedCurrentModelSerializer,
     DateToNowDaysFields,
+    ValuesSerializer,
 )
 from user.models import (
     User,
@@ -17,8 +18,10 @@ from user.models import (
     UserCollections,
     UserFolders,
     UserFavorites,
+    UserActivity,
 )
 from user.validators import PhoneValidator
+from note.models import Note
 from note.serializers import UserNoteListSerializer, NoteDetailSerializer
 
 
@@ -34,6 +37,18 @@ class AvatorField(serializers.ImageField):
         return super().to_representation(value=value)
 
 
+def avator_url_builder(request):
+    """返回 头像文件名 -> 地址 的函数，输出与AvatorField一致"""
+    storage = User._meta.get_field("avator").storage  # type: ignore
+    absolute = request.build_absolute_uri if request is not None else str
+    default_url = absolute(str(getattr(settings, "DEFAULT_AVATOR", None)))
+
+    def build(name):
+        return absolute(storage.url(name)) if name else default_url
+
+    return build
+
+
 class AuthCodeSerializer(serializers.Serializer):
     """验证码序列化"""
 
@@ -95,9 +110,11 @@ class UserDetailSerializer(DynamicFieldsModelSerializer):
     """用户序列化：详情"""
 
     # profession_tags = UserPTagsListSerializer(many=True)
-    following_number = serializers.IntegerField()
-    followers_number = serializers.IntegerField()
+    following_number = serializers.IntegerField(source="following_count")
+    followers_number = serializers.IntegerField(source="followers_count")
     avator = AvatorField()
+    review_history = serializers.SerializerMethodField()
+    publish_history = serializers.SerializerMethodField()
 
     class Meta:
         model = User
@@ -116,6 +133,38 @@ class UserDetailSerializer(DynamicFieldsModelSerializer):
             "followers_number",
         )
 
+    def get_histories(self, obj: User) -> dict:
+        # 复习记录和发布记录一次查询取出
+        if not hasattr(self, "_histories"):
+            self._histories = {}
+        if obj.pk not in self._histories:
+            self._histories[obj.pk] = UserActivity.objects.month_histories(obj)
+        return self._histories[obj.pk]
+
+    def get_review_history(self, obj: User) -> dict:
+        return self.get_histories(obj)[UserActivity.REVIEW]
+
+    def get_publish_history(self, obj: User) -> dict:
+        return self.get_histories(obj)[UserActivity.PUBLISH]
+
+
+class FeedNoteSerializer(serializers.ModelSerializer):
+    """关注动态：笔记"""
+
+    author = UserListSerializer()
+
+    class Meta:
+        model = Note
+        fields = (
+            "id",
+            "title",
+            "author",
+            "create_time",
+            "views",
+            "likes",
+            "comment_count",
+        )
+
 
 class UserUpdateSerializer(serializers.ModelSerializer):
     """用户序列化：更新"""
@@ -215,6 +264,43 @@ class UserFollowersListSerializer(serializers.ModelSerializer):
         fields = ("id", "follower")
 
 
+class UserRelationsListValuesSerializer(ValuesSerializer):
+    """用户关注/粉丝：列表的快速版本，user_field为嵌套输出UserListSerializer的字段"""
+
+    user_field = ""
+
+    def __init__(self, context=None):
+        super().__init__(context)
+        prefix = self.user_field + "__"
+        self.values_fields = ("id",) + tuple(
+            prefix + f for f in ("id", "username", "nickname", "avator")
+        )
+        self.avator_url = avator_url_builder(self.context.get("request"))
+
+    def to_representation(self, row: dict) -> dict:
+        prefix = self.user_field + "__"
+        return {
+            "id": row["id"],
+            self.user_field: {
+                "id": row[prefix + "id"],
+                "name": row[prefix + "nickname"] or row[prefix + "username"],
+                "avator": self.avator_url(row[prefix + "avator"]),
+            },
+        }
+
+
+class UserFollowingListValuesSerializer(UserRelationsListValuesSerializer):
+    """用户关注：列表，UserFollowingListSerializer的快速版本"""
+
+    user_field = "following"
+
+
+class UserFollowersListValuesSerializer(UserRelationsListValuesSerializer):
+    """用户粉丝：列表，UserFollowersListSerializer的快速版本"""
+
+    user_field = "follower"
+
+
 class UserCollectionsListSerializer(serializers.ModelSerializer):
     """用户收藏项序列化：列表"""
 
@@ -264,6 +350,16 @@ class UserCollectionsPunchSerializer(serializers.ModelSerializer):
         fields = ["id", "last_review_date", "last_review_feedback"]
 
 
+class ReviewPunchItemSerializer(serializers.Serializer):
+    """批量复习打卡：单个条目"""
+
+    id = serializers.IntegerField()
+    feedback = serializers.IntegerField(
+        required=False, allow_null=True, min_value=0, max_value=3
+    )
+    reset = serializers.BooleanField(default=False)
+
+
 class UserCollectionsDetailSerializer(serializers.ModelSerializer):
     """用户收藏项：详情"""
 
@@ -296,6 +392,12 @@ class UserFoldersSerializer(serializers.ModelSerializer):
         req = self.context["request"]
         if value and not value.user == req.user:
             raise serializers.ValidationError("不能移动到非本人文件夹。")
+        if value and self.instance and value.is_descendant_of(self.instance):
+            raise serializers.ValidationError("不能移动到自身或子文件夹中。")
+        # 路径长度有限，移动时包括所有子孙文件夹
+        folder = self.instance or UserFolders()
+        if value and folder.longest_path_under(value.path) > folder.path_max_length():
+            raise serializers.ValidationError("文件夹层级过深。")
         return value
 
     def validate(self, data):
@@ -1,3 +1,513 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from note.models import Category, Note, NoteComments, NoteTags, Tag
+from note.tasks import reconcile_comment_counts
+from note.tests import LOCMEM_CACHES, create_notes
+from user import feed
+from user.models import (
+    User,
+    UserActivity,
+    UserCollections,
+    UserFolders,
+    UserRelations,
+)
+from user.tasks import reconcile_follow_counts
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ValuesListSerializerTests(TestCase):
+    """快速序列化（ValuesSerializer）与常规序列化的响应必须完全一致"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="user", email="user@test.com")
+        cls.other = User.objects.create(
+            username="other", email="other@test.com", avator="user/avators/a.png"
+        )
+        UserRelations.objects.create(follower=cls.user, following=cls.other)
+        UserRelations.objects.create(follower=cls.other, following=cls.user)
+        notes = create_notes(cls.user, 3) + create_notes(cls.user, 1, is_private=True)
+        category = Category.objects.get_or_create(name="其他")[0]
+        tags = Tag.objects.bulk_create([Tag(name=f"tag{i}") for i in range(3)])
+        # 按与标签id相反的顺序添加，两种序列化都应按标签id排序
+        NoteTags.objects.bulk_create(
+            [
+                NoteTags(note=note, tag=tag, category=category)
+                for note in notes
+                for tag in reversed(tags[: note.views + 1])
+            ]
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assertSameResponse(self, url):
+        with override_settings(VALUES_LIST_SERIALIZERS=True):
+            fast = self.client.get(url)
+        with override_settings(VALUES_LIST_SERIALIZERS=False):
+            slow = self.client.get(url)
+        self.assertEqual(fast.status_code, 200)
+        self.assertEqual(fast.content, slow.content)
+        return fast
+
+    def test_user_note_list(self):
+        res = self.assertSameResponse("/user/notes/")
+        self.assertEqual(len(res.data), 4)
+        tags = {row["id"]: [tag["id"] for tag in row["tags"]] for row in res.data}
+        self.assertTrue(all(ids == sorted(ids) for ids in tags.values()))
+        self.assertEqual(sorted(len(ids) for ids in tags.values()), [1, 1, 2, 3])
+        self.assertSameResponse("/user/notes/?ordering=views")
+
+    def test_target_user_note_list(self):
+        self.client.force_authenticate(self.other)
+        self.assertSameResponse(f"/user/{self.user.pk}/notes/")
+        self.assertSameResponse(f"/user/{self.user.pk}/notes/?ordering=-views")
+
+    def test_relation_lists(self):
+        # 一个使用默认头像，一个使用上传的头像
+        res = self.assertSameResponse("/user/following/")
+        self.assertEqual(res.data[0]["following"]["id"], self.other.pk)
+        self.client.force_authenticate(self.other)
+        res = self.assertSameResponse("/user/followers/")
+        self.assertEqual(res.data[0]["follower"]["id"], self.user.pk)
+
+
+class FakeRedis:
+    """时间线用到的有序集合命令（测试不依赖Redis）"""
+
+    def __init__(self):
+        self.data = {}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def exists(self, key):
+        return int(key in self.data)
+
+    def zadd(self, key, mapping):
+        self.data.setdefault(key, {}).update(mapping)
+
+    def zremrangebyrank(self, key, start, end):
+        members = sorted(self.data.get(key, {}), key=self.data.get(key, {}).get)
+        for member in members[start : end + 1 or None]:
+            del self.data[key][member]
+
+    def zrevrangebyscore(self, key, max, min, start=0, num=None):
+        assert min == "-inf"
+        if max == "+inf":
+            match = lambda score: True  # noqa: E731
+        else:
+            match = lambda score: score < int(max.lstrip("("))  # noqa: E731
+        items = sorted(self.data.get(key, {}).items(), key=lambda i: -i[1])
+        members = [str(member).encode() for member, score in items if match(score)]
+        return members[start : start + num if num else None]
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.commands.append((name, args, kwargs))
+
+    def execute(self):
+        commands, self.commands = self.commands, []
+        return [getattr(self.client, name)(*a, **kw) for name, a, kw in commands]
+
+
+FEED = {"MAX_LENGTH": 50, "CELEBRITY_FOLLOWERS": 2}
+
+
+@override_settings(CACHES=LOCMEM_CACHES, FEED=FEED)
+class FeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create(username="reader", email="reader@test.com")
+        cls.fan = User.objects.create(username="fan", email="fan@test.com")
+        cls.author = User.objects.create(
+            username="author", email="author@test.com", followers_count=1
+        )
+        cls.celebrity = User.objects.create(
+            username="celebrity", email="celebrity@test.com", followers_count=2
+        )
+        cls.stranger = User.objects.create(
+            username="stranger", email="stranger@test.com"
+        )
+        UserRelations.objects.bulk_create(
+            [
+                UserRelations(follower=cls.reader, following=cls.author),
+                UserRelations(follower=cls.reader, following=cls.celebrity),
+                UserRelations(follower=cls.fan, following=cls.celebrity),
+            ]
+        )
+        # 两个来源的笔记id交错
+        cls.notes = []
+        for i in range(12):
+            cls.notes += create_notes(cls.celebrity if i % 3 else cls.author, 1)
+        create_notes(cls.author, 1, is_private=True)
+        create_notes(cls.stranger, 1)
+
+    def setUp(self):
+        self.redis = FakeRedis()
+        patcher = mock.patch("user.feed.get_redis", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+
+    def ids(self, notes):
+        return [note.pk for note in notes]
+
+    def expected(self):
+        return sorted(self.ids(self.notes), reverse=True)
+
+    def timeline(self, user):
+        return set(self.redis.data.get(feed.timeline_key(user.pk), {}))
+
+    def test_rebuild_and_pull(self):
+        notes, _ = feed.read(self.reader, limit=100)
+        self.assertEqual(self.ids(notes), self.expected())
+        # 时间线中只有推送的笔记，大V的笔记读取时拉取
+        author_notes = {note.pk for note in self.notes if note.author == self.author}
+        self.assertEqual(self.timeline(self.reader), author_notes)
+
+    def test_cursor(self):
+        pages = []
+        url = "/user/feed/?limit=3"
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, 200)
+            pages.append([note["id"] for note in res.data["results"]])
+            url = res.data["next"]
+        self.assertTrue(all(len(page) <= 3 for page in pages))
+        self.assertEqual(sum(pages, []), self.expected())
+
+    def test_cursor_invalid(self):
+        res = self.client.get("/user/feed/?cursor=x")
+        self.assertEqual(res.status_code, 400)
+
+    def test_push(self):
+        feed.read(self.reader)
+        note = create_notes(self.author, 1)[0]
+        self.assertEqual(feed.fanout_note(note), 1)
+        self.assertIn(note.pk, self.timeline(self.reader))
+        # 大V的笔记和私有笔记不推送
+        self.assertEqual(feed.fanout_note(create_notes(self.celebrity, 1)[0]), 0)
+        private = create_notes(self.author, 1, is_private=True)[0]
+        self.assertEqual(feed.fanout_note(private), 0)
+        notes, _ = feed.read(self.reader, limit=2)
+        self.assertEqual(notes[1].pk, note.pk)
+
+    def test_push_skips_missing_timeline(self):
+        # 不存在的时间线不被推送创建，读取时从数据库完整重建
+        note = create_notes(self.author, 1)[0]
+        feed.fanout_note(note)
+        self.assertEqual(self.timeline(self.reader), set())
+        notes, _ = feed.read(self.reader, limit=100)
+        self.assertEqual(self.ids(notes), [note.pk] + self.expected())
+
+    def test_max_length(self):
+        with override_settings(FEED=dict(FEED, MAX_LENGTH=2)):
+            feed.read(self.reader)
+            note = create_notes(self.author, 1)[0]
+            feed.fanout_note(note)
+        self.assertEqual(len(self.timeline(self.reader)), 2)
+        self.assertIn(note.pk, self.timeline(self.reader))
+
+    @mock.patch("note.signals.fanout_note")
+    def test_fanout_when_made_public(self, fanout_note):
+        private = create_notes(self.author, 1, is_private=True)[0]
+        private = Note.objects.get(pk=private.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            private.title = "still private"
+            private.save()
+        fanout_note.delay.assert_not_called()
+        with self.captureOnCommitCallbacks(execute=True):
+            private.is_private = False
+            private.save()
+        fanout_note.delay.assert_called_once_with(private.pk)
+        # 已经公开的笔记再次保存不重复推送
+        with self.captureOnCommitCallbacks(execute=True):
+            private.save()
+        fanout_note.delay.assert_called_once()
+
+    # 路由从apps.user_proxy.views导入视图
+    @mock.patch("apps.user_proxy.views.backfill_followers_feed")
+    def test_backfill_when_below_threshold(self, backfill_followers_feed):
+        feed.read(self.reader)
+        relation = UserRelations.objects.get(follower=self.fan)
+        self.client.force_authenticate(self.fan)
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.delete(f"/user/following/{relation.pk}/")
+        self.assertEqual(res.status_code, 204)
+        backfill_followers_feed.delay.assert_called_once_with(self.celebrity.pk)
+
+        self.assertEqual(feed.backfill_followers(self.celebrity.pk), 1)
+        self.assertEqual(self.timeline(self.reader), set(self.expected()))
+        notes, _ = feed.read(self.reader, limit=100)
+        self.assertEqual(self.ids(notes), self.expected())
+
+    def test_reconcile_backfills_below_threshold(self):
+        feed.read(self.reader)
+        UserRelations.objects.filter(follower=self.fan).delete()
+        reconcile_follow_counts()
+        self.assertEqual(self.timeline(self.reader), set(self.expected()))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CommentCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="user", email="user@test.com")
+        cls.note = create_notes(cls.user, 1)[0]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def comment(self, to_comment=None):
+        data = {"content": "comment", "note": self.note.pk}
+        if to_comment is not None:
+            data["to_comment"] = to_comment
+        res = self.client.post("/user/comments/", data)
+        self.assertEqual(res.status_code, 201)
+        return res.data["id"]
+
+    def delete(self, pk):
+        self.assertEqual(self.client.delete(f"/user/comments/{pk}/").status_code, 204)
+
+    def counts(self):
+        return Note.objects.get(pk=self.note.pk).comment_count, dict(
+            NoteComments.objects.values_list("pk", "reply_count")
+        )
+
+    def test_delete_with_replies(self):
+        first = self.comment()
+        reply = self.comment(first)
+        nested = self.comment(reply)
+        second = self.comment()
+        self.assertEqual(self.counts(), (4, {first: 1, reply: 1, nested: 0, second: 0}))
+        # 级联删除的回复一并扣除
+        self.delete(first)
+        self.assertEqual(self.counts(), (1, {second: 0}))
+
+    def test_delete_reply(self):
+        first = self.comment()
+        reply = self.comment(first)
+        self.delete(reply)
+        self.assertEqual(self.counts(), (1, {first: 0}))
+
+    def test_delete_clamps_at_zero(self):
+        first = self.comment()
+        self.comment(first)
+        Note.objects.filter(pk=self.note.pk).update(comment_count=1)
+        self.delete(first)
+        self.assertEqual(self.counts(), (0, {}))
+
+    def test_reconcile(self):
+        first = self.comment()
+        reply = self.comment(first)
+        Note.objects.filter(pk=self.note.pk).update(comment_count=10)
+        NoteComments.objects.filter(pk=first).update(reply_count=0)
+        NoteComments.objects.filter(pk=reply).update(reply_count=3)
+        self.assertEqual(reconcile_comment_counts(), {"notes": 1, "comments": 2})
+        self.assertEqual(self.counts(), (2, {first: 1, reply: 0}))
+        self.assertEqual(reconcile_comment_counts(), {"notes": 0, "comments": 0})
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class BatchPunchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="user", email="user@test.com")
+        cls.other = User.objects.create(username="other", email="other@test.com")
+        cls.notes = create_notes(cls.user, 3)
+        cls.other_note = create_notes(cls.other, 1)[0]
+        cls.collection = UserCollections.objects.create(
+            user=cls.user, note=cls.other_note
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def punch(self, url, items):
+        return self.client.post(url, items, format="json")
+
+    def reviews(self):
+        return UserActivity.objects.filter(
+            user=self.user, kind=UserActivity.REVIEW
+        ).values_list("count", flat=True)
+
+    def test_batch_punch(self):
+        first, second, _ = self.notes
+        res = self.punch(
+            "/user/notes/batch_punch/",
+            [{"id": first.pk, "feedback": 2}, {"id": second.pk, "reset": True}],
+        )
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual([row["id"] for row in res.data], [first.pk, second.pk])
+        punched = Note.objects.in_bulk([first.pk, second.pk])
+        for note in punched.values():
+            self.assertEqual(note.last_review_date, date.today())
+            self.assertIsNotNone(note.review_date)
+        self.assertEqual(punched[first.pk].last_review_feedback, 2)
+        self.assertEqual(punched[second.pk].review_stage, 0)
+        self.assertEqual(list(self.reviews()), [2])
+
+        res = self.punch("/user/collections/batch_punch/", [{"id": self.collection.pk}])
+        self.assertEqual(res.status_code, 200)
+        self.collection.refresh_from_db()
+        self.assertEqual(self.collection.last_review_date, date.today())
+        self.assertEqual(list(self.reviews()), [3])
+
+    def test_unknown_id(self):
+        # 不存在或不属于当前用户的条目返回404，其余条目也不写入
+        plan = User.objects.get(pk=self.user.pk).review_plan
+        for missing in [999999, self.other_note.pk]:
+            res = self.punch(
+                "/user/notes/batch_punch/",
+                [{"id": self.notes[0].pk, "feedback": 2}, {"id": missing}],
+            )
+            self.assertEqual(res.status_code, 404)
+        self.assertFalse(Note.objects.filter(last_review_date__isnull=False).exists())
+        self.assertEqual(User.objects.get(pk=self.user.pk).review_plan, plan)
+        self.assertEqual(list(self.reviews()), [])
+
+    def test_invalid(self):
+        for items in [[], [{"feedback": 2}], [{"id": self.notes[0].pk, "feedback": 9}]]:
+            res = self.punch("/user/notes/batch_punch/", items)
+            self.assertEqual(res.status_code, 400)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ReviewDueTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="user", email="user@test.com")
+        other = User.objects.create(username="other", email="other@test.com")
+        today = date.today()
+        cls.expected = []
+        # 同一复习日期下笔记排在收藏前面，各自按id排序
+        for days in [3, 1, 0, 1, 3, 2]:
+            review_date = today - timedelta(days)
+            note = create_notes(cls.user, 1, review_date=review_date)[0]
+            other_note = create_notes(other, 1)[0]
+            collection = UserCollections.objects.create(
+                user=cls.user, note=other_note, review_date=review_date
+            )
+            cls.expected += [
+                (review_date, 0, "note", note.pk),
+                (review_date, 1, "collection", collection.pk),
+            ]
+        cls.expected.sort()
+        # 未到期、已删除或属于其他用户的条目不出现
+        tomorrow = today + timedelta(1)
+        create_notes(cls.user, 1, review_date=tomorrow)
+        create_notes(cls.user, 1, review_date=today, is_delete=True)
+        create_notes(other, 1, review_date=today)
+        deleted = create_notes(other, 1, is_delete=True)[0]
+        UserCollections.objects.create(user=cls.user, note=deleted, review_date=today)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def read_all(self, url):
+        rows = []
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, 200)
+            rows += [(row["type"], row["id"]) for row in res.data["results"]]
+            url = res.data["next"]
+        return rows
+
+    def test_cursor(self):
+        expected = [(kind, pk) for _, _, kind, pk in self.expected]
+        for limit in [1, 2, 5, 100]:
+            self.assertEqual(
+                self.read_all(f"/user/review/due/?limit={limit}"), expected, limit
+            )
+
+    def test_date(self):
+        day = date.today() - timedelta(2)
+        expected = [(kind, pk) for d, _, kind, pk in self.expected if d <= day]
+        self.assertEqual(
+            self.read_all(f"/user/review/due/?limit=3&date={day.isoformat()}"),
+            expected,
+        )
+
+    def test_invalid_cursor(self):
+        res = self.client.get("/user/review/due/?cursor=x")
+        self.assertEqual(res.status_code, 400)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class FolderDepthTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="user", email="user@test.com")
+        # 一条接近路径长度上限的文件夹链
+        cls.deepest = None
+        max_length = UserFolders.path_max_length()
+        while cls.deepest is None or len(cls.deepest.path) < max_length - 8:
+            cls.deepest = UserFolders.objects.create(
+                user=cls.user, name="folder", parent=cls.deepest
+            )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create(self, parent):
+        return self.client.post(
+            "/user/folders/", {"name": "new", "parent": parent and parent.pk}
+        )
+
+    def test_create(self):
+        parent = self.deepest
+        while True:
+            res = self.create(parent)
+            if res.status_code != 201:
+                break
+            parent = UserFolders.objects.get(pk=res.data["id"])
+        self.assertEqual(res.status_code, 400)
+        self.assertIn("parent", res.data)
+        self.assertTrue(
+            all(
+                len(path) <= UserFolders.path_max_length()
+                for path in UserFolders.objects.values_list("path", flat=True)
+            )
+        )
+
+    def test_move_subtree(self):
+        root = UserFolders.objects.create(user=self.user, name="root")
+        child = UserFolders.objects.create(user=self.user, name="child", parent=root)
+        UserFolders.objects.create(user=self.user, name="child", parent=child)
+        # 自身能放下，但子孙文件夹的路径会超出上限
+        self.assertLessEqual(
+            len(self.deepest.path) + len(f"{root.pk}/"), UserFolders.path_max_length()
+        )
+        res = self.client.put(
+            f"/user/folders/{root.pk}/", {"name": "root", "parent": self.deepest.pk}
+        )
+        self.assertEqual(res.status_code, 400)
+        root.refresh_from_db()
+        child.refresh_from_db()
+        self.assertIsNone(root.parent_id)
+        self.assertEqual(child.path, f"/{root.pk}/{child.pk}/")
+
+    def test_model_guard(self):
+        root = UserFolders.objects.create(user=self.user, name="root")
+        child = UserFolders.objects.create(user=self.user, name="child", parent=root)
+        UserFolders.objects.create(user=self.user, name="child", parent=child)
+        root.parent = self.deepest
+        with self.assertRaises(ValueError):
+            root.save()
+        self.assertEqual(UserFolders.objects.get(pk=root.pk).path, f"/{root.pk}/")
@@ -1,8 +1,14 @@
 from typing import cast
-from datetime import date, datetime, timedelta
-import calendar
-
+from datetime import date
+import base64
+import heapq
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+from django.http import HttpResponse, HttpResponseNotModified
 from django.http.request import HttpRequest
+from django.utils.http import parse_etags
 from django.contrib.auth import login, authenticate, logout
 from django.conf import settings
 from rest_framework import status
@@ -18,11 +24,12 @@ from rest_framework.mixins import (
 )
 from rest_framework.request import Request
 from rest_framework.response import Response
-from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.exceptions import AuthenticationFailed, NotFound, ValidationError
 from rest_framework.authentication import BasicAuthentication
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
 from rest_framework.filters import OrderingFilter
+from rest_framework.utils.urls import replace_query_param
 
 from user.models import (
     User,
@@ -30,19 +37,24 @@ from user.models import (
     UserCollections,
     UserFolders,
     UserFavorites,
+    UserActivity,
 )
 from user_proxy.serializers import (
     AuthCodeSerializer,
     UserDetailSerializer,
     UserUpdateSerializer,
     UserFollowingListSerializer,
+    UserFollowingListValuesSerializer,
     UserFollowingSerializer,
     UserFollowersListSerializer,
+    UserFollowersListValuesSerializer,
     UserCollectionsListSerializer,
     UserCollectionsCreateSerializer,
     UserCollectionsDetailSerializer,
     UserCollectionsUpdateSerializer,
     UserCollectionsPunchSerializer,
+    ReviewPunchItemSerializer,
+    FeedNoteSerializer,
     UserFoldersListSerializer,
     UserFoldersSerializer,
     UserFavoritesSerializer,
@@ -50,13 +62,19 @@ from user_proxy.serializers import (
 from note.models import Note, NoteComments
 from note.serializers import (
     UserNoteListSerializer,
+    UserNoteListValuesSerializer,
     UserNoteSerializer,
     UserNotePunchSerializer,
     UserNoteRcycleSerializer,
     UserNoteDetailSerializer,
     UserNoteCommentsSerializer,
 )
+from note.tasks import refresh_related_notes
+from user import feed, folders, profiles
+from user.tasks import backfill_feed, backfill_followers_feed
 from utils.review import adjust_and_get_next
+from yus_note.drf.mixins import ConditionalGetMixin, ValuesListMixin
+from yus_note.drf.renderers import FastJSONRenderer
 
 
 class AuthCodeView(APIView):
@@ -151,6 +169,7 @@ class UserView(APIView):
 
 
 class UserFollowingViewSet(
+    ValuesListMixin,
     ListModelMixin,
     CreateModelMixin,
     UpdateModelMixin,
@@ -160,6 +179,7 @@ class UserFollowingViewSet(
     """用户关注：列表、创建、更新、删除"""
 
     permission_classes = [IsAuthenticated]
+    values_serializer_class = UserFollowingListValuesSerializer
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -173,17 +193,64 @@ class UserFollowingViewSet(
         return base_qs
 
     def perform_create(self, serializer):
-        serializer.save(follower=self.request.user)
-
-    def perform_update(self, serializer):
-        serializer.save(follower=self.request.user)
+        # 关注数和粉丝数与关注关系在同一事务中原子更新
+        user = self.request.user
+        with transaction.atomic():
+            relation = serializer.save(follower=user)
+            User.objects.filter(pk=user.pk).update(
+                following_count=F("following_count") + 1
+            )
+            User.objects.filter(pk=relation.following_id).update(
+                followers_count=F("followers_count") + 1
+            )
+            profiles.bump_version(user.pk)
+            profiles.bump_version(relation.following_id)
+        transaction.on_commit(
+            lambda: backfill_feed.delay(user.pk, relation.following_id)
+        )
 
+    def decrease_followers(self, user_id):
+        """粉丝数减一；刚降到阈值以下时，提交后把其笔记补充到粉丝的时间线"""
+        User.objects.filter(pk=user_id, followers_count__gt=0).update(
+            followers_count=F("followers_count") - 1
+        )
+        if feed.dropped_below_threshold(user_id):
+            transaction.on_commit(lambda: backfill_followers_feed.delay(user_id))
 
-class UserFollowersViewSet(ListModelMixin, GenericViewSet):
+    def perform_update(self, serializer):
+        old_following_id = serializer.instance.following_id
+        with transaction.atomic():
+            relation = serializer.save(follower=self.request.user)
+            if relation.following_id != old_following_id:
+                self.decrease_followers(old_following_id)
+                User.objects.filter(pk=relation.following_id).update(
+                    followers_count=F("followers_count") + 1
+                )
+                profiles.bump_version(old_following_id)
+                profiles.bump_version(relation.following_id)
+                transaction.on_commit(
+                    lambda: backfill_feed.delay(
+                        relation.follower_id, relation.following_id
+                    )
+                )
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+            User.objects.filter(pk=instance.follower_id, following_count__gt=0).update(
+                following_count=F("following_count") - 1
+            )
+            self.decrease_followers(instance.following_id)
+            profiles.bump_version(instance.follower_id)
+            profiles.bump_version(instance.following_id)
+
+
+class UserFollowersViewSet(ValuesListMixin, ListModelMixin, GenericViewSet):
     """用户粉丝：列表"""
 
     permission_classes = [IsAuthenticated]
     serializer_class = UserFollowersListSerializer
+    values_serializer_class = UserFollowersListValuesSerializer
 
     def get_queryset(self):
         return UserRelations.objects.filter(following=self.request.user).select_related(
@@ -191,34 +258,67 @@ class UserFollowersViewSet(ListModelMixin, GenericViewSet):
         )
 
 
-def update_history(history: dict):
-    """更新历史记录当天+1，删除过期记录"""
-    # 如果本月未创建则创建当月记录，并初始化
-    now = datetime.now()
-    month_str = now.strftime("%Y-%m")
-    month_days = calendar.monthrange(now.year, now.month)[1]
-    if month_str not in history:
-        month_record_list = ["0"] * month_days
-        month_record_list[now.day - 1] = "1"
-        history[month_str] = ",".join(month_record_list)
-    # 如果本月有记录则修改
-    else:
-        month_record_list = history[month_str].split(",")
-        month_record_list[now.day - 1] = str(int(month_record_list[now.day - 1]) + 1)
-        history[month_str] = ",".join(month_record_list)
-    # 删除过期历史
-    history_expires = getattr(settings, "HISTORY_EXPIRES", None) or 90
-    expires_dt = now - timedelta(history_expires)
-    for k in history:
-        if datetime.strptime(k, "%Y-%m") < expires_dt:
-            del history[k]
-    return history
-
-
-class UserCollectionsViewSet(ModelViewSet):
+REVIEW_UPDATE_FIELDS = [
+    "review_stage",
+    "review_date",
+    "last_review_date",
+    "last_review_feedback",
+]
+
+
+def apply_punch(obj, plan, feedback, reset):
+    """根据反馈修改笔记/收藏的复习数据（不保存），返回调整后的复习计划"""
+    new_plan, new_stage, next_review_date = adjust_and_get_next(
+        plan, feedback, obj.last_review_feedback, obj.review_stage
+    )
+    obj.review_stage = new_stage if not reset else 0
+    obj.review_date = next_review_date
+    obj.last_review_date = date.today()
+    obj.last_review_feedback = feedback
+    return new_plan
+
+
+class BatchPunchMixin:
+    """批量复习打卡
+    请求数据为条目列表：[{"id": 1, "feedback": 2, "reset": false}, ...]，
+    按顺序依次调整复习计划，条目使用bulk_update写入，用户的复习计划和复习记录只保存一次。
+    """
+
+    punch_serializer_class = None
+
+    @action(methods=["POST"], detail=False)
+    def batch_punch(self, request):
+        max_length = getattr(settings, "REVIEW_BATCH_PUNCH_MAX", None) or 200
+        serializer = ReviewPunchItemSerializer(
+            data=request.data, many=True, allow_empty=False, max_length=max_length
+        )
+        serializer.is_valid(raise_exception=True)
+        items = serializer.validated_data
+        user = request.user
+        queryset = self.get_queryset()
+        with transaction.atomic():
+            objs = queryset.in_bulk([item["id"] for item in items])
+            missing = sorted({item["id"] for item in items} - set(objs))
+            if missing:
+                raise NotFound("条目不存在：%s" % ",".join(map(str, missing)))
+            plan = user.review_plan
+            for item in items:
+                plan = apply_punch(
+                    objs[item["id"]], plan, item.get("feedback"), item["reset"]
+                )
+            punched = list(objs.values())
+            queryset.model.objects.bulk_update(punched, REVIEW_UPDATE_FIELDS)
+            user.review_plan = plan
+            user.save(update_fields=["review_plan"])
+            UserActivity.objects.increment(user, UserActivity.REVIEW, len(items))
+        return Response(self.punch_serializer_class(punched, many=True).data)
+
+
+class UserCollectionsViewSet(BatchPunchMixin, ModelViewSet):
     """个人收藏：列表、创建、详情、更新、删除"""
 
     permission_classes = [IsAuthenticated]
+    punch_serializer_class = UserCollectionsPunchSerializer
     filter_backends = [OrderingFilter]
     ordering_fields = ["create_time", "last_review_date"]
     ordering = ["-create_time"]
@@ -239,11 +339,16 @@ class UserCollectionsViewSet(ModelViewSet):
         return base_qs
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
-        note_id = serializer.data["note"]
-        note = Note.objects.get(pk=note_id)
-        note.likes += 1
-        note.save()
+        # 收藏数使用F表达式原子更新，避免并发收藏时丢失计数
+        with transaction.atomic():
+            collection = serializer.save(user=self.request.user)
+            Note.objects.filter(pk=collection.note_id).update(likes=F("likes") + 1)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            note_id = instance.note_id
+            instance.delete()
+            Note.objects.filter(pk=note_id, likes__gt=0).update(likes=F("likes") - 1)
 
     def perform_update(self, serializer):
         serializer.save(user=self.request.user)
@@ -258,17 +363,10 @@ class UserCollectionsViewSet(ModelViewSet):
         # 调整复习计划、修改历史记录 和 修改笔记复习相关数据
         feed_back = request.data.get("feedback", None)  # type: ignore
         reset = request.data.get("reset", None)  # type: ignore
-        new_plan, new_stage, next_review_date = adjust_and_get_next(
-            user.review_plan, feed_back, collection.last_review_feedback, collection.review_stage  # type: ignore
-        )
-        user.review_plan = new_plan  # type: ignore
-        update_history(user.review_history)
-        user.save()
-        collection.review_stage = new_stage if not reset else 0
-        collection.review_date = next_review_date
-        collection.last_review_date = date.today()
-        collection.last_review_feedback = feed_back
-        collection.save()
+        user.review_plan = apply_punch(collection, user.review_plan, feed_back, reset)  # type: ignore
+        user.save(update_fields=["review_plan"])
+        UserActivity.objects.increment(user, UserActivity.REVIEW)
+        collection.save(update_fields=REVIEW_UPDATE_FIELDS)
         return Response(UserCollectionsPunchSerializer(collection).data)
 
 
@@ -284,16 +382,33 @@ class UserFoldersViewSet(
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        base_qs = UserFolders.objects.filter(user=self.request.user)
-        if self.action == "list":
-            return base_qs.filter(parent=None)
-        return base_qs
+        return UserFolders.objects.filter(user=self.request.user)
+
+    def list(self, request, *args, **kwargs):
+        return Response(folders.get_tree(request.user.pk))
 
     def get_serializer_class(self):
         if self.action == "list":
             return UserFoldersListSerializer
+        if self.action == "notes":
+            return UserNoteListSerializer
         return UserFoldersSerializer
 
+    @action(detail=True)
+    def notes(self, request, pk=None):
+        """文件夹及其所有子文件夹中的笔记"""
+        folder = self.get_object()
+        notes = (
+            Note.objects.filter(
+                author=request.user,
+                is_delete=False,
+                folder__path__startswith=folder.path,
+            )
+            .prefetch_related("tags")
+            .order_by("-create_time")
+        )
+        return Response(self.get_serializer(notes, many=True).data)
+
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
@@ -321,10 +436,18 @@ class UserFavoritesViewSet(
         serializer.save(user=self.request.user)
 
 
-class UserNotesViewSet(ModelViewSet):
-    """个人笔记：列表、创建、详情、更新、删除"""
+class UserNotesViewSet(
+    ConditionalGetMixin, ValuesListMixin, BatchPunchMixin, ModelViewSet
+):
+    """个人笔记：列表、创建、详情、更新、删除
+    列表和详情支持条件GET
+    """
 
     permission_classes = [IsAuthenticated]
+    punch_serializer_class = UserNotePunchSerializer
+    values_serializer_class = UserNoteListValuesSerializer
+    etag_fields = ("likes", "views", "folder__name", "author__nickname")
+    list_etag_fields = ("views", "likes")
     filter_backends = [OrderingFilter]
     ordering_fields = [
         "create_time",
@@ -349,12 +472,14 @@ class UserNotesViewSet(ModelViewSet):
     def perform_create(self, serializer):
         # 创建笔记时更新发布记录
         user = self.request.user
-        update_history(user.publish_history)  # type: ignore
-        user.save()
-        serializer.save(author=user)
+        note = serializer.save(author=user)
+        UserActivity.objects.increment(user, UserActivity.PUBLISH)
+        # 提交后再异步计算相关笔记，此时搜索索引已经更新
+        transaction.on_commit(lambda: refresh_related_notes.delay(note.pk))
 
     def perform_update(self, serializer):
-        serializer.save(author=self.request.user)
+        note = serializer.save(author=self.request.user)
+        transaction.on_commit(lambda: refresh_related_notes.delay(note.pk))
 
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -380,17 +505,10 @@ class UserNotesViewSet(ModelViewSet):
         # 调整复习计划、修改复习记录 和 修改笔记复习相关数据
         feed_back = request.data.get("feedback", None)  # type: ignore
         reset = request.data.get("reset", False)  # type: ignore
-        new_plan, new_stage, next_review_date = adjust_and_get_next(
-            user.review_plan, feed_back, note.last_review_feedback, note.review_stage  # type: ignore
-        )
-        user.review_plan = new_plan  # type: ignore
-        user.review_history = update_history(user.review_history)
-        user.save()
-        note.review_stage = new_stage if not reset else 0
-        note.review_date = next_review_date
-        note.last_review_date = date.today()
-        note.last_review_feedback = feed_back
-        note.save()
+        user.review_plan = apply_punch(note, user.review_plan, feed_back, reset)  # type: ignore
+        user.save(update_fields=["review_plan"])
+        UserActivity.objects.increment(user, UserActivity.REVIEW)
+        note.save(update_fields=REVIEW_UPDATE_FIELDS)
         return Response(UserNotePunchSerializer(note).data)
 
     @action(methods=["GET"], detail=False)
@@ -412,6 +530,137 @@ class UserNotesViewSet(ModelViewSet):
         return Response(serializer.data)
 
 
+class UserReviewDueView(APIView):
+    """待复习队列：个人笔记和收藏中复习日期不晚于今天的条目
+    两类条目各自按(复习日期, id)走(作者/用户, 复习日期)索引取一页，归并成一个有序流，
+    按(复习日期, 种类, id)游标分页，每次请求的开销只与页大小有关。
+
+    请求参数：
+        date: 截止日期，默认今天
+        limit: 每页条数，默认20，最多100
+        cursor: 上一页返回的next中的游标
+    """
+
+    permission_classes = [IsAuthenticated]
+    default_limit = 20
+    max_limit = 100
+    kinds = ("note", "collection")
+
+    def encode_cursor(self, key) -> str:
+        review_date, rank, pk = key
+        raw = f"{review_date.isoformat()},{rank},{pk}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def decode_cursor(self, cursor: str):
+        try:
+            review_date, rank, pk = (
+                base64.urlsafe_b64decode(cursor.encode()).decode().split(",")
+            )
+            return date.fromisoformat(review_date), int(rank), int(pk)
+        except (ValueError, TypeError):
+            raise ValidationError({"cursor": ["无效的游标。"]})
+
+    def after(self, cursor, rank: int) -> Q:
+        """第rank种条目中位于游标之后的条件"""
+        if cursor is None:
+            return Q()
+        review_date, cursor_rank, pk = cursor
+        if rank > cursor_rank:
+            return Q(review_date__gte=review_date)
+        if rank == cursor_rank:
+            return Q(review_date__gt=review_date) | Q(review_date=review_date, id__gt=pk)
+        return Q(review_date__gt=review_date)
+
+    def get_querysets(self, day: date):
+        user = self.request.user
+        notes = Note.objects.filter(
+            author=user, is_delete=False, review_date__lte=day
+        ).values("id", "title", "review_date", "review_stage")
+        collections = UserCollections.objects.filter(
+            user=user, note__is_delete=False, review_date__lte=day
+        ).values("id", "note_id", "note__title", "review_date", "review_stage")
+        return notes, collections
+
+    def get(self, request: Request) -> Response:
+        try:
+            day = date.fromisoformat(request.query_params.get("date", ""))
+        except ValueError:
+            day = date.today()
+        try:
+            limit = int(request.query_params.get("limit", self.default_limit))
+        except ValueError:
+            limit = self.default_limit
+        limit = min(max(limit, 1), self.max_limit)
+        cursor = request.query_params.get("cursor")
+        cursor = self.decode_cursor(cursor) if cursor else None
+
+        streams = []
+        for rank, qs in enumerate(self.get_querysets(day)):
+            rows = qs.filter(self.after(cursor, rank)).order_by("review_date", "id")
+            streams.append(
+                [((row["review_date"], rank, row["id"]), row) for row in rows[: limit + 1]]
+            )
+        page = []
+        for key, row in heapq.merge(*streams, key=lambda x: x[0]):
+            page.append((key, row))
+            if len(page) > limit:
+                break
+
+        next_url = None
+        if len(page) > limit:
+            page = page[:limit]
+            next_url = replace_query_param(
+                request.build_absolute_uri(), "cursor", self.encode_cursor(page[-1][0])
+            )
+        results = []
+        for (_, rank, _), row in page:
+            kind = self.kinds[rank]
+            results.append(
+                {
+                    "type": kind,
+                    "id": row["id"],
+                    "note": row["id"] if kind == "note" else row["note_id"],
+                    "title": row["title"] if kind == "note" else row["note__title"],
+                    "review_date": row["review_date"],
+                    "review_stage": row["review_stage"],
+                }
+            )
+        return Response({"next": next_url, "results": results})
+
+
+class UserFeedView(APIView):
+    """关注动态：关注用户发布的公开笔记，按发布时间倒序
+    请求参数：
+        limit: 每页条数，默认20，最多100
+        cursor: 上一页返回的next中的游标
+    """
+
+    permission_classes = [IsAuthenticated]
+    default_limit = 20
+    max_limit = 100
+
+    def get(self, request: Request) -> Response:
+        try:
+            limit = int(request.query_params.get("limit", self.default_limit))
+        except ValueError:
+            limit = self.default_limit
+        limit = min(max(limit, 1), self.max_limit)
+        cursor = request.query_params.get("cursor")
+        try:
+            before = int(cursor) if cursor else None
+        except ValueError:
+            raise ValidationError({"cursor": ["无效的游标。"]})
+        notes, next_before = feed.read(request.user, before, limit)
+        next_url = None
+        if next_before is not None:
+            next_url = replace_query_param(
+                request.build_absolute_uri(), "cursor", next_before
+            )
+        return Response(
+            {"next": next_url, "results": FeedNoteSerializer(notes, many=True).data}
+        )
+
+
 class UserCommentsViewSet(CreateModelMixin, DestroyModelMixin, GenericViewSet):
     """用户评论：创建、删除"""
 
@@ -422,7 +671,32 @@ class UserCommentsViewSet(CreateModelMixin, DestroyModelMixin, GenericViewSet):
         return NoteComments.objects.filter(author=self.request.user)
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        to_comment = serializer.validated_data.get("to_comment")
+        root_id = to_comment and (to_comment.root_id or to_comment.pk)
+        with transaction.atomic():
+            comment = serializer.save(author=self.request.user, root_id=root_id)
+            Note.objects.filter(pk=comment.note_id).update(
+                comment_count=F("comment_count") + 1
+            )
+            if to_comment:
+                NoteComments.objects.filter(pk=to_comment.pk).update(
+                    reply_count=F("reply_count") + 1
+                )
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            # 删除评论会级联删除其下的所有回复，按实际删除的数量减少评论数
+            _, deleted = instance.delete()
+            number = deleted.get(NoteComments._meta.label, 0)
+            # 计数偏小时减到0为止（由reconcile_comment_counts校正）；
+            # 先取GREATEST再相减，避免MySQL无符号列相减越界报错
+            Note.objects.filter(pk=instance.note_id).update(
+                comment_count=Greatest(F("comment_count"), number) - number
+            )
+            if instance.to_comment_id:
+                NoteComments.objects.filter(pk=instance.to_comment_id).update(
+                    reply_count=Greatest(F("reply_count"), 1) - 1
+                )
 
 
 # endregion
@@ -430,27 +704,46 @@ class UserCommentsViewSet(CreateModelMixin, DestroyModelMixin, GenericViewSet):
 class TargetUserView(APIView):
     """
     其他用户详情
+    序列化后的JSON字节按用户缓存（见user.profiles），支持If-None-Match返回304
     """
 
-    def get(self, request: Request, target_user):
-        target_user = get_object_or_404(User.objects.all(), id=target_user)
+    fields = (
+        "id",
+        "username",
+        "nickname",
+        "email",
+        "avator",
+        "last_publish_datetime",
+        "review_history",
+        "publish_history",
+        "following_number",
+        "followers_number",
+    )
+
+    def render_profile(self, request: Request, target_user: int):
+        user = User.objects.filter(id=target_user).first()
+        if user is None:
+            return None
         serializer = UserDetailSerializer(
-            instance=target_user,
-            context={"request": request},
-            fields=(
-                "id",
-                "username",
-                "nickname",
-                "email",
-                "avator",
-                "last_publish_datetime",
-                "review_history",
-                "publish_history",
-                "following_number",
-                "followers_number",
-            ),
+            instance=user, context={"request": request}, fields=self.fields
         )
-        return Response(serializer.data)
+        return FastJSONRenderer().render(serializer.data)
+
+    def get(self, request: Request, target_user):
+        cached = profiles.get_or_render(
+            target_user,
+            request.build_absolute_uri("/"),
+            lambda: self.render_profile(request, target_user),
+        )
+        if cached is None:
+            raise NotFound()
+        content, etag = cached
+        if etag in parse_etags(request.headers.get("If-None-Match", "")):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(content, content_type="application/json")
+        response["ETag"] = etag
+        return response
 
 
 class TargetUserFoldersViewSet(ListModelMixin, GenericViewSet):
@@ -458,10 +751,10 @@ class TargetUserFoldersViewSet(ListModelMixin, GenericViewSet):
 
     serializer_class = UserFoldersListSerializer
 
-    def get_queryset(self):
-        return UserFolders.objects.filter(
-            user=self.kwargs.get("target_user", None), parent=None
-        ).prefetch_related("children__children")
+    def list(self, request, *args, **kwargs):
+        return Response(
+            folders.get_tree(self.kwargs.get("target_user", None), public_only=True)
+        )
 
 
 class TargetUserFavoritesViewSet(ListModelMixin, GenericViewSet):
@@ -487,9 +780,10 @@ class TatgetUserCollectionsViewSet(ListModelMixin, GenericViewSet):
         ).select_related("note")
 
 
-class TargetUserNotesViewSet(ListModelMixin, GenericViewSet):
+class TargetUserNotesViewSet(ValuesListMixin, ListModelMixin, GenericViewSet):
     """用户笔记：列表"""
 
+    values_serializer_class = UserNoteListValuesSerializer
     filter_backends = [OrderingFilter]
     ordering_fields = ["create_time", "update_time", "views", "likes"]
     ordering = ["-create_time"]
@@ -1,6 +1,7 @@
 """复习相关工具数式"""
 
 from datetime import date, timedelta
+from typing import List, Sequence, Tuple, Union
 
 all = ['adjust_plan', 'get_next_review_date']
 
@@ -16,42 +17,53 @@ FEEDBAKC_AMEND_FACTOR = 1
 MAX_INTERVAL = 60
 MIN_INTERVAL = 1
 
-def adjust_and_get_next(plan:str,feedback,last_feedback, stage):
+
+def parse_plan(plan: Union[str, Sequence[float]]) -> List[float]:
+    """复习计划转换为间隔天数列表，兼容旧的','分隔字符串格式（如：'1,3,7,14,30'）"""
+    if isinstance(plan, str):
+        return [float(x) for x in plan.split(',') if x]
+    return [float(x) for x in plan]
+
+
+def adjust_and_get_next(
+    plan: Sequence[float], feedback, last_feedback, stage
+) -> Tuple[List[float], int, date]:
+    """根据反馈调整复习计划，并计算下一阶段与下次复习日期
+
+    Args:
+        plan: 复习计划，各阶段的间隔天数
+        feedback: 本次复习反馈
+        last_feedback: 上次复习反馈
+        stage: 当前复习阶段
+
+    Returns:
+        (新的复习计划, 新的复习阶段, 下次复习日期)
+    """
     feedback = feedback or 2
     last_feedback = last_feedback or 2
 
     feedback = FEEDBACK_MAP.get(int(feedback),1)
     last_feedback = FEEDBACK_MAP.get(int(last_feedback),1)
-    plan_list = list(map(lambda x: float(x), plan.split(',')))
+    plan_list = parse_plan(plan)
     plan_list_len = len(plan_list)
     if stage>=plan_list_len:
         stage = plan_list_len-1
     elif stage<0:
         stage = 0
-    
-    interval = plan_list[stage]
-    new_interval = interval*FEEDBACK_MUTI_FACTOR*(feedback+FEEDBAKC_AMEND_FACTOR*(feedback-last_feedback))
-    if new_interval<MIN_INTERVAL:
-        new_interval = MIN_INTERVAL
-    if new_interval>MAX_INTERVAL:
-        new_interval = MAX_INTERVAL
-    plan_list[stage] = new_interval
-    for i in range(len(plan_list)):
-        cur = plan_list[i]
-        if i>=stage:
-            new_interval = cur*FEEDBACK_MUTI_FACTOR*(feedback+FEEDBAKC_AMEND_FACTOR*(feedback-last_feedback))
-            if new_interval<MIN_INTERVAL:
-                new_interval = MIN_INTERVAL
-            if new_interval>MAX_INTERVAL:
-                new_interval = MAX_INTERVAL
-            cur = new_interval
-        plan_list[i] = '{:.2f}'.format(cur) # type: ignore
-    new_plan = ','.join(plan_list) # type: ignore
 
-    new_stage = stage+1 if stage< plan_list_len-1 else stage
+    factor = FEEDBACK_MUTI_FACTOR*(feedback+FEEDBAKC_AMEND_FACTOR*(feedback-last_feedback))
 
-    next_review_date = date.today()+timedelta(days=int(float((plan_list[new_stage]))))
+    def clamp(interval):
+        return min(max(interval, MIN_INTERVAL), MAX_INTERVAL)
 
-    return new_plan,new_stage,next_review_date
+    # 当前阶段先调整一次，之后与后续阶段一起整体调整
+    plan_list[stage] = clamp(plan_list[stage]*factor)
+    new_plan = [round(x, 2) for x in plan_list[:stage]] + [
+        round(clamp(x*factor), 2) for x in plan_list[stage:]
+    ]
 
+    new_stage = stage+1 if stage< plan_list_len-1 else stage
 
+    next_review_date = date.today()+timedelta(days=int(new_plan[new_stage]))
+
+    return new_plan,new_stage,next_review_date
@@ -0,0 +1,252 @@
+"""复习调度模拟
+
+使用NumPy向量化实现 utils.review.adjust_and_get_next，批量回放大量随机的复习序列，
+统计每天的复习量和复习间隔分布，用于在修改调度参数前评估复习流量。
+
+需要numpy（仅模拟使用，不在requirements.txt中）。
+用法（在项目根目录下）：
+    python -m utils.review_simulation --sequences 1000000 --days 365
+    python -m utils.review_simulation --bench 100000
+"""
+
+import argparse
+import json
+import time
+from datetime import date
+from typing import Optional, Sequence
+
+import numpy as np
+
+from utils import review
+from utils.review import adjust_and_get_next
+
+DEFAULT_PLAN = [1, 3, 7, 14, 30]
+# 反馈0~3的出现概率
+DEFAULT_FEEDBACK_PROBS = [0.1, 0.2, 0.5, 0.2]
+
+
+def feedback_values(feedback: np.ndarray) -> np.ndarray:
+    """反馈 -> FEEDBACK_MAP中的系数，与标量实现一致：0视为2，未知反馈为1"""
+    table_size = max(max(review.FEEDBACK_MAP), 3) + 1
+    table = np.ones(table_size)
+    for k, v in review.FEEDBACK_MAP.items():
+        table[k] = v
+    feedback = np.where(feedback == 0, 2, feedback)
+    known = (feedback >= 0) & (feedback < table_size)
+    return np.where(known, table[np.clip(feedback, 0, table_size - 1)], 1.0)
+
+
+def adjust_and_get_next_batch(
+    plans: np.ndarray,
+    feedback: np.ndarray,
+    last_feedback: np.ndarray,
+    stage: np.ndarray,
+):
+    """adjust_and_get_next的向量化版本
+
+    Args:
+        plans: (n, 阶段数) 复习计划
+        feedback: (n,) 本次反馈，0表示无反馈
+        last_feedback: (n,) 上次反馈，0表示无反馈
+        stage: (n,) 当前复习阶段
+
+    Returns:
+        (新的复习计划, 新的复习阶段, 距下次复习天数)
+    """
+    n, stages = plans.shape
+    rows = np.arange(n)
+    fb = feedback_values(feedback)
+    last_fb = feedback_values(last_feedback)
+    stage = np.clip(stage, 0, stages - 1)
+    factor = (
+        review.FEEDBACK_MUTI_FACTOR
+        * (fb + review.FEEDBAKC_AMEND_FACTOR * (fb - last_fb))
+    )[:, None]
+
+    new_plans = plans.astype(float)
+    # 当前阶段先调整一次，之后与后续阶段一起整体调整
+    new_plans[rows, stage] = np.clip(
+        new_plans[rows, stage] * factor[:, 0], review.MIN_INTERVAL, review.MAX_INTERVAL
+    )
+    adjusted = np.clip(new_plans * factor, review.MIN_INTERVAL, review.MAX_INTERVAL)
+    new_plans = np.where(np.arange(stages) >= stage[:, None], adjusted, new_plans)
+    new_plans = np.round(new_plans, 2)
+
+    new_stage = np.minimum(stage + 1, stages - 1)
+    days = new_plans[rows, new_stage].astype(np.int64)
+    return new_plans, new_stage, days
+
+
+def simulate(
+    sequences: int,
+    days: int,
+    plan: Optional[Sequence[float]] = None,
+    feedback_probs: Optional[Sequence[float]] = None,
+    spread: int = 0,
+    seed: int = 0,
+) -> dict:
+    """模拟sequences个独立的复习序列（每个序列一份复习计划和一个复习条目）
+
+    Args:
+        sequences: 序列数量
+        days: 模拟天数
+        plan: 初始复习计划
+        feedback_probs: 反馈0~3的概率
+        spread: 序列的开始日期均匀分布在前spread天内（模拟笔记陆续加入），0表示全部第0天开始
+        seed: 随机种子
+
+    Returns:
+        {"load": 每天复习量, "intervals": 各间隔天数出现次数, "reviews": 总复习次数}
+    """
+    rng = np.random.default_rng(seed)
+    plan = list(plan or DEFAULT_PLAN)
+    probs = np.asarray(feedback_probs or DEFAULT_FEEDBACK_PROBS, dtype=float)
+    probs = probs / probs.sum()
+
+    plans = np.tile(np.asarray(plan, dtype=float), (sequences, 1))
+    stage = np.zeros(sequences, dtype=np.int64)
+    last_feedback = np.zeros(sequences, dtype=np.int64)
+    next_day = (
+        rng.integers(0, spread, sequences) if spread else np.zeros(sequences, np.int64)
+    )
+    load = np.zeros(days, dtype=np.int64)
+    intervals = np.zeros(review.MAX_INTERVAL + 1, dtype=np.int64)
+
+    for day in range(days):
+        due = np.flatnonzero(next_day == day)
+        if not due.size:
+            continue
+        load[day] = due.size
+        feedback = rng.choice(len(probs), size=due.size, p=probs)
+        new_plans, new_stage, interval = adjust_and_get_next_batch(
+            plans[due], feedback, last_feedback[due], stage[due]
+        )
+        plans[due] = new_plans
+        stage[due] = new_stage
+        last_feedback[due] = feedback
+        next_day[due] = day + interval
+        intervals += np.bincount(interval, minlength=intervals.size)[: intervals.size]
+
+    return {"load": load, "intervals": intervals, "reviews": int(load.sum())}
+
+
+def random_inputs(n: int, stages: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    plans = np.round(
+        rng.uniform(review.MIN_INTERVAL, review.MAX_INTERVAL, (n, stages)), 2
+    )
+    feedback = rng.integers(0, 4, n)
+    last_feedback = rng.integers(0, 4, n)
+    stage = rng.integers(0, stages, n)
+    return plans, feedback, last_feedback, stage
+
+
+def benchmark(n: int, stages: int = 5, seed: int = 0) -> dict:
+    """比较标量实现与向量化实现的耗时，并检查两者结果是否一致"""
+    plans, feedback, last_feedback, stage = random_inputs(n, stages, seed)
+    plan_lists = plans.tolist()
+    feedback_list = feedback.tolist()
+    last_feedback_list = last_feedback.tolist()
+    stage_list = stage.tolist()
+
+    today = date.today()
+    start = time.perf_counter()
+    scalar = [
+        adjust_and_get_next(plan_lists[i], feedback_list[i], last_feedback_list[i], stage_list[i])
+        for i in range(n)
+    ]
+    scalar_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    new_plans, new_stage, days = adjust_and_get_next_batch(
+        plans, feedback, last_feedback, stage
+    )
+    vector_seconds = time.perf_counter() - start
+
+    # np.round与内置round在0.005的边界上可能相差0.01，计划只统计最大差值；
+    # 差值恰好跨过整数时天数也会差1天，计入mismatches
+    mismatches = sum(
+        1
+        for i, (_, s, next_date) in enumerate(scalar)
+        if s != new_stage[i] or (next_date - today).days != days[i]
+    )
+    plan_diff = float(np.abs(np.array([res[0] for res in scalar]) - new_plans).max())
+    return {
+        "n": n,
+        "scalar_seconds": round(scalar_seconds, 4),
+        "vector_seconds": round(vector_seconds, 4),
+        "scalar_per_second": round(n / scalar_seconds),
+        "vector_per_second": round(n / vector_seconds),
+        "speedup": round(scalar_seconds / vector_seconds, 1),
+        "mismatches": mismatches,
+        "max_plan_diff": round(plan_diff, 4),
+    }
+
+
+def summarize(result: dict) -> dict:
+    load = result["load"]
+    intervals = result["intervals"]
+    active = load[load > 0]
+    interval_days = np.repeat(np.arange(intervals.size), intervals)
+    return {
+        "reviews": result["reviews"],
+        "days": int(load.size),
+        "load_mean": round(float(load.mean()), 1) if load.size else 0,
+        "load_p50": int(np.percentile(active, 50)) if active.size else 0,
+        "load_p99": int(np.percentile(active, 99)) if active.size else 0,
+        "load_max": int(load.max()) if load.size else 0,
+        "peak_day": int(load.argmax()) if load.size else 0,
+        "interval_p50": int(np.percentile(interval_days, 50)) if interval_days.size else 0,
+        "interval_p90": int(np.percentile(interval_days, 90)) if interval_days.size else 0,
+        "intervals": {int(d): int(c) for d, c in enumerate(intervals) if c},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="复习调度模拟与基准测试")
+    parser.add_argument("--sequences", type=int, default=100000, help="模拟的复习序列数（默认100000）")
+    parser.add_argument("--days", type=int, default=365, help="模拟天数（默认365）")
+    parser.add_argument("--spread", type=int, default=0, help="序列开始日期分布在前多少天内（默认0）")
+    parser.add_argument(
+        "--plan", default=",".join(map(str, DEFAULT_PLAN)), help="初始复习计划，','分隔（默认1,3,7,14,30）"
+    )
+    parser.add_argument(
+        "--feedback-probs",
+        default=",".join(map(str, DEFAULT_FEEDBACK_PROBS)),
+        help="反馈0~3的概率，','分隔（默认0.1,0.2,0.5,0.2）",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--bench", type=int, default=0, help="只比较标量与向量化实现，参数为调用次数")
+    parser.add_argument("--json", action="store_true", help="以json格式输出")
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        res = benchmark(args.bench, len(args.plan.split(",")), args.seed)
+    else:
+        start = time.perf_counter()
+        res = summarize(
+            simulate(
+                args.sequences,
+                args.days,
+                plan=[float(x) for x in args.plan.split(",")],
+                feedback_probs=[float(x) for x in args.feedback_probs.split(",")],
+                spread=args.spread,
+                seed=args.seed,
+            )
+        )
+        res["seconds"] = round(time.perf_counter() - start, 2)
+
+    if args.json:
+        print(json.dumps(res, ensure_ascii=False))
+        return
+    for k, v in res.items():
+        if k == "intervals":
+            print("intervals:")
+            for day, count in v.items():
+                print(f"  {day:>3}天 {count}")
+        else:
+            print(f"{k}: {v}")
+
+
+if __name__ == "__main__":
+    main()
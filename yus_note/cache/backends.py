@@ -0,0 +1,314 @@
+"""Redis缓存后端
+
+RedisCache: 在django自带RedisCache的基础上增加按模式遍历键的方法（用于把缓存中的计数同步回数据库）。
+TieredRedisCache: 在Redis(L2)前加一层进程内LRU缓存(L1)，热点键在L1有效期内不再访问Redis。
+    本进程的写操作会同时更新L1，并通过Redis发布/订阅通知其他进程删除各自L1中的该键；
+    订阅断开期间其他进程的修改最迟在L1过期(L1_TIMEOUT秒)后可见，
+    因此只适用于允许短暂不一致的数据（如粉丝数），不要用于验证码等数据。
+    读取Redis与回填L1之间收到该键的失效时不回填（见L1Generations），避免把旧值留在L1中。
+    每次写入都会发布失效通知，频繁写入的键（如浏览量计数）应通过L1_EXCLUDE排除在L1之外。
+
+OPTIONS中除以下配置外，其余配置都传给redis连接池：
+    L1_TIMEOUT: L1有效期，秒，默认5
+    L1_MAX_ENTRIES: L1最多缓存的键数，默认1000
+    L1_EXCLUDE: 不使用L1的键的通配符模式列表（不含前缀和版本），如["note:*:cached_views"]
+    INVALIDATION: 是否通过发布/订阅通知其他进程，默认True
+"""
+
+import fnmatch
+import logging
+import os
+import re
+import socket
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache as BaseRedisCache
+
+_MISSING = object()
+
+logger = logging.getLogger("django")
+
+
+def process_token() -> str:
+    # fork出的子进程pid不同，不能在导入时计算
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class L1Generations:
+    """L1的失效代数，按键的哈希分槽计数，占用内存固定
+    读取Redis前记下代数，回填L1时代数已变化（期间本进程写入或收到失效通知）则放弃回填。
+    """
+
+    slots = 1024
+
+    def __init__(self, l1: LocMemCache) -> None:
+        self.l1 = l1
+        self.lock = threading.Lock()
+        self.epoch = 0
+        self.counters = [0] * self.slots
+
+    def get(self, key: str):
+        return self.epoch, self.counters[hash(key) % self.slots]
+
+    def fill(self, key: str, value, generation) -> None:
+        with self.lock:
+            if self.get(key) == generation:
+                self.l1.set(key, value)
+
+    def set(self, key: str, value, timeout) -> None:
+        with self.lock:
+            self.counters[hash(key) % self.slots] += 1
+            self.l1.set(key, value, timeout=timeout)
+
+    def delete(self, key: str) -> None:
+        with self.lock:
+            self.counters[hash(key) % self.slots] += 1
+            self.l1.delete(key)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.epoch += 1
+            self.l1.clear()
+
+
+class L1Invalidator:
+    """订阅失效消息并删除本进程L1中的键，每个进程每个L1一个后台线程"""
+
+    def __init__(self, l1: L1Generations, get_client, channel: str) -> None:
+        self.l1 = l1
+        self.get_client = get_client
+        self.channel = channel
+        self.pid = None
+        self.lock = threading.Lock()
+
+    def ensure_started(self) -> None:
+        if self.pid == os.getpid():
+            return
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+            # 父进程中的L1和订阅线程不会被子进程继承
+            self.l1.clear()
+            thread = threading.Thread(
+                target=self.run, name=f"l1-invalidator:{self.channel}", daemon=True
+            )
+            thread.start()
+            self.pid = os.getpid()
+
+    def run(self) -> None:
+        while True:
+            pubsub = None
+            try:
+                pubsub = self.get_client().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                # 断线期间可能漏掉了失效消息
+                self.l1.clear()
+                while True:
+                    message = pubsub.get_message(timeout=0.5)
+                    if message and message["type"] == "message":
+                        self.handle(message["data"])
+            except Exception as e:
+                logger.warning("L1缓存失效订阅中断，1秒后重连：%s", e)
+                time.sleep(1)
+            finally:
+                if pubsub is not None:
+                    pubsub.close()
+
+    def handle(self, data) -> None:
+        token, _, key = (data.decode() if isinstance(data, bytes) else data).partition("|")
+        if token == process_token():
+            return
+        if key == "*":
+            self.l1.clear()
+        else:
+            self.l1.delete(key)
+
+
+# L1名称 -> 失效代数
+GENERATIONS = {}
+# L1名称 -> 订阅器
+INVALIDATORS = {}
+INVALIDATORS_LOCK = threading.Lock()
+
+
+class RedisCache(BaseRedisCache):
+    def get_client(self, write=False):
+        return self._cache.get_client(write=write)
+
+    def iter_keys(self, pattern: str, version=None, count: int = 1000):
+        """按模式遍历键（使用SCAN，不会阻塞Redis），返回未加前缀的原始键"""
+        prefix_len = len(self.make_key("", version=version))
+        match = self.make_key(pattern, version=version)
+        for key in self.get_client().scan_iter(match=match, count=count):
+            yield key.decode()[prefix_len:]
+
+    def get_many_from_redis(self, keys, version=None):
+        """直接从Redis读取（TieredRedisCache也不经过L1），用于把计数同步回数据库"""
+        return BaseRedisCache.get_many(self, keys, version)
+
+
+class TieredRedisCache(RedisCache):
+    def __init__(self, server, params):
+        params = dict(params)
+        options = dict(params.get("OPTIONS", {}))
+        self.l1_timeout = options.pop("L1_TIMEOUT", 5)
+        l1_max_entries = options.pop("L1_MAX_ENTRIES", 1000)
+        l1_exclude = options.pop("L1_EXCLUDE", ())
+        invalidation = options.pop("INVALIDATION", True)
+        params["OPTIONS"] = options
+        super().__init__(server, params)
+        # LocMemCache按名称在进程内共享存储（LRU淘汰），同一别名的各线程实例共用一个L1
+        l1_name = f"tiered:{server}:{self.key_prefix}"
+        self._l1 = LocMemCache(
+            l1_name,
+            {
+                "TIMEOUT": self.l1_timeout,
+                "OPTIONS": {"MAX_ENTRIES": l1_max_entries, "CULL_FREQUENCY": 10},
+            },
+        )
+        self._l1_exclude = (
+            re.compile("|".join(fnmatch.translate(p) for p in l1_exclude))
+            if l1_exclude
+            else None
+        )
+        self.channel = f"{self.key_prefix}:l1_invalidation"
+        self._invalidator = None
+        with INVALIDATORS_LOCK:
+            if l1_name not in GENERATIONS:
+                GENERATIONS[l1_name] = L1Generations(self._l1)
+            self._generations = GENERATIONS[l1_name]
+            if invalidation:
+                if l1_name not in INVALIDATORS:
+                    INVALIDATORS[l1_name] = L1Invalidator(
+                        self._generations, self.get_client, self.channel
+                    )
+                self._invalidator = INVALIDATORS[l1_name]
+
+    def _bypass_l1(self, key) -> bool:
+        """key为未加前缀的原始键"""
+        return self._l1_exclude is not None and bool(self._l1_exclude.match(key))
+
+    def _l1_get(self, key):
+        if self._invalidator is not None:
+            self._invalidator.ensure_started()
+        return self._l1.get(key, _MISSING)
+
+    def _publish(self, key) -> None:
+        """通知其他进程删除L1中的键，key为'*'表示清空"""
+        if self._invalidator is None:
+            return
+        try:
+            self.get_client(write=True).publish(self.channel, f"{process_token()}|{key}")
+        except Exception as e:
+            logger.warning("L1缓存失效通知发送失败：%s", e)
+
+    def _l1_timeout(self, timeout):
+        timeout = self.get_backend_timeout(timeout)
+        if timeout is None:
+            return self.l1_timeout
+        return min(timeout, self.l1_timeout)
+
+    def _l1_set(self, key, value, timeout, version):
+        if self._bypass_l1(key):
+            return
+        key = self.make_and_validate_key(key, version)
+        self._publish(key)
+        timeout = self._l1_timeout(timeout)
+        if timeout > 0:
+            self._generations.set(key, value, timeout)
+        else:
+            self._generations.delete(key)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = super().add(key, value, timeout, version)
+        if added:
+            self._l1_set(key, value, timeout, version)
+        return added
+
+    def get(self, key, default=None, version=None):
+        if self._bypass_l1(key):
+            return super().get(key, default, version)
+        key = self.make_and_validate_key(key, version=version)
+        value = self._l1_get(key)
+        if value is not _MISSING:
+            return value
+        generation = self._generations.get(key)
+        value = self._cache.get(key, _MISSING)
+        if value is _MISSING:
+            return default
+        self._generations.fill(key, value, generation)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        super().set(key, value, timeout, version)
+        self._l1_set(key, value, timeout, version)
+
+    def _l1_delete(self, key, version) -> None:
+        if self._bypass_l1(key):
+            return
+        key = self.make_and_validate_key(key, version)
+        self._generations.delete(key)
+        self._publish(key)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        res = super().touch(key, timeout, version)
+        self._l1_delete(key, version)
+        return res
+
+    def delete(self, key, version=None):
+        res = super().delete(key, version)
+        self._l1_delete(key, version)
+        return res
+
+    def get_many(self, keys, version=None):
+        res = {}
+        missing = []
+        generations = {}
+        for key in keys:
+            if self._bypass_l1(key):
+                missing.append(key)
+                continue
+            full_key = self.make_and_validate_key(key, version)
+            value = self._l1_get(full_key)
+            if value is _MISSING:
+                missing.append(key)
+                generations[key] = self._generations.get(full_key)
+            else:
+                res[key] = value
+        if missing:
+            fetched = super().get_many(missing, version)
+            for key, value in fetched.items():
+                if key in generations:
+                    self._generations.fill(
+                        self.make_and_validate_key(key, version),
+                        value,
+                        generations[key],
+                    )
+            res.update(fetched)
+        return res
+
+    def incr(self, key, delta=1, version=None):
+        res = super().incr(key, delta, version)
+        self._l1_delete(key, version)
+        return res
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        res = super().set_many(data, timeout, version)
+        for key, value in data.items():
+            self._l1_set(key, value, timeout, version)
+        return res
+
+    def delete_many(self, keys, version=None):
+        res = super().delete_many(keys, version)
+        for key in keys:
+            self._l1_delete(key, version)
+        return res
+
+    def clear(self):
+        res = super().clear()
+        self._generations.clear()
+        self._publish("*")
+        return res
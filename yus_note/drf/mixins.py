@@ -0,0 +1,108 @@
+"""公共drf视图混入"""
+import hashlib
+from typing import Optional
+
+from django.conf import settings
+from django.db.models import Count, F, Max, Sum
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from rest_framework.response import Response
+
+
+class ConditionalGetMixin:
+    """条件GET：retrieve和list支持ETag/If-None-Match
+    先用一次只取版本字段的查询计算ETag，客户端缓存仍有效时直接返回304，不加载和序列化正文。
+
+    详情的ETag由最后修改时间和etag_fields计算；
+    列表的ETag由一次聚合查询计算：最后修改时间的最大值、条目数、pk及list_etag_fields的合计，
+    因此etag_fields/list_etag_fields中应包含不会更新最后修改时间、但会被序列化的字段（如点赞数）。
+    点赞数等字段的变化不会更新最后修改时间，因此不返回Last-Modified，也不处理If-Modified-Since。
+    """
+
+    last_modified_field = "update_time"
+    etag_fields = ()
+    list_etag_fields = ()
+
+    def get_object_state(self, *extra_fields) -> Optional[dict]:
+        queryset = self.filter_queryset(self.get_queryset())  # type: ignore
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field  # type: ignore
+        fields = (self.last_modified_field, *self.etag_fields, *extra_fields)
+        lookup = {self.lookup_field: self.kwargs[lookup_url_kwarg]}  # type: ignore
+        return queryset.filter(**lookup).order_by().values(*fields).first()
+
+    def get_list_state(self) -> dict:
+        # 只做一次聚合查询；合计值相同不代表内容相同（一条+1、另一条-1），
+        # 因此另外计算按pk加权的合计，pk的合计反映条目的增删
+        queryset = self.filter_queryset(self.get_queryset())  # type: ignore
+        aggregates = {
+            self.last_modified_field: Max(self.last_modified_field),
+            "count": Count("pk"),
+            "pk": Sum("pk"),
+        }
+        for field in self.list_etag_fields:
+            aggregates[field] = Sum(field)
+            aggregates[f"{field}_by_pk"] = Sum(F("pk") * F(field))
+        return queryset.order_by().aggregate(**aggregates)
+
+    def get_etag(self, state: dict) -> str:
+        # 同一状态下不同的查询参数（筛选、排序）和用户返回的内容不同
+        raw = "|".join(
+            [self.request.get_full_path(), str(self.request.user.pk)]  # type: ignore
+            + [f"{k}={v}" for k, v in sorted(state.items())]
+        )
+        return quote_etag(hashlib.md5(raw.encode()).hexdigest())
+
+    def conditional_response(self, state: dict):
+        """客户端缓存仍有效时返回304响应，否则返回None
+
+        Returns:
+            (304响应或None, 需要添加到响应中的头)
+        """
+        headers = {"ETag": self.get_etag(state)}
+        response = get_conditional_response(
+            self.request, etag=headers["ETag"]  # type: ignore
+        )
+        return response, headers
+
+    def with_headers(self, response, headers: dict):
+        for key, value in headers.items():
+            response[key] = value
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        state = self.get_object_state()
+        if state is None:
+            return super().retrieve(request, *args, **kwargs)  # type: ignore
+        not_modified, headers = self.conditional_response(state)
+        if not_modified is not None:
+            return self.with_headers(not_modified, headers)
+        response = super().retrieve(request, *args, **kwargs)  # type: ignore
+        return self.with_headers(response, headers)
+
+    def list(self, request, *args, **kwargs):
+        not_modified, headers = self.conditional_response(self.get_list_state())
+        if not_modified is not None:
+            return self.with_headers(not_modified, headers)
+        response = super().list(request, *args, **kwargs)  # type: ignore
+        return self.with_headers(response, headers)
+
+
+class ValuesListMixin:
+    """list使用values_serializer_class（见yus_note.drf.serializers.ValuesSerializer）
+    直接由.values()构建响应；未设置、启用了分页或settings.VALUES_LIST_SERIALIZERS为False时使用常规序列化器。
+    """
+
+    values_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        if (
+            self.values_serializer_class is None
+            or self.paginator is not None  # type: ignore
+            or not getattr(settings, "VALUES_LIST_SERIALIZERS", True)
+        ):
+            return super().list(request, *args, **kwargs)  # type: ignore
+        queryset = self.filter_queryset(self.get_queryset())  # type: ignore
+        serializer = self.values_serializer_class(
+            context=self.get_serializer_context()  # type: ignore
+        )
+        return Response(serializer.serialize(queryset))
@@ -25,6 +25,27 @@ class DynamicFieldsModelSerializer(serializers.ModelSerializer):
                 self.fields.pop(field_name)
 
 
+class ValuesSerializer:
+    """只读列表的快速序列化
+    直接由queryset.values()的行构建输出字典，跳过ModelSerializer的字段实例化和逐字段to_representation，
+    用于大列表。子类声明values_fields并按需重写to_representation/get_rows，输出须与对应的ModelSerializer一致。
+    """
+    values_fields: tuple = ()
+
+    def __init__(self, context=None):
+        self.context = context or {}
+
+    def get_rows(self, queryset) -> list:
+        return list(queryset.values(*self.values_fields))
+
+    def to_representation(self, row: dict) -> dict:
+        return row
+
+    def serialize(self, queryset) -> list:
+        to_representation = self.to_representation
+        return [to_representation(row) for row in self.get_rows(queryset)]
+
+
 class NestedCurrentModelSerializer(serializers.Serializer):
     """在Serializer中使用该字段时，使用该Serializer序列化指定字段
     用于一个模型的字段外键指定的是自身的字段
@@ -1,8 +1,11 @@
+import atexit
+import contextlib
 import json
 import os
 import re
 import shutil
 import threading
+import time
 import warnings
 
 from django.conf import settings
@@ -44,6 +47,7 @@ if not hasattr(whoosh, "__version__") or whoosh.__version__ < (2, 5, 0):
 
 # Bubble up the correct error.
 from whoosh import index
+import jieba
 from jieba.analyse import ChineseAnalyzer
 from whoosh.fields import BOOLEAN, DATETIME
 from whoosh.fields import ID as WHOOSH_ID
@@ -62,6 +66,219 @@ DATETIME_REGEX = re.compile(
 )
 LOCALS = threading.local()
 LOCALS.RAM_STORE = None
+CJK_REGEX = re.compile(r"[\u3400-\u9fff\uf900-\ufaff]")
+MEMORY_STORES = {}
+MEMORY_STORES_LOCK = threading.Lock()
+
+
+class MemoryStorage(RamStorage):
+    """
+    A ``RamStorage`` whose writers use a per-process temporary directory.
+
+    ``RamStorage`` puts a writer's temporary files in ``<tmp>/MAIN.tmp``,
+    which every process writing an index named "MAIN" shares and removes
+    when it is done.
+    """
+
+    def temp_storage(self, name=None):
+        if name is not None:
+            name = "%s.%s" % (name, os.getpid())
+
+        return super().temp_storage(name)
+
+
+class MemoryIndexStore(object):
+    """
+    A process-wide in-memory copy of an on-disk Whoosh index.
+
+    The files under ``path`` are loaded into a ``RamStorage`` once, every
+    thread of the process searches and writes that same storage, and writes
+    are copied back to ``path`` in the background (debounced by
+    ``persist_delay`` seconds) and when the process exits.
+
+    Several processes (gunicorn/celery workers) may share one ``path``. Each
+    write is also kept in a journal until it has been persisted. Persisting
+    holds a lock file in ``path`` and compares the on-disk TOC generation
+    with the one the memory copy is based on. If another process persisted
+    in between, the disk copy is reloaded and the journal replayed on top of
+    it instead of overwriting the other process's segments. Processes
+    without pending writes reload the disk copy at most every
+    ``reload_interval`` seconds when its generation changes.
+    """
+
+    def __init__(self, path, persist_delay=1.0, reload_interval=1.0):
+        self.path = path
+        self.persist_delay = persist_delay
+        self.reload_interval = reload_interval
+        self.storage = MemoryStorage()
+        self.persist_lock = threading.Lock()
+        # Held by in-process writes and by persist, so a journal entry is
+        # always recorded together with the change it describes.
+        self.write_lock = threading.RLock()
+        self.journal = []
+        self.generation = -1
+        self.checked_at = 0.0
+        self.timer = None
+        self.timer_lock = threading.Lock()
+        self.load()
+        atexit.register(self.persist)
+
+    def _is_lock_file(self, name):
+        return name.endswith("LOCK")
+
+    def _generation(self, names):
+        return index.TOC._latest_generation(names, index._DEF_INDEX_NAME)
+
+    def disk_generation(self):
+        if not os.path.exists(self.path):
+            return -1
+
+        return self._generation(os.listdir(self.path))
+
+    def load(self):
+        """
+        Replaces the memory storage contents with the index files on disk.
+        """
+        files = {}
+
+        if os.path.exists(self.path):
+            disk = FileStorage(self.path)
+
+            for name in disk.list():
+                if self._is_lock_file(name) or name.endswith(".tmp"):
+                    continue
+
+                with open(os.path.join(self.path, name), "rb") as f:
+                    files[name] = f.read()
+
+        self.storage.files = files
+        self.generation = self._generation(files)
+        self.checked_at = time.monotonic()
+
+    def record(self, change):
+        """
+        Journals a write that has just been applied to the memory storage.
+
+        ``change`` is called with a storage and must apply the same write to
+        it. The caller must hold ``write_lock``.
+        """
+        self.journal.append(change)
+
+    def refresh(self):
+        """
+        Reloads the disk copy if another process has persisted since it was
+        loaded. Pending local writes are merged by the next ``persist``.
+        """
+        if time.monotonic() - self.checked_at < self.reload_interval:
+            return
+
+        self.checked_at = time.monotonic()
+
+        if self.journal or self.disk_generation() == self.generation:
+            return
+
+        with self.write_lock:
+            if not self.journal and self.disk_generation() != self.generation:
+                self.load()
+
+    def persist(self):
+        """
+        Synchronously writes the journaled memory storage to disk.
+
+        Segment files are written before the TOC files that reference them,
+        and files no longer in memory are removed last, so the on-disk index
+        stays readable at every step.
+        """
+        with self.persist_lock, self.write_lock:
+            if not self.journal:
+                return
+
+            if not os.path.exists(self.path):
+                os.makedirs(self.path)
+
+            lock = FileStorage(self.path).lock("PERSIST_LOCK")
+            lock.acquire(blocking=True)
+
+            try:
+                if self.disk_generation() != self.generation:
+                    # Another process persisted first: keep its segments and
+                    # redo this process's writes on top of them.
+                    journal = self.journal
+                    self.load()
+
+                    for change in journal:
+                        change(self.storage)
+
+                self._write(dict(self.storage.files))
+                self.generation = self._generation(self.storage.files)
+                self.journal = []
+            finally:
+                lock.release()
+
+    def _write(self, files):
+        names = sorted(files, key=lambda name: name.endswith(".toc"))
+
+        for name in names:
+            target = os.path.join(self.path, name)
+
+            if (
+                not name.endswith(".toc")
+                and os.path.exists(target)
+                and os.path.getsize(target) == len(files[name])
+            ):
+                # Segment files are immutable once written.
+                continue
+
+            with open(target + ".tmp", "wb") as f:
+                f.write(files[name])
+
+            os.replace(target + ".tmp", target)
+
+        for name in os.listdir(self.path):
+            if name not in files and not self._is_lock_file(name):
+                os.remove(os.path.join(self.path, name))
+
+    def schedule_persist(self):
+        with self.timer_lock:
+            if self.timer is not None:
+                self.timer.cancel()
+
+            self.timer = threading.Timer(self.persist_delay, self.persist)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def close(self, persist=True):
+        with self.timer_lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+
+        atexit.unregister(self.persist)
+
+        if persist:
+            self.persist()
+
+
+def get_memory_store(path, persist_delay=1.0, reload_interval=1.0):
+    path = os.path.abspath(path)
+
+    with MEMORY_STORES_LOCK:
+        if path not in MEMORY_STORES:
+            MEMORY_STORES[path] = MemoryIndexStore(
+                path, persist_delay=persist_delay, reload_interval=reload_interval
+            )
+
+    return MEMORY_STORES[path]
+
+
+def close_memory_store(path, persist=True):
+    path = os.path.abspath(path)
+
+    with MEMORY_STORES_LOCK:
+        store = MEMORY_STORES.pop(path, None)
+
+    if store is not None:
+        store.close(persist=persist)
 
 
 class WhooshHtmlFormatter(HtmlFormatter):
@@ -106,18 +323,34 @@ class WhooshSearchBackend(BaseSearchBackend):
         super().__init__(connection_alias, **connection_options)
         self.setup_complete = False
         self.use_file_storage = True
+        self.use_memory_storage = False
+        self.memory_store = None
         self.post_limit = getattr(connection_options, "POST_LIMIT", 128 * 1024 * 1024)
         self.path = connection_options.get("PATH")
+        self.persist_delay = connection_options.get("PERSIST_DELAY", 1.0)
+        self.reload_interval = connection_options.get("RELOAD_INTERVAL", 1.0)
+
+        # "memory": load the index at PATH into RAM, persist writes back to it.
+        # Any other value besides "file": a thread-local, non-persistent RAM index.
+        if connection_options.get("STORAGE", "file") == "memory":
+            self.use_memory_storage = True
 
         if connection_options.get("STORAGE", "file") != "file":
             self.use_file_storage = False
 
-        if self.use_file_storage and not self.path:
+        if (self.use_file_storage or self.use_memory_storage) and not self.path:
             raise ImproperlyConfigured(
                 "You must specify a 'PATH' in your settings for connection '%s'."
                 % connection_alias
             )
 
+        # Spelling corrector cache, tied to the index generation it was built from.
+        self.spelling_cache_size = connection_options.get("SPELLING_CACHE_SIZE", 1024)
+        self._corrector = None
+        self._corrector_reader = None
+        self._corrector_generation = None
+        self._suggestion_cache = {}
+
         self.log = logging.getLogger("haystack")
 
     def setup(self):
@@ -141,6 +374,13 @@ class WhooshSearchBackend(BaseSearchBackend):
 
         if self.use_file_storage:
             self.storage = FileStorage(self.path)
+        elif self.use_memory_storage:
+            if self.memory_store is None:
+                self.memory_store = get_memory_store(
+                    self.path, self.persist_delay, self.reload_interval
+                )
+
+            self.storage = self.memory_store.storage
         else:
             global LOCALS
 
@@ -163,6 +403,8 @@ class WhooshSearchBackend(BaseSearchBackend):
             except index.EmptyIndexError:
                 self.index = self.storage.create_index(self.schema)
 
+        # A recreated index may reuse the previous generation number.
+        self.reset_corrector()
         self.setup_complete = True
 
     def build_schema(self, fields):
@@ -250,8 +492,13 @@ class WhooshSearchBackend(BaseSearchBackend):
         if not self.setup_complete:
             self.setup()
 
+        with self.write_lock():
+            self._update(index, iterable)
+
+    def _update(self, index, iterable):
         self.index = self.index.refresh()
         writer = AsyncWriter(self.index)
+        docs = []
 
         for obj in iterable:
             try:
@@ -270,6 +517,7 @@ class WhooshSearchBackend(BaseSearchBackend):
 
                 try:
                     writer.update_document(**doc)
+                    docs.append(doc)
                 except Exception as e:
                     if not self.silently_fail:
                         raise
@@ -289,6 +537,9 @@ class WhooshSearchBackend(BaseSearchBackend):
             if writer.ident is not None:
                 writer.join()
 
+            self.record(lambda ix: self._update_documents(ix, docs))
+            self.persist_later()
+
     def remove(self, obj_or_string, commit=True):
         if not self.setup_complete:
             self.setup()
@@ -297,7 +548,13 @@ class WhooshSearchBackend(BaseSearchBackend):
         whoosh_id = get_identifier(obj_or_string)
 
         try:
-            self.index.delete_by_query(q=self.parser.parse('%s:"%s"' % (ID, whoosh_id)))
+            query = self.parser.parse('%s:"%s"' % (ID, whoosh_id))
+
+            with self.write_lock():
+                self.index.delete_by_query(q=query)
+                self.record(lambda ix: ix.delete_by_query(q=query))
+
+            self.persist_later()
         except Exception as e:
             if not self.silently_fail:
                 raise
@@ -327,9 +584,13 @@ class WhooshSearchBackend(BaseSearchBackend):
                 for model in models:
                     models_to_delete.append("%s:%s" % (DJANGO_CT, get_model_ct(model)))
 
-                self.index.delete_by_query(
-                    q=self.parser.parse(" OR ".join(models_to_delete))
-                )
+                query = self.parser.parse(" OR ".join(models_to_delete))
+
+                with self.write_lock():
+                    self.index.delete_by_query(q=query)
+                    self.record(lambda ix: ix.delete_by_query(q=query))
+
+                self.persist_later()
         except Exception as e:
             if not self.silently_fail:
                 raise
@@ -347,20 +608,88 @@ class WhooshSearchBackend(BaseSearchBackend):
     def delete_index(self):
         # Per the Whoosh mailing list, if wiping out everything from the index,
         # it's much more efficient to simply delete the index files.
-        if self.use_file_storage and os.path.exists(self.path):
-            shutil.rmtree(self.path)
-        elif not self.use_file_storage:
-            self.storage.clean()
+        with self.write_lock():
+            if self.use_file_storage and os.path.exists(self.path):
+                shutil.rmtree(self.path)
+            elif not self.use_file_storage:
+                self.storage.clean()
 
-        # Recreate everything.
-        self.setup()
+            # Recreate everything.
+            self.setup()
+            self.record(self._reset_memory_index, raw=True)
+
+        self.persist_later()
 
     def optimize(self):
         if not self.setup_complete:
             self.setup()
 
-        self.index = self.index.refresh()
-        self.index.optimize()
+        with self.write_lock():
+            self.index = self.index.refresh()
+            self.index.optimize()
+            self.record(lambda ix: ix.optimize())
+
+        self.persist_later()
+
+    def write_lock(self):
+        """
+        Serializes writes to a memory index with its persisting.
+        """
+        if self.memory_store is not None:
+            return self.memory_store.write_lock
+
+        return contextlib.nullcontext()
+
+    def record(self, change, raw=False):
+        """
+        Journals a write to a memory index so it can be replayed on top of the
+        disk copy if another process persists first. ``change`` is called
+        with the index, or with the storage when ``raw`` is true.
+        """
+        if self.memory_store is None:
+            return
+
+        if raw:
+            self.memory_store.record(change)
+        else:
+            self.memory_store.record(
+                lambda storage: change(self._open_memory_index(storage))
+            )
+
+    def _open_memory_index(self, storage):
+        try:
+            return storage.open_index(schema=self.schema)
+        except index.EmptyIndexError:
+            return storage.create_index(self.schema)
+
+    def _reset_memory_index(self, storage):
+        storage.clean()
+        storage.create_index(self.schema)
+
+    def _update_documents(self, ix, docs):
+        writer = ix.writer()
+
+        for doc in docs:
+            writer.update_document(**doc)
+
+        writer.commit()
+
+    def persist_later(self):
+        """
+        Schedules a background write of a memory index back to its PATH.
+        """
+        if self.memory_store is not None:
+            self.memory_store.schedule_persist()
+
+    def snapshot(self):
+        """
+        Writes a memory index back to its PATH right away.
+        """
+        if not self.setup_complete:
+            self.setup()
+
+        if self.memory_store is not None:
+            self.memory_store.persist()
 
     def calculate_page(self, start_offset=0, end_offset=None):
         # Prevent against Whoosh throwing an error. Requires an end_offset
@@ -411,6 +740,9 @@ class WhooshSearchBackend(BaseSearchBackend):
         if not self.setup_complete:
             self.setup()
 
+        if self.memory_store is not None:
+            self.memory_store.refresh()
+
         # A zero length query should return no results.
         if len(query_string) == 0:
             return {"results": [], "hits": 0}
@@ -611,6 +943,9 @@ class WhooshSearchBackend(BaseSearchBackend):
         if not self.setup_complete:
             self.setup()
 
+        if self.memory_store is not None:
+            self.memory_store.refresh()
+
         field_name = self.content_field_name
         narrow_queries = set()
         narrowed_results = None
@@ -826,15 +1161,61 @@ class WhooshSearchBackend(BaseSearchBackend):
             "spelling_suggestion": spelling_suggestion,
         }
 
+    def reset_corrector(self):
+        if self._corrector_reader is not None:
+            self._corrector_reader.close()
+        self._corrector = None
+        self._corrector_reader = None
+        self._corrector_generation = None
+        self._suggestion_cache = {}
+
+    def get_corrector(self):
+        """
+        Returns a spelling corrector for the content field, rebuilt only when
+        the index generation changes instead of once per search.
+        """
+        generation = self.index.latest_generation()
+
+        if self._corrector is None or generation != self._corrector_generation:
+            self.reset_corrector()
+            self._corrector_reader = self.index.reader()
+            self._corrector = self._corrector_reader.corrector(self.content_field_name)
+            self._corrector_generation = generation
+
+        return self._corrector
+
+    def suggest_word(self, word):
+        # Check the index generation first: a rebuilt corrector also clears the
+        # memoized suggestions, so cached words never outlive the index.
+        corrector = self.get_corrector()
+
+        if word not in self._suggestion_cache:
+            if len(self._suggestion_cache) >= self.spelling_cache_size:
+                self._suggestion_cache.clear()
+
+            # Words already in the index are spelled correctly.
+            if (self.content_field_name, word) in self._corrector_reader:
+                self._suggestion_cache[word] = word
+            else:
+                # Whoosh scores every candidate within `maxdist` the same way
+                # regardless of its real distance, so try the nearest edits first.
+                suggestions = []
+                for maxdist in range(1, FUZZY_WHOOSH_MAX_EDITS + 1):
+                    suggestions = corrector.suggest(word, limit=1, maxdist=maxdist)
+                    if suggestions:
+                        break
+                self._suggestion_cache[word] = suggestions[0] if suggestions else None
+
+        return self._suggestion_cache[word]
+
     def create_spelling_suggestion(self, query_string):
         spelling_suggestion = None
-        reader = self.index.reader()
-        corrector = reader.corrector(self.content_field_name)
-        cleaned_query = force_str(query_string)
 
         if not query_string:
             return spelling_suggestion
 
+        cleaned_query = force_str(query_string)
+
         # Clean the string.
         for rev_word in self.RESERVED_WORDS:
             cleaned_query = cleaned_query.replace(rev_word, "")
@@ -842,17 +1223,30 @@ class WhooshSearchBackend(BaseSearchBackend):
         for rev_char in self.RESERVED_CHARACTERS:
             cleaned_query = cleaned_query.replace(rev_char, "")
 
-        # Break it down.
-        query_words = cleaned_query.split()
+        # Break it down with jieba, so Chinese phrases are split into the same
+        # words the ChineseAnalyzer indexed rather than on whitespace only.
+        query_words = [word.strip() for word in jieba.cut(cleaned_query)]
         suggested_words = []
 
         for word in query_words:
-            suggestions = corrector.suggest(word, limit=1)
+            if not word:
+                continue
+
+            suggestion = self.suggest_word(word)
 
-            if len(suggestions) > 0:
-                suggested_words.append(suggestions[0])
+            if suggestion is not None:
+                suggested_words.append(suggestion)
+
+        # Chinese words are joined without spaces.
+        spelling_suggestion = ""
+
+        for word in suggested_words:
+            if spelling_suggestion and not (
+                CJK_REGEX.match(spelling_suggestion[-1]) and CJK_REGEX.match(word[0])
+            ):
+                spelling_suggestion += " "
+            spelling_suggestion += word
 
-        spelling_suggestion = " ".join(suggested_words)
         return spelling_suggestion
 
     def _from_python(self, value):
@@ -4,12 +4,16 @@ from django.db import models
 from django.core.cache import caches
 from django.db.models import Model
 
+_MISSING = object()
+
 
 class cached_model_property:
     """将model上的方法作为属性，并缓存
     默认缓存库名：default
-    默认缓存键格式：model的类名(小写):缓存的方法名:model实例的pk
-    note: 更新该属性时仅更新缓存
+    默认缓存键格式：model的类名(小写):model实例的pk:缓存的方法名
+    note: 更新该属性时仅更新缓存；使用TieredRedisCache时读取先走进程内L1，
+    设置/删除时会通知其他进程删除各自L1中的该键
+    note: 计数类属性用 Model.属性.incr(实例) 原子地增加，`实例.属性 += 1` 是先读后写，多进程下会丢失更新
     使用方式1：无法设置自定义
         @cached_model_property
         def yourself_func(self):
@@ -68,18 +72,20 @@ class cached_model_property:
         return self
 
     def __set_name__(self, instance: Model, name: str):
-        if not hasattr(instance, name):
+        # 只检查父类，类本身的该属性就是当前描述器
+        if not any(name in vars(base) for base in instance.__mro__[1:]):
             self.name = name
         else:
             raise AttributeError(f"无法添加属性{name}: {instance}已有属性: {name}.")
 
     def __get__(self, instance: Model, cls: Optional[Type[Model]]):
-        if not self._func:
+        if not self._func or instance is None:
             return self
         cache = caches[self._cache_name]
         key = self.get_key(instance)
-        res = cache.get(key=key)
-        if not res:
+        # 不能用真值判断，否则值为0的属性每次都会重新计算
+        res = cache.get(key=key, default=_MISSING, version=self._version)
+        if res is _MISSING:
             res = self._func(instance)
             cache.set(
                 key=key, value=res, timeout=self.timeout, version=self._version
@@ -94,7 +100,20 @@ class cached_model_property:
     def __delete__(self, instance):
         cache = caches[self._cache_name]
         key = self.get_key(instance)
-        cache.delete(key)  # type: ignore
+        cache.delete(key, version=self._version)  # type: ignore
+
+    def incr(self, instance: Model, delta: int = 1) -> int:
+        """原子地增加缓存中的值，返回增加后的值；缓存中没有该键时先用方法的返回值初始化"""
+        cache = caches[self._cache_name]
+        key = self.get_key(instance)
+        try:
+            return cache.incr(key, delta, version=self._version)
+        except ValueError:
+            # 多个进程同时初始化时只有一个add成功，其余的增量都加在它之上
+            cache.add(
+                key, self._func(instance), timeout=self.timeout, version=self._version
+            )
+            return cache.incr(key, delta, version=self._version)
 
     def get_key(self, instance):
         return f"{instance.__class__.__name__.lower()}:{instance.pk}:{self.name}"
@@ -93,24 +93,39 @@ DATABASES = {
 }
 
 # 缓存配置
+# Redis缓存地址，各别名共用一个库，通过KEY_PREFIX区分（注意cache.clear()会清空整个库）
+REDIS_CACHE_URL = "redis://127.0.0.1:6379/1"
+# Redis连接池配置，每个进程每个别名一个连接池
+REDIS_CACHE_OPTIONS = {
+    "max_connections": 50,
+    "socket_connect_timeout": 1,
+    "socket_timeout": 1,
+    "health_check_interval": 30,
+}
 CACHES = {
     "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
-        "LOCATION": "default",
-        # "LOCATION": "redis://127.0.0.1:6379/0",
+        "BACKEND": "yus_note.cache.backends.RedisCache",
+        "LOCATION": REDIS_CACHE_URL,
+        "KEY_PREFIX": "yus_note:default",
         "TIMEOUT": 300,
+        "OPTIONS": REDIS_CACHE_OPTIONS,
     },
-    "authcode": {  # 验证码缓存
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
-        "LOCATION": "authcode",
-        # "LOCATION": "redis://127.0.0.1:6379/1",
+    "authcode": {  # 验证码缓存，需要各进程严格一致，不使用本地L1
+        "BACKEND": "yus_note.cache.backends.RedisCache",
+        "LOCATION": REDIS_CACHE_URL,
+        "KEY_PREFIX": "yus_note:authcode",
         "TIMEOUT": 300,
+        "OPTIONS": REDIS_CACHE_OPTIONS,
     },
-    "model_fields": {  # 模型字段缓存，如用户的粉丝数，笔记的浏览量
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
-        "LOCATION": "field",
-        # "LOCATION": "redis://127.0.0.1:6379/1",
+    # 模型字段缓存，如笔记的浏览量
+    # 目前只有每次浏览都会写入的浏览量计数，不适合进程内L1缓存，因此不使用TieredRedisCache；
+    # 以后加入读多写少的热点字段时再换成TieredRedisCache，并用L1_EXCLUDE排除浏览量
+    "model_fields": {
+        "BACKEND": "yus_note.cache.backends.RedisCache",
+        "LOCATION": REDIS_CACHE_URL,
+        "KEY_PREFIX": "yus_note:model_fields",
         "TIMEOUT": 600,
+        "OPTIONS": REDIS_CACHE_OPTIONS,
     },
 }
 
@@ -239,6 +254,16 @@ LOGGING = {
 
 # region drf配置========================================
 REST_FRAMEWORK = {
+    # 使用orjson编码/解码JSON，未安装orjson时退回标准库
+    "DEFAULT_RENDERER_CLASSES": [
+        "yus_note.drf.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "yus_note.drf.renderers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
     "DEFAULT_THROTTLE_CLASSES": [
         "rest_framework.throttling.ScopedRateThrottle",
     ],
@@ -270,16 +295,40 @@ CELERY_TIMEZONE = TIME_ZONE
 CELERYBEAT_SCHEDULE = {
     "synchronize_note_views_peer_day": {  # 定时同步note浏览量
         # 任务路径
-        "task": "apps.note.tasks.synchronize_note_views",
+        "task": "note.tasks.synchronize_note_views",
         # 每天2点59分
         "schedule": crontab(hour="2", minute="59"),
     },
     "synchronize_note_views_seconds": {  # 每隔一段时间同步note浏览量
         # 任务路径
-        "task": "apps.note.tasks.synchronize_note_views",
+        "task": "note.tasks.synchronize_note_views",
         # 每5分钟同步
         "schedule": 300,
     },
+    "rebuild_related_notes_peer_day": {  # 定时全量计算相关笔记
+        # 任务路径
+        "task": "note.tasks.rebuild_related_notes",
+        # 每天4点
+        "schedule": crontab(hour="4", minute="0"),
+    },
+    "send_review_reminders_peer_day": {  # 每日复习提醒
+        # 任务路径
+        "task": "user.tasks.send_review_reminders",
+        # 每天8点
+        "schedule": crontab(hour="8", minute="0"),
+    },
+    "reconcile_follow_counts_peer_day": {  # 定时校正关注数和粉丝数
+        # 任务路径
+        "task": "user.tasks.reconcile_follow_counts",
+        # 每天3点30分
+        "schedule": crontab(hour="3", minute="30"),
+    },
+    "reconcile_comment_counts_peer_day": {  # 定时校正评论数和回复数
+        # 任务路径
+        "task": "note.tasks.reconcile_comment_counts",
+        # 每天3点45分
+        "schedule": crontab(hour="3", minute="45"),
+    },
 }
 
 # endregion drf配置======================================
@@ -311,23 +360,49 @@ HAYSTACK_CONNECTIONS = {
         # 'ENGINE': 'haystack.backends.whoosh_backend.WhooshEngine',
         "ENGINE": "yus_note.haystack.backends.whoosh_cn_backend.WhooshEngine",
         "PATH": INDEX_PATH,
+        # 索引存储方式：file-磁盘；memory-启动时将PATH中的索引载入内存，查询走内存，写入后异步持久化到PATH
+        "STORAGE": "file",
+        # memory模式下，写入后延迟多少秒持久化到磁盘
+        # 多进程共用PATH时，其他进程先持久化了则重新载入磁盘上的索引并重放本进程的修改
+        # "PERSIST_DELAY": 1.0,
+        # memory模式下，每隔多少秒检查一次其他进程是否持久化了新的索引
+        # "RELOAD_INTERVAL": 1.0,
     },
 }
 
 # 自动更新索引
 HAYSTACK_SIGNAL_PROCESSOR = "haystack.signals.RealtimeSignalProcessor"
+
+SUGGEST_TOP_K = 10  # 搜索联想每个前缀最多返回的条数
+
+SUGGEST_REBUILD_INTERVAL = 600  # 搜索联想索引全量重建间隔（秒）
+
+# 每篇笔记保存的相关笔记数量
+RELATED_NOTES_NUMBER = 10
 # endregion haystack配置=====================================
 
 # region 自定义配置========================================
 # 默认用户头像，注意需要/media前缀
 DEFAULT_AVATOR = "/media/user/default_avators/male.png"
 
-# 用户默认复习计划
-DEFAULT_REVIEW_PLAN = "1,3,7,14,30"
+# 用户默认复习计划：各阶段间隔天数
+DEFAULT_REVIEW_PLAN = [1, 3, 7, 14, 30]
+
+# 批量复习打卡单次最多条目数
+REVIEW_BATCH_PUNCH_MAX = 200
 
 # 用户历史记录保存时长：天
 HISTORY_EXPIRES = 90
 
+# 文件夹笔记统计缓存时长：秒，笔记新建、移动、删除时会主动失效
+FOLDER_STATS_TIMEOUT = 3600
+
+# 大列表（笔记、关注/粉丝）直接由.values()构建响应，设为False时使用常规序列化器
+VALUES_LIST_SERIALIZERS = True
+
+# 用户主页缓存时长：秒，用户信息、关注关系、发布和复习记录变化时会主动失效
+PROFILE_CACHE_TIMEOUT = 3600
+
 # 验证码默认缓存数据库(CACHES中)
 DEFAULT_AUTHCODE_CACHE = "authcode"
 
@@ -337,6 +412,29 @@ AUTHCODE_EMAIL_CONTENT_TEMPLATE = (
     "<h1>您好：</h1></br>您的验证码为：<strong>{}</strong></br>请在5分钟内完成验证。"
 )
 
+# 关注动态（时间线）配置
+FEED = {
+    # 时间线使用的Redis
+    "REDIS_URL": "redis://127.0.0.1:6379/2",
+    "OPTIONS": REDIS_CACHE_OPTIONS,
+    "KEY_PREFIX": "yus_note:feed",
+    # 每个用户时间线最多保留的笔记数
+    "MAX_LENGTH": 500,
+    # 粉丝数不少于该值的用户发布笔记时不推送，由粉丝读取时从数据库拉取
+    "CELEBRITY_FOLLOWERS": 10000,
+}
+
+# 复习提醒配置
+REVIEW_REMINDER = {
+    "EMAIL_SUBJECT": "昱的笔记：今日复习提醒",
+    # 可用变量：username、notes（笔记数）、collections（收藏数）、total（总数）
+    "EMAIL_TEMPLATE": "{username}您好：\n今天有{notes}篇笔记、{collections}篇收藏需要复习，共{total}篇。",
+    # 每批发送的邮件数/每个短信请求的手机号数（短信最多200）
+    "BATCH_SIZE": 100,
+    # 每批之间的间隔：秒
+    "BATCH_INTERVAL": 1,
+}
+
 # 腾讯云产品配置
 TENCENT = {
     # 用于实例化一个认证对象，入参需要传入腾讯云账户密钥对secretId，secretKey。
@@ -373,7 +471,15 @@ TENCENT = {
                 # 注：月度使用量达到指定量级可申请独立 SenderId 使用，详情请联系 [腾讯云短信小助手](https://cloud.tencent.com/document/product/382/3773#.E6.8A.80.E6.9C.AF.E4.BA.A4.E6.B5.81)。
                 # 官方参数https://cloud.tencent.com/document/product/382/55981
             },
-        }
+        },
+        "review_reminder": {  # 用来发送复习提醒的配置，模板参数为待复习总数，其余配置同上
+            "REGION": "ap-beijing",
+            "REQUEST": {
+                "SmsSdkAppId": "",
+                "TemplateId": "",
+                "SignName": "",
+            },
+        },
     },
 }
 
@@ -0,0 +1,47 @@
+"""
+基准测试配置：使用临时目录中的SQLite数据库与whoosh索引，不会影响开发/生产数据。
+使用方式：python manage.py bench_search --settings=yus_note.settings_bench
+"""
+
+import tempfile
+
+from yus_note.settings import *  # noqa: F401,F403
+from yus_note.settings import Path
+
+# 基准测试数据目录
+BENCH_DIR = Path(tempfile.gettempdir()) / "yus_note_bench"
+if not Path.exists(BENCH_DIR):
+    Path.mkdir(BENCH_DIR)
+
+# 允许基准测试命令清空并生成数据
+BENCHMARK = True
+
+# 基准测试命令使用APIRequestFactory构造请求，其主机名为testserver
+ALLOWED_HOSTS = ["testserver"]
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BENCH_DIR / "db.sqlite3",
+    }
+}
+
+HAYSTACK_CONNECTIONS = {
+    "default": {
+        "ENGINE": "yus_note.haystack.backends.whoosh_cn_backend.WhooshEngine",
+        "PATH": BENCH_DIR / "whoosh_index",
+        "STORAGE": "file",
+    },
+}
+
+# 基准测试不依赖Redis
+CACHES = {
+    alias: {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": alias,
+    }
+    for alias in CACHES  # noqa: F405
+}
+
+# 生成数据时不实时更新索引，由基准测试命令统一建索引
+HAYSTACK_SIGNAL_PROCESSOR = "haystack.signals.BaseSignalProcessor"
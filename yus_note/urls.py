@@ -32,6 +32,8 @@ from apps.user_proxy.views import (
     UserFoldersViewSet,
     UserFavoritesViewSet,
     UserNotesViewSet,
+    UserReviewDueView,
+    UserFeedView,
     TargetUserView,
     TargetUserFoldersViewSet,
     TargetUserFavoritesViewSet,
@@ -45,6 +47,7 @@ from apps.note.views import (
     NoteCommentsViewSet,
     NoteTagSearchViewSet,
     NoteSearchViewSet,
+    NoteSuggestView,
 )
 
 
@@ -85,6 +88,9 @@ urlpatterns = [
     path("login/", LoginView.as_view(), name="login"),
     path("logout/", LogoutView.as_view(), name="logout"),
     path("user/profile/", UserView.as_view(), name="user_profile"),
+    path("user/review/due/", UserReviewDueView.as_view(), name="user_review_due"),
+    path("user/feed/", UserFeedView.as_view(), name="user_feed"),
+    path("search/suggest/", NoteSuggestView.as_view(), name="search_suggest"),
     path(
         "user/<int:target_user>/profile/",
         TargetUserView.as_view(),